@@ -0,0 +1,243 @@
+"""
+Генерация синтетических документов MongoDB для бенчмарков ETL
+
+Форма документов повторяет то, что пишут
+MongoDBClient.save_current_weather / save_forecast в src/app.
+"""
+
+import csv
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson import ObjectId
+
+PROVIDERS = ["open_meteo", "openweathermap", "weatherapi", "weatherbit", "weatherstack"]
+
+# Горизонты, которые запрашивает DAG weather_data_collection
+FORECAST_HOURS = [1, 5, 10, 24, 48, 72, 96, 120, 144, 168]
+
+CITIES_SEED = Path(__file__).resolve().parents[2] / "dbt" / "seeds" / "cities.csv"
+
+
+def load_cities(path: Path = CITIES_SEED) -> list[tuple[float, float]]:
+    """Координаты городов из dbt seed (дубликаты убираются)"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = {
+            (float(r["latitude"]), float(r["longitude"])) for r in csv.DictReader(f)
+        }
+    return sorted(rows)
+
+
+def _raw_payload(provider: str, temp: float, hum: float, wind: float) -> dict:
+    """Упрощённый сырой ответ провайдера (поля, которые читает stg-слой dbt)"""
+    if provider == "open_meteo":
+        return {
+            "current_weather": {
+                "temperature": temp,
+                "windspeed": wind,
+                "winddirection": 180.0,
+                "time": "2025-12-01T12:00",
+            }
+        }
+    if provider == "openweathermap":
+        return {
+            "main": {"temp": temp, "feels_like": temp - 1, "pressure": 1013},
+            "wind": {"speed": round(wind / 3.6, 2), "deg": 180},
+            "clouds": {"all": 40},
+            "visibility": 10000,
+            "weather": [{"description": "scattered clouds"}],
+        }
+    if provider == "weatherapi":
+        return {
+            "current": {
+                "temp_c": temp,
+                "feelslike_c": temp - 1,
+                "humidity": hum,
+                "wind_kph": wind,
+                "wind_degree": 180,
+                "pressure_mb": 1013.0,
+                "precip_mm": 0.0,
+                "cloudcover": 40,
+                "vis_km": 10.0,
+                "uv": 2.0,
+                "condition": {"text": "Partly cloudy"},
+            }
+        }
+    if provider == "weatherbit":
+        return {
+            "data": [
+                {
+                    "temp": temp,
+                    "app_temp": temp - 1,
+                    "rh": hum,
+                    "wind_spd": round(wind / 3.6, 2),
+                    "wind_dir": 180,
+                    "pres": 1013.0,
+                    "precip": 0.0,
+                    "clouds": 40,
+                    "vis": 10.0,
+                    "uv": 2.0,
+                    "weather": {"description": "Scattered clouds"},
+                }
+            ]
+        }
+    return {
+        "current": {
+            "temperature": temp,
+            "feelslike": temp - 1,
+            "humidity": hum,
+            "wind_speed": wind,
+            "wind_degree": 180,
+            "pressure": 1013,
+            "precip": 0,
+            "cloudcover": 40,
+            "visibility": 10,
+            "uv_index": 2,
+            "weather_descriptions": ["Partly cloudy"],
+        }
+    }
+
+
+def make_current_document(
+    lat: float | None = None,
+    lon: float | None = None,
+    providers: int = len(PROVIDERS),
+    created_at: datetime | None = None,
+    rng: random.Random | None = None,
+) -> dict:
+    """Документ текущей погоды с samples от каждого провайдера"""
+    rng = rng or random.Random(0)
+    created_at = created_at or datetime(2025, 12, 1, 12, 0, 0, 123456)
+    lat = round(rng.uniform(-60, 70), 2) if lat is None else lat
+    lon = round(rng.uniform(-180, 180), 2) if lon is None else lon
+
+    samples = []
+    for provider in PROVIDERS[:providers]:
+        temp = round(rng.uniform(-30, 35), 1)
+        hum = float(rng.randint(10, 100))
+        wind = round(rng.uniform(0, 60), 1)
+        samples.append(
+            {
+                "provider": provider,
+                "temperature_c": temp,
+                "wind_speed_kph": wind,
+                "humidity": None if provider == "open_meteo" else hum,
+                "condition": None if provider == "open_meteo" else "Partly cloudy",
+                "observation_time": created_at.replace(second=0, microsecond=0),
+                "raw": _raw_payload(provider, temp, hum, wind),
+            }
+        )
+
+    temps = [s["temperature_c"] for s in samples]
+    hums = [s["humidity"] for s in samples if s["humidity"] is not None]
+    return {
+        "_id": ObjectId(),
+        "type": "current",
+        "latitude": lat,
+        "longitude": lon,
+        "request": {"lat": lat, "lon": lon},
+        "response": {
+            "latitude": lat,
+            "longitude": lon,
+            "samples": samples,
+            "average_temperature_c": sum(temps) / len(temps) if temps else None,
+            "average_humidity": sum(hums) / len(hums) if hums else None,
+        },
+        "status_code": 200,
+        "error_message": None,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def make_forecast_document(
+    hours: int = 168,
+    providers: int = len(PROVIDERS),
+    created_at: datetime | None = None,
+    rng: random.Random | None = None,
+    lat: float | None = None,
+    lon: float | None = None,
+) -> dict:
+    """Документ прогноза: по `hours` точек от каждого провайдера"""
+    rng = rng or random.Random(0)
+    created_at = created_at or datetime(2025, 12, 1, 12, 0, 0, 123456)
+    lat = round(rng.uniform(-60, 70), 2) if lat is None else lat
+    lon = round(rng.uniform(-180, 180), 2) if lon is None else lon
+    start = created_at.replace(minute=0, second=0, microsecond=0)
+
+    forecasts = []
+    for provider in PROVIDERS[:providers]:
+        points = [
+            {
+                "time": start + timedelta(hours=h),
+                "temperature_c": round(rng.uniform(-30, 35), 1),
+                "wind_speed_kph": round(rng.uniform(0, 60), 1),
+                "humidity": float(rng.randint(10, 100)),
+            }
+            for h in range(hours)
+        ]
+        forecasts.append({"provider": provider, "points": points})
+
+    return {
+        "_id": ObjectId(),
+        "type": "forecast",
+        "latitude": lat,
+        "longitude": lon,
+        "hours": hours,
+        "request": {"lat": lat, "lon": lon, "hours": hours},
+        "response": {
+            "latitude": lat,
+            "longitude": lon,
+            "hours": hours,
+            "forecasts": forecasts,
+        },
+        "status_code": 200,
+        "error_message": None,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def iter_current_documents(
+    count: int,
+    cities: list[tuple[float, float]],
+    start: datetime,
+    seed: int = 0,
+):
+    """
+    Поток документов текущей погоды в порядке почасовых сборов:
+    каждый час - по одному документу на город
+    """
+    rng = random.Random(seed)
+    for idx in range(count):
+        sweep, city_idx = divmod(idx, len(cities))
+        lat, lon = cities[city_idx]
+        created_at = start + timedelta(hours=sweep, seconds=city_idx)
+        yield make_current_document(lat=lat, lon=lon, created_at=created_at, rng=rng)
+
+
+def iter_forecast_documents(
+    count: int,
+    cities: list[tuple[float, float]],
+    start: datetime,
+    seed: int = 0,
+):
+    """
+    Поток документов прогнозов в порядке почасовых сборов:
+    каждый час - по документу на каждую пару город/горизонт
+    """
+    rng = random.Random(seed)
+    per_sweep = len(cities) * len(FORECAST_HOURS)
+    for idx in range(count):
+        sweep, offset = divmod(idx, per_sweep)
+        city_idx, hours_idx = divmod(offset, len(FORECAST_HOURS))
+        lat, lon = cities[city_idx]
+        created_at = start + timedelta(hours=sweep, seconds=offset)
+        yield make_forecast_document(
+            hours=FORECAST_HOURS[hours_idx],
+            created_at=created_at,
+            rng=rng,
+            lat=lat,
+            lon=lon,
+        )
@@ -0,0 +1,232 @@
+"""
+Бенчмарк пропускной способности ETL MongoDB -> PostgreSQL
+
+Генерирует синтетические документы текущей погоды и прогнозов,
+загружает их в отдельную базу локального MongoDB и прогоняет
+move_data_to_postgres против отдельной базы локального PostgreSQL.
+Подключение берётся из тех же переменных окружения, что и у коннектора
+(MONGO_*, POSTGRES_*), имена баз подменяются на бенчмарковые.
+
+Отчёт: время и строки в секунду по стадиям, пиковая память процесса.
+
+Запуск:
+    python benchmarks/etl_throughput.py --current 10000 --forecasts 10000
+    python benchmarks/etl_throughput.py --current 1000000 --forecasts 200000 \\
+        --output results.json --baseline previous.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import cycle, islice
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "dags"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import connector__mongo_postgres_logic as connector  # noqa: E402
+from documents import (  # noqa: E402
+    iter_current_documents,
+    iter_forecast_documents,
+    load_cities,
+)
+from pymongo import MongoClient  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+PRODUCTION_MONGO_DATABASE = "weather_analytics_db"
+# DWH по умолчанию (dbt profiles.yml) и метаданные Airflow
+PRODUCTION_POSTGRES_DATABASES = {"weather_dwh", "airflow"}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss в килобайтах на Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    """Сбор времени, числа строк и памяти по стадиям"""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.stages: dict[str, dict] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        stats = {"rows": 0}
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats["seconds"] = time.perf_counter() - started
+            stats["rows_per_sec"] = (
+                stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+            )
+            if self.trace_memory:
+                stats["peak_heap_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                tracemalloc.stop()
+            stats["peak_rss_mb"] = _peak_rss_mb()
+            self.stages[name] = stats
+
+    def report(self) -> None:
+        print(f"{'stage':<24}{'rows':>12}{'seconds':>10}{'rows/s':>12}{'rss MB':>10}")
+        for name, s in self.stages.items():
+            print(
+                f"{name:<24}{s['rows']:>12}{s['seconds']:>10.2f}"
+                f"{s['rows_per_sec']:>12.0f}{s['peak_rss_mb']:>10.0f}"
+                + (f"  heap {s['peak_heap_mb']:.0f} MB" if "peak_heap_mb" in s else "")
+            )
+
+
+def _ensure_postgres_database(name: str) -> None:
+    """Создание бенчмарковой базы PostgreSQL, если её ещё нет"""
+    pg = connector.get_config()["postgres"]
+    admin_url = pg["url"].rsplit("/", 1)[0] + "/postgres"
+    engine = create_engine(admin_url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}
+        ).scalar()
+        if not exists:
+            conn.execute(text(f'CREATE DATABASE "{name}"'))
+    engine.dispose()
+
+
+def _reset(mongo: MongoClient, mongo_database: str) -> None:
+    mongo.drop_database(mongo_database)
+    with connector.get_engine().begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS raw CASCADE"))
+    connector._known_partitions.clear()
+
+
+def _load_mongo(collection, documents, batch_size: int, stats: dict) -> None:
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        collection.insert_many(batch, ordered=False)
+        stats["rows"] += len(batch)
+
+
+def _drain(generator, stats: dict) -> None:
+    for _ in generator:
+        stats["rows"] += 1
+
+
+def _compare(results: dict, baseline_path: Path, tolerance: float) -> bool:
+    """Сравнение rows/sec с сохранённым прогоном, True - регрессий нет"""
+    baseline = json.loads(baseline_path.read_text())["stages"]
+    ok = True
+    for name, stats in results["stages"].items():
+        if name not in baseline or not baseline[name]["rows_per_sec"]:
+            continue
+        ratio = stats["rows_per_sec"] / baseline[name]["rows_per_sec"]
+        flag = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        ok = ok and flag == "ok"
+        print(f"{name:<24}{ratio:>8.2f}x vs baseline  {flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--current", type=int, default=10_000)
+    parser.add_argument("--forecasts", type=int, default=10_000)
+    parser.add_argument(
+        "--cities", type=int, default=0, help="Число городов (0 - из dbt seed)"
+    )
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--start", default="2025-11-01T00:00:00")
+    parser.add_argument("--mongo-database", default="weather_benchmark_db")
+    parser.add_argument("--postgres-database", default="weather_benchmark")
+    parser.add_argument(
+        "--skip-generate", action="store_true", help="Не пересоздавать данные"
+    )
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.mongo_database == PRODUCTION_MONGO_DATABASE:
+        parser.error("benchmark must not run against the production Mongo database")
+    # _reset удаляет схему raw целиком: только не в рабочей базе из POSTGRES_DB
+    configured_postgres = connector.get_config()["postgres"]["dbname"]
+    if (
+        args.postgres_database == configured_postgres
+        or args.postgres_database in PRODUCTION_POSTGRES_DATABASES
+    ):
+        parser.error("benchmark must not run against the production Postgres database")
+
+    _ensure_postgres_database(args.postgres_database)
+    os.environ["MONGO_DATABASE"] = args.mongo_database
+    os.environ["POSTGRES_DB"] = args.postgres_database
+
+    cities = load_cities()
+    if args.cities:
+        # Дополняем seed копиями, сдвинутыми по долготе, до нужного числа городов
+        seed = cities
+        cities = [
+            (lat, round((lon + 180 + 0.05 * (i // len(seed))) % 360 - 180, 2))
+            for i, (lat, lon) in zip(range(args.cities), cycle(seed))
+        ]
+    start = datetime.fromisoformat(args.start)
+
+    timer = StageTimer(trace_memory=args.trace_memory)
+    mongo = MongoClient(**connector.get_config()["mongo"])
+    db = mongo[args.mongo_database]
+
+    if not args.skip_generate:
+        _reset(mongo, args.mongo_database)
+        with timer.stage("mongo_load_current") as stats:
+            docs = iter_current_documents(args.current, cities, start)
+            _load_mongo(db["weather_current"], docs, args.batch_size, stats)
+        with timer.stage("mongo_load_forecast") as stats:
+            docs = iter_forecast_documents(args.forecasts, cities, start)
+            _load_mongo(db["weather_forecast"], docs, args.batch_size, stats)
+
+    with timer.stage("declare_database"):
+        connector.declare_database_in_postgres()
+
+    with timer.stage("extract_current") as stats:
+        _drain(connector.get_current_weather_from_mongo(), stats)
+    with timer.stage("extract_forecast") as stats:
+        _drain(connector.get_forecasts_from_mongo(), stats)
+
+    with timer.stage("connector_total") as stats:
+        result = connector.move_data_to_postgres()
+        stats["rows"] = result["current_weather_count"] + result["forecast_count"]
+
+    # Повторный прогон без новых данных - стоимость окна переобработки
+    with timer.stage("connector_rerun") as stats:
+        result = connector.move_data_to_postgres()
+        stats["rows"] = result["current_weather_count"] + result["forecast_count"]
+
+    mongo.close()
+    timer.report()
+
+    results = {
+        "params": {
+            "current": args.current,
+            "forecasts": args.forecasts,
+            "cities": len(cities),
+            "batch_size": args.batch_size,
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": timer.stages,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        return 0 if _compare(results, args.baseline, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
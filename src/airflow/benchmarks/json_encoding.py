@@ -0,0 +1,84 @@
+"""
+Бенчмарк сериализации JSONB-полей коннектора MongoDB -> PostgreSQL
+
+Сравнивает прежнюю схему (рекурсивная конвертация datetime в строки,
+затем json.dumps внутри SQLAlchemy) с однопроходным encode_json
+на прогнозах с горизонтом 168 часов.
+
+Запуск:
+    python benchmarks/json_encoding.py --documents 200 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "dags"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from connector__mongo_postgres_logic import encode_json  # noqa: E402
+from documents import make_forecast_document  # noqa: E402
+
+
+def _legacy_convert(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, dict):
+        return {k: _legacy_convert(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_legacy_convert(item) for item in obj]
+    return obj
+
+
+def legacy_encode(obj) -> str:
+    """Прежний путь: копия документа + json.dumps по умолчанию в SQLAlchemy"""
+    return json.dumps(_legacy_convert(obj))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=168)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    docs = [
+        make_forecast_document(hours=args.hours, rng=rng) for _ in range(args.documents)
+    ]
+    fields = [doc[key] for doc in docs for key in ("request", "response")]
+
+    # Результаты должны совпадать по содержимому
+    for field in fields[:10]:
+        assert json.loads(encode_json(field)) == json.loads(legacy_encode(field))
+
+    payload_mb = sum(len(encode_json(f)) for f in fields) / 1024 / 1024
+    print(
+        f"{args.documents} forecast documents, {args.hours}h, "
+        f"{payload_mb:.1f} MB of JSON"
+    )
+
+    results = {}
+    for name, encode in (("legacy", legacy_encode), ("encode_json", encode_json)):
+        best = min(
+            timeit.repeat(
+                lambda encode=encode: [encode(f) for f in fields],
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        results[name] = best
+        print(
+            f"  {name:<12} {best * 1000:8.1f} ms  "
+            f"{args.documents / best:10.0f} docs/s  {payload_mb / best:8.1f} MB/s"
+        )
+
+    print(f"  speedup      {results['legacy'] / results['encode_json']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
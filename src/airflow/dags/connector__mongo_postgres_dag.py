@@ -1,12 +1,17 @@
 """
 DAG для переноса данных из MongoDB в PostgreSQL DWH
+
+Запускается по обновлению COLLECTED_WEATHER (после каждого сбора) и
+публикует RAW_WEATHER, если в raw-таблицы попали новые строки.
 """
 
 from datetime import datetime, timedelta
 
 from airflow import DAG
+from airflow.exceptions import AirflowSkipException
 from airflow.operators.python_operator import PythonOperator
 from connector__mongo_postgres_logic import move_data_to_postgres
+from weather_datasets import COLLECTED_WEATHER, RAW_WEATHER
 
 default_args = {
     "owner": "airflow",
@@ -22,14 +27,34 @@ dag = DAG(
     "connector__mongo_postgres",
     default_args=default_args,
     description="ETL: MongoDB -> PostgreSQL DWH для weather analytics",
-    schedule_interval="@hourly",  # Каждый час
+    schedule=[COLLECTED_WEATHER],  # По событию сбора
+    max_active_runs=1,  # SCD2-загрузки не должны пересекаться
     catchup=False,
     tags=["etl", "mongodb", "postgres", "weather"],
 )
 
+
+def move_weather_data_to_dwh(outlet_events, **context):
+    """
+    Перенос данных и публикация RAW_WEATHER с числом новых строк
+
+    Без новых строк задача пропускается: skipped-задача не создаёт
+    событие Dataset, и dbt не запускается впустую.
+    """
+    result = move_data_to_postgres()
+    if not result["current_weather_count"] and not result["forecast_count"]:
+        raise AirflowSkipException("Новых строк в raw-таблицах нет")
+
+    outlet_events[RAW_WEATHER].extra = {
+        "current_weather_count": result["current_weather_count"],
+        "forecast_count": result["forecast_count"],
+    }
+    return result
+
+
 with dag:
     etl_task = PythonOperator(
         task_id="move_weather_data_to_dwh",
-        python_callable=move_data_to_postgres,
-        provide_context=True,
+        python_callable=move_weather_data_to_dwh,
+        outlets=[RAW_WEATHER],
     )
@@ -2,30 +2,97 @@
 ETL логика для переноса данных из MongoDB в PostgreSQL DWH
 """
 
+import hashlib
+import json
 import os
 from datetime import datetime, timedelta
+from itertools import islice
 
+from bson import ObjectId
 from dotenv import load_dotenv
 from loguru import logger
 from pymongo import MongoClient
-from sqlalchemy import Column, DateTime, Float, Integer, String, create_engine, text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    create_engine,
+    insert,
+    text,
+    tuple_,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json как запасной вариант
+    orjson = None
+
 load_dotenv()
 
 
-def convert_datetime_to_str(obj):
-    """Рекурсивно конвертирует datetime в строки в словарях и списках"""
+def _json_default(obj):
+    """Сериализация BSON-типов, которых нет в JSON"""
     if isinstance(obj, datetime):
         return obj.isoformat()
-    elif isinstance(obj, dict):
-        return {k: convert_datetime_to_str(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_datetime_to_str(item) for item in obj]
-    return obj
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_json_default, option=option)
+    return json.dumps(
+        obj,
+        default=_json_default,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=sort_keys,
+    ).encode()
+
+
+def encode_json(obj) -> str:
+    """
+    Сериализация BSON-документа в JSON за один проход
+
+    Используется как json_serializer движка SQLAlchemy: JSONB-колонки
+    получают документ из MongoDB как есть, без промежуточной копии
+    с datetime, сконвертированными в строки.
+    """
+    return _dumps(obj).decode()
+
+
+# Поля документа, изменение которых порождает новую версию SCD Type 2
+HASHED_FIELDS = (
+    "latitude",
+    "longitude",
+    "hours",
+    "request",
+    "response",
+    "status_code",
+    "error_message",
+)
+
+
+def content_hash(item: dict) -> str:
+    """
+    Хэш нормализованного содержимого документа MongoDB
+
+    Служебные поля (_id, created_at, updated_at) не учитываются, поэтому
+    документ, у которого изменился только updated_at, даёт тот же хэш.
+    """
+    payload = {field: item.get(field) for field in HASHED_FIELDS if field in item}
+    return hashlib.blake2b(_dumps(payload, sort_keys=True), digest_size=16).hexdigest()
 
 
 def get_config():
@@ -38,6 +105,9 @@ def get_config():
             "port": int(os.getenv("MONGO_PORT")),
             "authSource": "admin",
         },
+        "mongo_database": os.getenv("MONGO_DATABASE", "weather_analytics_db"),
+        # Каталог Parquet data lake; если задан, коннектор дублирует туда данные
+        "parquet_lake_dir": os.getenv("PARQUET_LAKE_DIR"),
         "postgres": {
             "dbname": os.getenv("POSTGRES_DB"),
             "user": os.getenv("POSTGRES_USER"),
@@ -56,14 +126,34 @@ def get_config():
     }
 
 
+def get_engine():
+    """Движок SQLAlchemy для DWH с однопроходной сериализацией JSONB"""
+    postgres_config = get_config()["postgres"]
+    return create_engine(postgres_config["url"], json_serializer=encode_json)
+
+
 Base = declarative_base()
 
+# valid_to_dttm активной (последней) версии записи SCD Type 2
+ACTIVE_VALID_TO = datetime(5999, 1, 1)
+
 
 class WeatherCurrent(Base):
     """Таблица для текущей погоды"""
 
     __tablename__ = "weather_current"
-    __table_args__ = {"schema": "raw"}
+    __table_args__ = (
+        # Поиск активной версии при upsert
+        Index(
+            "ix_weather_current_active_weather_id",
+            "weather_id",
+            postgresql_where=text(f"valid_to_dttm = '{ACTIVE_VALID_TO:%Y-%m-%d}'"),
+        ),
+        # max(updated_at) в get_last_update_at
+        Index("ix_weather_current_updated_at", "updated_at"),
+        Index("ix_weather_current_content_hash", "content_hash"),
+        {"schema": "raw", "postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     weather_id = Column(String, nullable=False)  # Убрали unique=True для SCD Type 2
@@ -72,18 +162,29 @@ class WeatherCurrent(Base):
     request = Column(JSONB)
     response = Column(JSONB)
     status_code = Column(Integer)
-    created_at = Column(DateTime)
+    # Ключ партиционирования обязан входить в первичный ключ
+    created_at = Column(DateTime, primary_key=True)
     updated_at = Column(DateTime)
+    content_hash = Column(String(32))
 
     valid_from_dttm = Column(DateTime, server_default=func.now())
-    valid_to_dttm = Column(DateTime, nullable=False, default="5999-01-01")
+    valid_to_dttm = Column(DateTime, nullable=False, default=ACTIVE_VALID_TO)
 
 
 class WeatherForecast(Base):
     """Таблица для прогнозов погоды"""
 
     __tablename__ = "weather_forecast"
-    __table_args__ = {"schema": "raw"}
+    __table_args__ = (
+        Index(
+            "ix_weather_forecast_active_forecast_id",
+            "forecast_id",
+            postgresql_where=text(f"valid_to_dttm = '{ACTIVE_VALID_TO:%Y-%m-%d}'"),
+        ),
+        Index("ix_weather_forecast_updated_at", "updated_at"),
+        Index("ix_weather_forecast_content_hash", "content_hash"),
+        {"schema": "raw", "postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     forecast_id = Column(String, nullable=False)  # Убрали unique=True для SCD Type 2
@@ -93,23 +194,131 @@ class WeatherForecast(Base):
     request = Column(JSONB)
     response = Column(JSONB)
     status_code = Column(Integer)
-    created_at = Column(DateTime)
+    created_at = Column(DateTime, primary_key=True)
     updated_at = Column(DateTime)
+    content_hash = Column(String(32))
 
     valid_from_dttm = Column(DateTime, server_default=func.now())
-    valid_to_dttm = Column(DateTime, nullable=False, default="5999-01-01")
+    valid_to_dttm = Column(DateTime, nullable=False, default=ACTIVE_VALID_TO)
+
+
+# Созданные и закоммиченные месячные партиции (чтобы не выполнять DDL
+# на каждую строку). Пополняется вызывающим кодом только после commit:
+# откаченный CREATE TABLE не должен остаться в кэше
+_known_partitions: set[str] = set()
+
+
+def is_partitioned(connection, model) -> bool:
+    """Проверка, что таблица создана как партиционированная"""
+    return bool(
+        connection.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = :schema AND c.relname = :table)"
+            ),
+            {"schema": model.__table__.schema, "table": model.__tablename__},
+        ).scalar()
+    )
+
+
+def _month_start(moment: datetime, shift: int = 0) -> datetime:
+    """Начало месяца moment, сдвинутого на shift месяцев"""
+    year, month = divmod(moment.year * 12 + moment.month - 1 + shift, 12)
+    return datetime(year, month + 1, 1)
+
+
+def ensure_partition(connection, model, moment: datetime):
+    """
+    Создание месячной партиции по created_at, в которую попадает moment
+
+    Args:
+        connection: Соединение или сессия SQLAlchemy
+        model: Модель партиционированной таблицы
+        moment: Любой момент времени внутри нужного месяца
+
+    Returns:
+        Имя партиции (schema.table), если DDL выполнялся в этой транзакции,
+        иначе None; в _known_partitions его добавляют после commit
+    """
+    month_start = _month_start(moment)
+    next_month = _month_start(moment, shift=1)
+    schema = model.__table__.schema
+    partition = f"{model.__tablename__}_p{month_start:%Y_%m}"
+
+    if f"{schema}.{partition}" in _known_partitions:
+        return None
+
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {schema}.{partition} "
+            f"PARTITION OF {schema}.{model.__tablename__} "
+            f"FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+        )
+    )
+    return f"{schema}.{partition}"
+
+
+def ensure_partitions_for(connection, model, moments) -> set[str]:
+    """Создание партиций для всех месяцев из moments, возвращает созданные"""
+    created = set()
+    for month_start in {_month_start(m) for m in moments if m is not None}:
+        created.add(ensure_partition(connection, model, month_start))
+    created.discard(None)
+    return created
 
 
-def declare_database_in_postgres():
-    """Создание схемы и таблиц в PostgreSQL"""
+def declare_database_in_postgres(months_ahead: int = 1):
+    """
+    Создание схемы и таблиц в PostgreSQL
+
+    Таблицы raw.weather_current и raw.weather_forecast партиционируются
+    по месяцам created_at. Партиции на текущий и следующие months_ahead
+    месяцев создаются заранее, остальные - при загрузке данных.
+    Старые партиции можно отсоединить через ALTER TABLE ... DETACH PARTITION.
+    Таблицы, созданные до партиционирования, автоматически не переносятся:
+    их нужно пересоздать вручную, до этого грузятся без партиций.
+    """
     try:
-        postgres_config = get_config()["postgres"]
-        engine = create_engine(postgres_config["url"])
+        engine = get_engine()
+        models = (WeatherCurrent, WeatherForecast)
 
         with engine.begin() as connection:  # begin() автоматически делает commit
             connection.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
 
         Base.metadata.create_all(engine, checkfirst=True)
+
+        created = set()
+        with engine.begin() as connection:
+            for model in models:
+                # Колонка content_hash появилась позже самих таблиц
+                connection.execute(
+                    text(
+                        f"ALTER TABLE raw.{model.__tablename__} "
+                        f"ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32)"
+                    )
+                )
+
+                # Таблицы, созданные до партиционирования, получают хотя бы индексы
+                for index in model.__table__.indexes:
+                    index.create(connection, checkfirst=True)
+
+                if not is_partitioned(connection, model):
+                    logger.warning(
+                        f"Table raw.{model.__tablename__} is not partitioned, "
+                        f"recreate it to enable monthly partitions"
+                    )
+                    continue
+
+                now = datetime.now()
+                created |= ensure_partitions_for(
+                    connection,
+                    model,
+                    [_month_start(now, shift) for shift in range(months_ahead + 1)],
+                )
+        _known_partitions.update(created)
+
         logger.info("Schema and tables created successfully in PostgreSQL")
 
     except Exception as e:
@@ -124,11 +333,11 @@ def get_current_weather_from_mongo(updated_at: datetime = None):
     Args:
         updated_at: Фильтр по дате обновления для инкрементальной загрузки
     """
-    mongo_config = get_config()["mongo"]
+    config = get_config()
 
     try:
-        client = MongoClient(**mongo_config)
-        db = client["weather_analytics_db"]
+        client = MongoClient(**config["mongo"])
+        db = client[config["mongo_database"]]
         collection = db["weather_current"]
 
         logger.info(
@@ -157,11 +366,11 @@ def get_forecasts_from_mongo(updated_at: datetime = None):
     Args:
         updated_at: Фильтр по дате обновления для инкрементальной загрузки
     """
-    mongo_config = get_config()["mongo"]
+    config = get_config()
 
     try:
-        client = MongoClient(**mongo_config)
-        db = client["weather_analytics_db"]
+        client = MongoClient(**config["mongo"])
+        db = client[config["mongo_database"]]
         collection = db["weather_forecast"]
 
         logger.info(f"Getting forecasts from MongoDB with updated_at: {updated_at}")
@@ -200,56 +409,163 @@ def get_last_update_at(session, model, shift_days: int = 1):
     return last_update_at
 
 
-def upsert_current_weather(session, data):
+def get_extract_since(session, model, sink=None):
     """
-    Загрузка текущей погоды в PostgreSQL
+    Начало окна извлечения из MongoDB для таблицы и её Parquet-приёмника
+
+    Берётся более раннее из окон PostgreSQL и приёмника: уже загруженные
+    версии отсекает upsert_scd2 (по хэшу) и сам приёмник (по состоянию),
+    поэтому отставший или только что подключённый data lake догоняет
+    PostgreSQL, не теряя документов.
+
+    Args:
+        session: Сессия SQLAlchemy
+        model: Модель таблицы
+        sink: ParquetSink, питающийся тем же потоком, или None
+
+    Returns:
+        updated_at, после которого извлекать документы; None - все документы
     """
-    logger.info("Upserting current weather to PostgreSQL")
+    since = get_last_update_at(session, model)
+    if sink is None:
+        return since
+    if sink.extract_since is None:
+        return None
+    return min(since, sink.extract_since)
 
-    try:
-        count = 0
-        skipped = 0
-        for item in data:
-            weather_id = str(item["_id"])
-
-            # Проверяем, существует ли уже активная запись с таким weather_id
-            existing = (
-                session.query(WeatherCurrent)
-                .filter(
-                    WeatherCurrent.weather_id == weather_id,
-                    WeatherCurrent.valid_to_dttm == datetime(5999, 1, 1),
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def upsert_scd2(session, model, key_column, data, to_row, batch_size: int = 1000):
+    """
+    Пакетная загрузка документов в таблицу SCD Type 2
+
+    Для каждого пакета одним запросом читаются хэши активных версий,
+    после чего документы делятся на новые (вставка), изменённые
+    (закрытие старой версии и вставка новой) и неизменённые (пропуск).
+    Неизменённые документы в PostgreSQL не пишутся.
+
+    Args:
+        session: Сессия SQLAlchemy
+        model: Модель таблицы
+        key_column: Колонка с идентификатором документа MongoDB
+        data: Итератор документов MongoDB
+        to_row: Функция (документ, хэш) -> словарь значений строки
+        batch_size: Размер пакета
+
+    Returns:
+        (вставлено, пропущено)
+    """
+    partitioned = is_partitioned(session, model)
+    inserted = 0
+    skipped = 0
+
+    for batch in _batches(data, batch_size):
+        incoming = {str(item["_id"]): item for item in batch}
+        hashes = {key: content_hash(item) for key, item in incoming.items()}
+
+        active = session.query(
+            model.id, model.created_at, key_column, model.content_hash, model.updated_at
+        ).filter(
+            key_column.in_(list(incoming)),
+            model.valid_to_dttm == ACTIVE_VALID_TO,
+        )
+
+        to_close = []
+        for row_id, created_at, key, existing_hash, updated_at in active:
+            item = incoming.get(key)
+            if item is None:
+                continue
+            unchanged = (
+                existing_hash == hashes[key]
+                if existing_hash is not None
+                # Версии, загруженные до появления хэшей, сравниваем по updated_at
+                else updated_at == item.get("updated_at")
+            )
+            if unchanged:
+                del incoming[key]
+                skipped += 1
+            else:
+                to_close.append((row_id, created_at))
+
+        if to_close:
+            session.query(model).filter(
+                tuple_(model.id, model.created_at).in_(to_close),
+                model.valid_to_dttm == ACTIVE_VALID_TO,
+            ).update({model.valid_to_dttm: func.now()}, synchronize_session=False)
+
+        created = set()
+        if incoming:
+            if partitioned:
+                created = ensure_partitions_for(
+                    session,
+                    model,
+                    [item.get("created_at") for item in incoming.values()],
                 )
-                .first()
+            session.execute(
+                insert(model.__table__),
+                [to_row(item, hashes[key]) for key, item in incoming.items()],
             )
 
-            if existing:
-                # Если запись уже существует и не изменилась, пропускаем
-                if existing.updated_at == item.get("updated_at"):
-                    skipped += 1
-                    continue
+        session.commit()
+        _known_partitions.update(created)
+        inserted += len(incoming)
 
-                # Закрываем старую версию
-                existing.valid_to_dttm = func.now()
-                session.commit()
-
-            # Добавляем новую версию
-            weather = WeatherCurrent(
-                weather_id=weather_id,
-                latitude=item.get("latitude"),
-                longitude=item.get("longitude"),
-                request=convert_datetime_to_str(item.get("request")),
-                response=convert_datetime_to_str(item.get("response")),
-                status_code=item.get("status_code"),
-                created_at=item.get("created_at"),
-                updated_at=item.get("updated_at"),
-            )
+    return inserted, skipped
 
-            session.add(weather)
-            session.commit()
-            count += 1
+
+def _current_weather_row(item, item_hash):
+    return {
+        "weather_id": str(item["_id"]),
+        "latitude": item.get("latitude"),
+        "longitude": item.get("longitude"),
+        "request": item.get("request"),
+        "response": item.get("response"),
+        "status_code": item.get("status_code"),
+        "created_at": item.get("created_at"),
+        "updated_at": item.get("updated_at"),
+        "content_hash": item_hash,
+        "valid_to_dttm": ACTIVE_VALID_TO,
+    }
+
+
+def _forecast_row(item, item_hash):
+    return {
+        "forecast_id": str(item["_id"]),
+        "latitude": item.get("latitude"),
+        "longitude": item.get("longitude"),
+        "hours": item.get("hours"),
+        "request": item.get("request"),
+        "response": item.get("response"),
+        "status_code": item.get("status_code"),
+        "created_at": item.get("created_at"),
+        "updated_at": item.get("updated_at"),
+        "content_hash": item_hash,
+        "valid_to_dttm": ACTIVE_VALID_TO,
+    }
+
+
+def upsert_current_weather(session, data):
+    """
+    Загрузка текущей погоды в PostgreSQL
+    """
+    logger.info("Upserting current weather to PostgreSQL")
+
+    try:
+        count, skipped = upsert_scd2(
+            session,
+            WeatherCurrent,
+            WeatherCurrent.weather_id,
+            data,
+            _current_weather_row,
+        )
 
         logger.info(
-            f"Upserted {count} current weather records successfully, skipped {skipped} duplicates"
+            f"Upserted {count} current weather records successfully, skipped {skipped} unchanged"
         )
         return count
 
@@ -266,50 +582,16 @@ def upsert_forecasts(session, data):
     logger.info("Upserting forecasts to PostgreSQL")
 
     try:
-        count = 0
-        skipped = 0
-        for item in data:
-            forecast_id = str(item["_id"])
-
-            # Проверяем, существует ли уже активная запись с таким forecast_id
-            existing = (
-                session.query(WeatherForecast)
-                .filter(
-                    WeatherForecast.forecast_id == forecast_id,
-                    WeatherForecast.valid_to_dttm == datetime(5999, 1, 1),
-                )
-                .first()
-            )
-
-            if existing:
-                # Если запись уже существует и не изменилась, пропускаем
-                if existing.updated_at == item.get("updated_at"):
-                    skipped += 1
-                    continue
-
-                # Закрываем старую версию
-                existing.valid_to_dttm = func.now()
-                session.commit()
-
-            # Добавляем новую версию
-            forecast = WeatherForecast(
-                forecast_id=forecast_id,
-                latitude=item.get("latitude"),
-                longitude=item.get("longitude"),
-                hours=item.get("hours"),
-                request=convert_datetime_to_str(item.get("request")),
-                response=convert_datetime_to_str(item.get("response")),
-                status_code=item.get("status_code"),
-                created_at=item.get("created_at"),
-                updated_at=item.get("updated_at"),
-            )
-
-            session.add(forecast)
-            session.commit()
-            count += 1
+        count, skipped = upsert_scd2(
+            session,
+            WeatherForecast,
+            WeatherForecast.forecast_id,
+            data,
+            _forecast_row,
+        )
 
         logger.info(
-            f"Upserted {count} forecast records successfully, skipped {skipped} duplicates"
+            f"Upserted {count} forecast records successfully, skipped {skipped} unchanged"
         )
         return count
 
@@ -322,29 +604,49 @@ def upsert_forecasts(session, data):
 def move_data_to_postgres():
     """
     Основная функция переноса данных из MongoDB в PostgreSQL
+
+    Если задан PARQUET_LAKE_DIR, тот же поток документов параллельно
+    дописывается в Parquet data lake (см. connector__parquet_sink);
+    окно извлечения тогда охватывает и отставание приёмника
+    (см. get_extract_since).
     """
     logger.info("Starting ETL process: MongoDB -> PostgreSQL")
 
-    postgres_config = get_config()["postgres"]
-    engine = create_engine(postgres_config["url"])
+    engine = get_engine()
     Session = sessionmaker(bind=engine)
     session = Session()
 
     # Создаем схему и таблицы
     declare_database_in_postgres()
 
+    current_sink = forecast_parquet_sink = None
+    parquet_lake_dir = get_config()["parquet_lake_dir"]
+    if parquet_lake_dir:
+        from connector__parquet_sink import current_weather_sink, forecast_sink
+
+        current_sink = current_weather_sink(parquet_lake_dir)
+        forecast_parquet_sink = forecast_sink(parquet_lake_dir)
+
     try:
         # Загрузка текущей погоды
         logger.info("Processing current weather data...")
-        last_update_current = get_last_update_at(session, WeatherCurrent)
-        current_data = get_current_weather_from_mongo(updated_at=last_update_current)
+        since = get_extract_since(session, WeatherCurrent, current_sink)
+        current_data = get_current_weather_from_mongo(updated_at=since)
+        if current_sink is not None:
+            current_data = current_sink.observe(current_data)
         current_count = upsert_current_weather(session, current_data)
+        if current_sink is not None:
+            current_sink.close()
 
         # Загрузка прогнозов
         logger.info("Processing forecast data...")
-        last_update_forecast = get_last_update_at(session, WeatherForecast)
-        forecast_data = get_forecasts_from_mongo(updated_at=last_update_forecast)
+        since = get_extract_since(session, WeatherForecast, forecast_parquet_sink)
+        forecast_data = get_forecasts_from_mongo(updated_at=since)
+        if forecast_parquet_sink is not None:
+            forecast_data = forecast_parquet_sink.observe(forecast_data)
         forecast_count = upsert_forecasts(session, forecast_data)
+        if forecast_parquet_sink is not None:
+            forecast_parquet_sink.close()
 
         logger.info(
             f"ETL completed successfully! "
@@ -359,6 +661,10 @@ def move_data_to_postgres():
 
     except Exception as e:
         session.rollback()
+        # Файлы незавершённого запуска не должны дожидаться следующего
+        for sink in (current_sink, forecast_parquet_sink):
+            if sink is not None:
+                sink.abort()
         logger.error(f"ETL process failed: {e}")
         raise
 
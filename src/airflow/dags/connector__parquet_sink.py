@@ -0,0 +1,425 @@
+"""
+Parquet-приёмник для коннектора MongoDB: data lake для DuckDB/Spark
+
+Документы разворачиваются в плоские строки (одна строка на sample
+текущей погоды или на точку прогноза) и дописываются в датасеты
+
+    <root>/weather_current/date=YYYY-MM-DD/provider=<name>/part-*.parquet
+    <root>/weather_forecast/date=YYYY-MM-DD/provider=<name>/part-*.parquet
+
+Каждый запуск добавляет новые файлы. Извлечение идёт с окном
+переобработки (lookback) за сохранённым водяным знаком updated_at, чтобы
+не терять опоздавшие документы (например, из спула приложения с исходным
+updated_at); уже записанные версии внутри окна отсекаются по _id
+и updated_at из состояния приёмника. Файлы запуска
+пишутся в <root>/_staging/<dataset>/<run_id> и попадают в датасет
+вместе с водяным знаком только при close(), так что повтор упавшего
+запуска не дублирует строки.
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from loguru import logger
+
+STATE_FILE = "_state.json"
+STAGING_DIR = "_staging"
+# Суффикс каталога запуска, принятого целиком (после close())
+READY_SUFFIX = ".ready"
+
+
+def _decode_state(value) -> dict:
+    return {
+        "watermark": datetime.fromisoformat(value["watermark"]),
+        "seen": {k: datetime.fromisoformat(v) for k, v in value["seen"].items()},
+    }
+
+
+def _encode_state(entry: dict) -> dict:
+    return {
+        "watermark": entry["watermark"].isoformat(),
+        "seen": {k: v.isoformat() for k, v in entry["seen"].items()},
+    }
+
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.string()), ("provider", pa.string())]), flavor="hive"
+)
+
+CURRENT_SCHEMA = pa.schema(
+    [
+        ("weather_id", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("observation_time", pa.timestamp("us")),
+        ("temperature_c", pa.float64()),
+        ("wind_speed_kph", pa.float64()),
+        ("humidity", pa.float64()),
+        ("condition", pa.string()),
+        ("average_temperature_c", pa.float64()),
+        ("average_humidity", pa.float64()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+        ("date", pa.string()),
+        ("provider", pa.string()),
+    ]
+)
+
+FORECAST_SCHEMA = pa.schema(
+    [
+        ("forecast_id", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("hours", pa.int32()),
+        ("forecast_time", pa.timestamp("us")),
+        ("temperature_c", pa.float64()),
+        ("wind_speed_kph", pa.float64()),
+        ("humidity", pa.float64()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+        ("date", pa.string()),
+        ("provider", pa.string()),
+    ]
+)
+
+
+def _naive_utc(value):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _partition_date(item):
+    """
+    Значение партиции date: день created_at, без него - день updated_at
+
+    Документ без обеих дат не записывается (None) с предупреждением.
+    """
+    moment = item.get("created_at")
+    if moment is None:
+        moment = item.get("updated_at")
+        if moment is None:
+            logger.warning(
+                f"Document {item.get('_id')} has neither created_at nor updated_at, "
+                f"skipped in Parquet"
+            )
+            return None
+        logger.warning(
+            f"Document {item.get('_id')} has no created_at, partitioned by updated_at"
+        )
+    return f"{moment:%Y-%m-%d}"
+
+
+def flatten_current_weather(item):
+    """Строки Parquet из документа текущей погоды: по одной на sample"""
+    date = _partition_date(item)
+    if date is None:
+        return
+    response = item.get("response") or {}
+    created_at = item.get("created_at")
+    for sample in response.get("samples") or []:
+        yield {
+            "weather_id": str(item["_id"]),
+            "latitude": item.get("latitude"),
+            "longitude": item.get("longitude"),
+            "observation_time": _naive_utc(sample.get("observation_time")),
+            "temperature_c": sample.get("temperature_c"),
+            "wind_speed_kph": sample.get("wind_speed_kph"),
+            "humidity": sample.get("humidity"),
+            "condition": sample.get("condition"),
+            "average_temperature_c": response.get("average_temperature_c"),
+            "average_humidity": response.get("average_humidity"),
+            "created_at": created_at,
+            "updated_at": item.get("updated_at"),
+            "date": date,
+            "provider": sample.get("provider"),
+        }
+
+
+def flatten_forecast(item):
+    """Строки Parquet из документа прогноза: по одной на точку прогноза"""
+    date = _partition_date(item)
+    if date is None:
+        return
+    response = item.get("response") or {}
+    created_at = item.get("created_at")
+    for forecast in response.get("forecasts") or []:
+        for point in forecast.get("points") or []:
+            yield {
+                "forecast_id": str(item["_id"]),
+                "latitude": item.get("latitude"),
+                "longitude": item.get("longitude"),
+                "hours": item.get("hours"),
+                "forecast_time": _naive_utc(point.get("time")),
+                "temperature_c": point.get("temperature_c"),
+                "wind_speed_kph": point.get("wind_speed_kph"),
+                "humidity": point.get("humidity"),
+                "created_at": created_at,
+                "updated_at": item.get("updated_at"),
+                "date": date,
+                "provider": forecast.get("provider"),
+            }
+
+
+class ParquetSink:
+    """
+    Дозапись плоских строк в партиционированный Parquet-датасет
+
+    Строки копятся в буфере и сбрасываются файлами по flush_rows строк,
+    так что память не зависит от объёма выгрузки. Документы с updated_at
+    не позже extract_since (водяной знак минус lookback) пропускаются,
+    как и версии, уже записанные внутри окна: их _id и updated_at
+    хранятся в состоянии, пока не выйдут из окна. Сброшенные файлы
+    лежат в каталоге запуска до close(): он атомарно переименовывается
+    в <run_id>.ready, после чего файлы переносятся в датасет, а водяной
+    знак с записанными документами - в <root>/_state.json. Перенос
+    повторяем: прерванный дозавершается при создании следующего
+    приёмника, а каталоги запусков, не дошедших до close(), удаляются
+    (при ошибке запуска - сразу, через abort()).
+    """
+
+    def __init__(
+        self,
+        root,
+        dataset: str,
+        flatten,
+        schema: pa.Schema,
+        flush_rows: int = 100_000,
+        compression: str = "zstd",
+        lookback: timedelta = timedelta(days=1),
+    ) -> None:
+        self.root = Path(root)
+        self.dataset = dataset
+        self._flatten = flatten
+        self._schema = schema
+        self._flush_rows = flush_rows
+        self._format_options = ds.ParquetFileFormat().make_write_options(
+            compression=compression
+        )
+        self._run_id = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self._staging = self.root / STAGING_DIR / dataset
+        self._lookback = lookback
+        self._recover()
+        self._rows: list[dict] = []
+        self._flushes = 0
+        self.documents = 0
+        self.rows_written = 0
+        # Записанные этим запуском документы: _id -> updated_at
+        self._run_seen: dict[str, datetime] = {}
+        self._use_state(self._load_state().get(dataset))
+
+    def _use_state(self, entry: dict | None) -> None:
+        self.watermark = entry and entry["watermark"]
+        self._seen = entry["seen"] if entry else {}
+        self.extract_since = None
+        if self.watermark is not None:
+            self.extract_since = self.watermark - self._lookback
+
+    def _load_state(self) -> dict:
+        path = self.root / STATE_FILE
+        if not path.exists():
+            return {}
+        state = json.loads(path.read_text())
+        return {k: _decode_state(v) for k, v in state.items()}
+
+    def _save_state(self, run_seen: dict[str, datetime]) -> None:
+        """Добавление документов запуска в состояние; повторный вызов безопасен"""
+        state = self._load_state()
+        entry = state.get(self.dataset) or {"seen": {}}
+        seen = entry["seen"]
+        for key, updated_at in run_seen.items():
+            if key not in seen or updated_at > seen[key]:
+                seen[key] = updated_at
+        watermark = max(run_seen.values())
+        if entry.get("watermark") is not None:
+            watermark = max(watermark, entry["watermark"])
+        # Документы старше окна больше не извлекаются, помнить их незачем
+        horizon = watermark - self._lookback
+        state[self.dataset] = {
+            "watermark": watermark,
+            "seen": {k: v for k, v in seen.items() if v > horizon},
+        }
+        path = self.root / STATE_FILE
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({k: _encode_state(v) for k, v in state.items()}))
+        os.replace(tmp, path)
+
+    def add(self, item) -> None:
+        """Добавление документа, если эта его версия ещё не записана"""
+        updated_at = item.get("updated_at")
+        if updated_at is not None:
+            if self.extract_since is not None and updated_at <= self.extract_since:
+                return
+            key = str(item["_id"])
+            written = self._run_seen.get(key) or self._seen.get(key)
+            if written is not None and updated_at <= written:
+                return
+            self._run_seen[key] = updated_at
+
+        self._rows.extend(self._flatten(item))
+        self.documents += 1
+
+        if len(self._rows) >= self._flush_rows:
+            self.flush()
+
+    def observe(self, documents):
+        """
+        Пропуск потока документов через приёмник без его потребления
+
+        Позволяет одному извлечению из MongoDB питать и PostgreSQL,
+        и Parquet: upsert получает те же документы, что видит приёмник.
+        """
+        for item in documents:
+            self.add(item)
+            yield item
+
+    def write(self, documents) -> int:
+        """Запись всего потока документов, возвращает число строк"""
+        for item in documents:
+            self.add(item)
+        self.close()
+        return self.rows_written
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+
+        table = pa.Table.from_pylist(self._rows, schema=self._schema)
+        ds.write_dataset(
+            table,
+            self._staging / self._run_id,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"part-{self._run_id}-{self._flushes}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=self._format_options,
+        )
+        self.rows_written += len(self._rows)
+        self._flushes += 1
+        self._rows = []
+
+    def close(self) -> None:
+        """Сброс буфера и публикация файлов запуска с водяным знаком"""
+        self.flush()
+        run_dir = self._staging / self._run_id
+        if run_dir.exists() or self._run_seen:
+            run_dir.mkdir(parents=True, exist_ok=True)
+            (run_dir / STATE_FILE).write_text(
+                json.dumps({k: v.isoformat() for k, v in self._run_seen.items()})
+            )
+            ready = run_dir.with_name(run_dir.name + READY_SUFFIX)
+            os.replace(run_dir, ready)
+            self._publish(ready)
+            self._run_seen = {}
+            self._use_state(self._load_state().get(self.dataset))
+        logger.info(
+            f"Parquet sink {self.dataset}: {self.documents} documents, "
+            f"{self.rows_written} rows written to {self.root / self.dataset}"
+        )
+
+    def abort(self) -> None:
+        """
+        Отказ от запуска: буфер и сброшенные файлы удаляются
+
+        Водяной знак не меняется, так что документы запуска извлекаются
+        снова. После close() вызов ничего не делает.
+        """
+        self._rows = []
+        self._run_seen = {}
+        run_dir = self._staging / self._run_id
+        if run_dir.exists():
+            shutil.rmtree(run_dir)
+            logger.warning(
+                f"Parquet sink {self.dataset}: run aborted, "
+                f"{self.rows_written} staged rows discarded"
+            )
+
+    def _publish(self, run_dir: Path) -> None:
+        """Перенос файлов принятого запуска в датасет; повторный вызов безопасен"""
+        run_seen = {
+            k: datetime.fromisoformat(v)
+            for k, v in json.loads((run_dir / STATE_FILE).read_text()).items()
+        }
+        target = self.root / self.dataset
+        for path in run_dir.rglob("*.parquet"):
+            destination = target / path.relative_to(run_dir)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, destination)
+        if run_seen:
+            self._save_state(run_seen)
+        shutil.rmtree(run_dir)
+
+    def _recover(self) -> None:
+        """Дозавершение прерванных публикаций и удаление брошенных запусков"""
+        if not self._staging.exists():
+            return
+        for run_dir in sorted(self._staging.iterdir()):
+            if run_dir.name.endswith(READY_SUFFIX):
+                self._publish(run_dir)
+            else:
+                # Запуск упал до close(): ни файлы, ни водяной знак не приняты
+                logger.warning(f"Discarding unfinished Parquet run {run_dir}")
+                shutil.rmtree(run_dir)
+
+
+def current_weather_sink(root, **kwargs) -> ParquetSink:
+    return ParquetSink(
+        root, "weather_current", flatten_current_weather, CURRENT_SCHEMA, **kwargs
+    )
+
+
+def forecast_sink(root, **kwargs) -> ParquetSink:
+    return ParquetSink(
+        root, "weather_forecast", flatten_forecast, FORECAST_SCHEMA, **kwargs
+    )
+
+
+def move_data_to_parquet(root=None):
+    """
+    Перенос данных из MongoDB только в Parquet data lake
+
+    Извлечение идёт от extract_since приёмника, поэтому функция
+    подходит и для регулярного запуска, и для первичной выгрузки истории.
+    """
+    from connector__mongo_postgres_logic import (
+        get_config,
+        get_current_weather_from_mongo,
+        get_forecasts_from_mongo,
+    )
+
+    root = root or get_config()["parquet_lake_dir"]
+    if not root:
+        raise ValueError("PARQUET_LAKE_DIR is not set")
+
+    logger.info(f"Starting ETL process: MongoDB -> Parquet ({root})")
+
+    current_sink = current_weather_sink(root)
+    try:
+        current_rows = current_sink.write(
+            get_current_weather_from_mongo(updated_at=current_sink.extract_since)
+        )
+    except Exception:
+        current_sink.abort()
+        raise
+
+    forecast_parquet_sink = forecast_sink(root)
+    try:
+        forecast_rows = forecast_parquet_sink.write(
+            get_forecasts_from_mongo(updated_at=forecast_parquet_sink.extract_since)
+        )
+    except Exception:
+        forecast_parquet_sink.abort()
+        raise
+
+    return {
+        "success": True,
+        "current_weather_rows": current_rows,
+        "forecast_rows": forecast_rows,
+    }
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
 
 from airflow import DAG
-from airflow.sensors.external_task import ExternalTaskSensor
 from airflow.operators.bash import BashOperator
+from airflow.operators.python import PythonOperator
+from dbt_weather_marts_logic import DBT_STATE_DIR, plan_dbt_run, save_dbt_state
+from weather_datasets import RAW_WEATHER, WEATHER_MARTS
 
 DBT_DIR = "/opt/airflow/dbt"
 
@@ -13,77 +15,97 @@ default_args = {
     "retries": 1,
     "retry_delay": timedelta(minutes=5),
 }
+# план из задачи plan_dbt_run (XCom), доступный в шаблонах bash-команд
+PLAN = "{% set plan = ti.xcom_pull(task_ids='plan_dbt_run') %}"
+
+
 # упрощаем создание bash команды для dbt
-def dbt(cmd: str) -> str:
+def dbt(cmd: str, when: str = None) -> str:
+    # when - флаг плана; если он ложен, задача помечается skipped (код 99)
+    guard = ""
+    if when:
+        guard = f"""
+{{% if not plan['{when}'] %}}
+echo "=== Skipping dbt {cmd.split()[0]}: inputs unchanged ==="
+exit 99
+{{% endif %}}"""
     return f"""
+{PLAN}
 set -euo pipefail
-
+{guard}
 export PATH="$HOME/.local/bin:$PATH"
 
-echo "=== DBT_DIR content ==="
-ls -la {DBT_DIR}
-ls -la {DBT_DIR}/dbt_project.yml
-ls -la {DBT_DIR}/profiles.yml
-
-echo "=== dbt version ==="
-dbt --version 2>&1
-
 echo "=== Running dbt: {cmd} ==="
-dbt {cmd} --project-dir {DBT_DIR} --profiles-dir {DBT_DIR} --log-level debug 2>&1
+dbt {cmd} --project-dir {DBT_DIR} --profiles-dir {DBT_DIR} 2>&1
 """.strip()
 
+
+# выборка моделей из плана; --state нужен для state:modified+
+SELECT = (
+    "--select {{ plan['select'] }}"
+    f"{{% if plan['use_state'] %}} --state {DBT_STATE_DIR}{{% endif %}}"
+)
+
 with DAG(
     dag_id="dbt_weather_marts",
     default_args=default_args,
     description="Run dbt incremental pipelines (stg/ods/dm) for weather analytics",
-    schedule="@hourly",
+    # запуск по событию коннектора о новых строках в raw
+    schedule=[RAW_WEATHER],
     catchup=False,
     max_active_runs=1,
     tags=["dbt", "marts", "weather"],
 ) as dag:
-    # ожидаем dwh
-    wait_for_raw = ExternalTaskSensor(
-        task_id="wait_for_connector_mongo_postgres",
-        external_dag_id="connector__mongo_postgres",
-        external_task_id="move_weather_data_to_dwh",
-        allowed_states=["success"],
-        failed_states=["failed", "skipped"],
-        mode="reschedule",
-        timeout=60 * 60,
-        poke_interval=60,
-    )
-
     common_env = {
         "DBT_PROJECT_DIR": DBT_DIR,
         "DBT_PROFILES_DIR": DBT_DIR,
     }
 
+    # что изменилось с прошлого успешного запуска
+    plan = PythonOperator(
+        task_id="plan_dbt_run",
+        python_callable=plan_dbt_run,
+    )
+
+    # deps - только при изменении package-lock.yml
     dbt_deps = BashOperator(
         task_id="dbt_deps",
-        bash_command=dbt("deps"),
+        bash_command=dbt("deps", when="run_deps"),
         append_env=True,
         env=common_env,
     )
 
+    # seed - только при изменении cities.csv
     dbt_seed = BashOperator(
         task_id="dbt_seed_cities",
-        bash_command=dbt("seed --select cities"),
+        bash_command=dbt("seed --select cities", when="run_seed"),
         append_env=True,
         env=common_env,
+        trigger_rule="none_failed",
     )
 
+    # только потомки raw-таблиц с новыми строками и изменённые модели
     dbt_run = BashOperator(
         task_id="dbt_run_incremental",
-        bash_command=dbt("run --select tag:stg tag:ods tag:dm"),
+        bash_command=dbt("run " + SELECT),
         append_env=True,
         env=common_env,
+        trigger_rule="none_failed",
     )
 
     dbt_test = BashOperator(
         task_id="dbt_test",
-        bash_command=dbt("test --select tag:stg tag:ods tag:dm"),
+        bash_command=dbt("test " + SELECT),
         append_env=True,
         env=common_env,
     )
 
-    wait_for_raw >> dbt_deps >> dbt_seed >> dbt_run >> dbt_test
+    # артефакты и отпечатки для следующего сравнения состояния;
+    # событие WEATHER_MARTS - для потребителей витрин (алерты)
+    save_state = PythonOperator(
+        task_id="save_dbt_state",
+        python_callable=save_dbt_state,
+        outlets=[WEATHER_MARTS],
+    )
+
+    plan >> dbt_deps >> dbt_seed >> dbt_run >> dbt_test >> save_state
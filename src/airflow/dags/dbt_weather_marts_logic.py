@@ -0,0 +1,144 @@
+"""
+Логика state-aware запуска dbt для DAG dbt_weather_marts
+
+Между запусками в DBT_STATE_DIR хранятся отпечатки входов dbt:
+хэш package-lock.yml, хэш seed cities.csv, последние id строк raw-таблиц
+и артефакты (manifest.json) последнего успешного запуска. По ним план
+определяет, нужны ли deps и seed и какие модели пересобирать:
+только потомков raw-таблиц, в которые пришли новые строки, а также
+изменённые модели (state:modified+).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from loguru import logger
+from sqlalchemy import text
+
+DBT_DIR = Path(os.getenv("DBT_PROJECT_DIR", "/opt/airflow/dbt"))
+DBT_STATE_DIR = Path(os.getenv("DBT_STATE_DIR", str(DBT_DIR / "state")))
+
+FINGERPRINTS_FILE = "fingerprints.json"
+
+# Артефакты dbt, сохраняемые для сравнения состояния (--state)
+ARTIFACTS = ("manifest.json", "run_results.json")
+
+# Raw-таблицы коннектора и соответствующие источники dbt
+RAW_SOURCES = {
+    "weather_current": "source:raw.weather_current+",
+    "weather_forecast": "source:raw.weather_forecast+",
+}
+
+
+def file_hash(path):
+    """SHA-256 содержимого файла или None, если файла нет"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_fingerprints(state_dir=None):
+    path = Path(state_dir or DBT_STATE_DIR) / FINGERPRINTS_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def get_raw_watermarks():
+    """Последний id по каждой raw-таблице (id растёт с каждой вставкой)"""
+    from connector__mongo_postgres_logic import get_engine
+
+    watermarks = {}
+    with get_engine().connect() as connection:
+        for table in RAW_SOURCES:
+            watermarks[table] = connection.execute(
+                text(f"SELECT max(id) FROM raw.{table}")
+            ).scalar()
+    return watermarks
+
+
+def plan_dbt_run(dbt_dir=None, state_dir=None, raw_watermarks=None):
+    """
+    План запуска dbt по сохранённому состоянию
+
+    Returns:
+        Словарь для XCom: флаги run_deps/run_seed, селектор моделей select,
+        флаг use_state (есть ли manifest для --state) и новые отпечатки,
+        которые save_dbt_state сохранит после успешного запуска
+    """
+    dbt_dir = Path(dbt_dir or DBT_DIR)
+    state_dir = Path(state_dir or DBT_STATE_DIR)
+    previous = load_fingerprints(state_dir)
+    if raw_watermarks is None:
+        raw_watermarks = get_raw_watermarks()
+
+    fingerprints = {
+        "package_lock": file_hash(dbt_dir / "package-lock.yml"),
+        "cities_seed": file_hash(dbt_dir / "seeds" / "cities.csv"),
+        "raw_watermarks": raw_watermarks,
+    }
+
+    run_deps = (
+        fingerprints["package_lock"] != previous.get("package_lock")
+        or not (dbt_dir / "dbt_packages").is_dir()
+    )
+    run_seed = fingerprints["cities_seed"] != previous.get("cities_seed")
+    use_state = (state_dir / "manifest.json").exists()
+
+    if not use_state:
+        # Первый запуск: сравнивать не с чем, собираем всё
+        select = "tag:stg tag:ods tag:dm"
+    else:
+        previous_watermarks = previous.get("raw_watermarks", {})
+        selectors = [
+            selector
+            for table, selector in RAW_SOURCES.items()
+            if raw_watermarks.get(table) is not None
+            and raw_watermarks[table] != previous_watermarks.get(table)
+        ]
+        if run_seed:
+            selectors.append("cities+")
+        selectors.append("state:modified+")
+        select = " ".join(selectors)
+
+    plan = {
+        "run_deps": run_deps,
+        "run_seed": run_seed,
+        "use_state": use_state,
+        "select": select,
+        "fingerprints": fingerprints,
+    }
+    logger.info(
+        f"План dbt: deps={run_deps}, seed={run_seed}, state={use_state}, "
+        f"select='{select}'"
+    )
+    return plan
+
+
+def save_dbt_state(ti=None, plan=None, dbt_dir=None, state_dir=None):
+    """
+    Сохранение артефактов и отпечатков успешного запуска
+
+    manifest.json копируется в DBT_STATE_DIR и становится базой
+    для state:modified в следующем запуске. План по умолчанию берётся
+    из XCom задачи plan_dbt_run.
+    """
+    plan = plan or ti.xcom_pull(task_ids="plan_dbt_run")
+    dbt_dir = Path(dbt_dir or DBT_DIR)
+    state_dir = Path(state_dir or DBT_STATE_DIR)
+    state_dir.mkdir(parents=True, exist_ok=True)
+
+    for artifact in ARTIFACTS:
+        source = dbt_dir / "target" / artifact
+        if source.exists():
+            shutil.copy2(source, state_dir / artifact)
+
+    path = state_dir / FINGERPRINTS_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(plan["fingerprints"], indent=2))
+    os.replace(tmp, path)
+    logger.info(f"Состояние dbt сохранено в {state_dir}")
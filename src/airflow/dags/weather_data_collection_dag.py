@@ -1,13 +1,32 @@
 """
 DAG для периодического сбора данных о погоде
+
+Города берутся из dbt seed cities.csv и делятся на шарды
+(WEATHER_COLLECTION_SHARD_SIZE). Каждый шард - отдельный экземпляр
+динамически размножаемой задачи: шарды выполняются на разных воркерах
+и повторяются независимо друг от друга. По завершении всех шардов
+публикуется обновление COLLECTED_WEATHER, запускающее коннектор, если
+хотя бы один шард собрал данные.
+
+В XCom попадает только манифест шарда (счётчики, статусы, задержки
+и _id документов); полные ответы лежат в MongoDB, см. get_documents.
 """
 
 from datetime import datetime, timedelta
 
-import requests
 from airflow import DAG
+from airflow.exceptions import AirflowSkipException
 from airflow.operators.python import PythonOperator
 from loguru import logger
+from weather_data_collection_logic import (
+    FORECAST_HOURS,
+    build_manifest,
+    collect_current,
+    collect_forecasts,
+    plan_shards,
+    summarize_shards,
+)
+from weather_datasets import COLLECTED_WEATHER
 
 default_args = {
     "owner": "airflow",
@@ -20,165 +39,52 @@ default_args = {
 }
 
 
-def collect_weather_data(**context):
+def collect_weather_data(cities, **context):
     """
-    Функция для сбора текущих данных о погоде из weather API
+    Функция для сбора текущих данных о погоде по шарду городов
     """
-    # Список городов для сбора данных
-    cities = [
-        # Россия
-        {"name": "Moscow", "lat": 55.75, "lon": 37.62},
-        {"name": "Saint Petersburg", "lat": 59.93, "lon": 30.36},
-        {"name": "Novosibirsk", "lat": 55.03, "lon": 82.92},
-        {"name": "Yekaterinburg", "lat": 56.84, "lon": 60.65},
-        {"name": "Kazan", "lat": 55.79, "lon": 49.12},
-        {"name": "Vladivostok", "lat": 43.12, "lon": 131.89},
-        {"name": "Murmansk", "lat": 68.97, "lon": 33.08},
-        {"name": "Yuzhno-Sakhalinsk", "lat": 46.96, "lon": 142.73},
-        # Европа
-        {"name": "London", "lat": 51.51, "lon": -0.13},
-        {"name": "Paris", "lat": 48.85, "lon": 2.35},
-        {"name": "Berlin", "lat": 52.52, "lon": 13.40},
-        {"name": "Madrid", "lat": 40.42, "lon": -3.70},
-        {"name": "Rome", "lat": 41.90, "lon": 12.50},
-        # Америка
-        {"name": "New York", "lat": 40.71, "lon": -74.01},
-        {"name": "Los Angeles", "lat": 34.05, "lon": -118.24},
-        {"name": "Chicago", "lat": 41.88, "lon": -87.63},
-        {"name": "Miami", "lat": 25.76, "lon": -80.19},
-        {"name": "Toronto", "lat": 43.65, "lon": -79.38},
-    ]
-
-    # URL weather API (предполагается, что app запущен)
-    api_url = "http://weather_app:8000/api/weather/current"
-
-    results = []
-    for city in cities:
-        try:
-            logger.info(f"Сбор текущих данных для {city['name']}")
-            response = requests.get(
-                api_url, params={"lat": city["lat"], "lon": city["lon"]}, timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                results.append(
-                    {"city": city["name"], "status": "success", "data": data}
-                )
-                logger.info(f"Текущие данные успешно собраны для {city['name']}")
-            else:
-                logger.error(
-                    f"Ошибка сбора данных для {city['name']}: {response.status_code}"
-                )
-                results.append(
-                    {
-                        "city": city["name"],
-                        "status": "error",
-                        "error": f"HTTP {response.status_code}",
-                    }
-                )
-
-        except Exception as e:
-            logger.error(f"Ошибка сбора данных для {city['name']}: {e}")
-            results.append({"city": city["name"], "status": "error", "error": str(e)})
-
-    # Сохраняем результаты в XCom
-    context["task_instance"].xcom_push(key="collection_results", value=results)
-
-    logger.info(f"Собраны текущие данные для {len(results)} городов")
-    return results
-
-
-def collect_forecast_data(**context):
+    # Конкурентно через weather API либо напрямую агрегаторами приложения
+    results = collect_current(cities)
+    manifest = build_manifest("current", results)
+
+    logger.info(
+        f"Собраны текущие данные: {manifest['succeeded']}/{manifest['total']} городов"
+    )
+    # Манифест уходит в XCom как return_value
+    return manifest
+
+
+def collect_forecast_data(cities, **context):
+    """
+    Функция для сбора прогнозов погоды по шарду городов
+    """
+    results = collect_forecasts(cities, FORECAST_HOURS)
+    manifest = build_manifest("forecast", results)
+
+    logger.info(
+        f"Собраны прогнозы: {manifest['succeeded']}/{manifest['total']} "
+        f"комбинаций город/горизонт"
+    )
+    return manifest
+
+
+def publish_collected_weather(outlet_events, **context):
     """
-    Функция для сбора прогнозов погоды из weather API
+    Публикация COLLECTED_WEATHER с числом собранных документов
+
+    Запускается после всех шардов, в том числе упавших: данные успешных
+    шардов уже в MongoDB. Если ни один шард ничего не собрал, задача
+    пропускается - skipped-задача не создаёт событие Dataset.
     """
-    # Список городов (тот же, что и для текущей погоды)
-    cities = [
-        # Россия
-        {"name": "Moscow", "lat": 55.75, "lon": 37.62},
-        {"name": "Saint Petersburg", "lat": 59.93, "lon": 30.36},
-        {"name": "Novosibirsk", "lat": 55.03, "lon": 82.92},
-        {"name": "Yekaterinburg", "lat": 56.84, "lon": 60.65},
-        {"name": "Kazan", "lat": 55.79, "lon": 49.12},
-        {"name": "Vladivostok", "lat": 43.12, "lon": 131.89},
-        {"name": "Murmansk", "lat": 68.97, "lon": 33.08},
-        {"name": "Yuzhno-Sakhalinsk", "lat": 46.96, "lon": 142.73},
-        # Европа
-        {"name": "London", "lat": 51.51, "lon": -0.13},
-        {"name": "Paris", "lat": 48.85, "lon": 2.35},
-        {"name": "Berlin", "lat": 52.52, "lon": 13.40},
-        {"name": "Madrid", "lat": 40.42, "lon": -3.70},
-        {"name": "Rome", "lat": 41.90, "lon": 12.50},
-        # Америка
-        {"name": "New York", "lat": 40.71, "lon": -74.01},
-        {"name": "Los Angeles", "lat": 34.05, "lon": -118.24},
-        {"name": "Chicago", "lat": 41.88, "lon": -87.63},
-        {"name": "Miami", "lat": 25.76, "lon": -80.19},
-        {"name": "Toronto", "lat": 43.65, "lon": -79.38},
-    ]
-
-    # Горизонты прогнозов в часах
-    forecast_hours = [1, 5, 10, 24, 48, 72, 96, 120, 144, 168]
-
-    # URL forecast API
-    api_url = "http://weather_app:8000/api/weather/forecast"
-
-    results = []
-    for city in cities:
-        for hours in forecast_hours:
-            try:
-                logger.info(f"Сбор прогноза на {hours}ч для {city['name']}")
-                response = requests.get(
-                    api_url,
-                    params={"lat": city["lat"], "lon": city["lon"], "hours": hours},
-                    timeout=30,
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    results.append(
-                        {
-                            "city": city["name"],
-                            "hours": hours,
-                            "status": "success",
-                            "data": data,
-                        }
-                    )
-                    logger.info(
-                        f"Прогноз на {hours}ч успешно собран для {city['name']}"
-                    )
-                else:
-                    logger.error(
-                        f"Ошибка сбора прогноза для {city['name']} ({hours}ч): {response.status_code}"
-                    )
-                    results.append(
-                        {
-                            "city": city["name"],
-                            "hours": hours,
-                            "status": "error",
-                            "error": f"HTTP {response.status_code}",
-                        }
-                    )
-
-            except Exception as e:
-                logger.error(
-                    f"Ошибка сбора прогноза для {city['name']} ({hours}ч): {e}"
-                )
-                results.append(
-                    {
-                        "city": city["name"],
-                        "hours": hours,
-                        "status": "error",
-                        "error": str(e),
-                    }
-                )
-
-    # Сохраняем результаты в XCom
-    context["task_instance"].xcom_push(key="forecast_results", value=results)
-
-    logger.info(f"Собраны прогнозы для {len(results)} комбинаций город/горизонт")
-    return results
+    # Манифесты только успешных экземпляров: у упавших нет return_value
+    manifests = context["ti"].xcom_pull(
+        task_ids=["collect_current_weather", "collect_forecast_weather"]
+    )
+    summary = summarize_shards(manifests)
+    if summary is None:
+        raise AirflowSkipException("Ни один шард не собрал данные")
+
+    outlet_events[COLLECTED_WEATHER].extra = summary
 
 
 with DAG(
@@ -190,16 +96,29 @@ with DAG(
     tags=["weather", "data-collection"],
 ) as dag:
 
-    collect_current_task = PythonOperator(
+    plan_shards_task = PythonOperator(
+        task_id="plan_city_shards",
+        python_callable=plan_shards,
+    )
+
+    # По экземпляру задачи на шард
+    collect_current_task = PythonOperator.partial(
         task_id="collect_current_weather",
         python_callable=collect_weather_data,
-        provide_context=True,
-    )
+    ).expand(op_kwargs=plan_shards_task.output)
 
-    collect_forecast_task = PythonOperator(
+    collect_forecast_task = PythonOperator.partial(
         task_id="collect_forecast_weather",
         python_callable=collect_forecast_data,
-        provide_context=True,
+    ).expand(op_kwargs=plan_shards_task.output)
+
+    # Событие для коннектора; all_done - данные успешных шардов уже в MongoDB
+    publish_task = PythonOperator(
+        task_id="publish_collected_weather",
+        python_callable=publish_collected_weather,
+        outlets=[COLLECTED_WEATHER],
+        trigger_rule="all_done",
     )
 
-    # Задачи выполняются параллельно (независимо друг от друга)
+    # Сбор текущей погоды и прогнозов независим друг от друга
+    plan_shards_task >> [collect_current_task, collect_forecast_task] >> publish_task
@@ -0,0 +1,370 @@
+"""
+Логика сбора данных о погоде
+
+Два режима (WEATHER_COLLECTION_MODE):
+- http: запросы к weather API выполняются конкурентно с ограничением
+  параллелизма, переиспользованием соединений и повторами с backoff,
+  так что почасовой сбор длится примерно как самый медленный запрос;
+- in_process: агрегаторы приложения вызываются напрямую, без HTTP,
+  а результаты запуска пишутся в MongoDB одной пакетной вставкой.
+"""
+
+import asyncio
+import csv
+import os
+import random
+import sys
+import time
+
+import httpx
+from bson import ObjectId
+from loguru import logger
+from pymongo import MongoClient
+
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "http://weather_app:8000")
+
+# Исходники FastAPI-приложения для режима in_process
+WEATHER_APP_DIR = os.getenv("WEATHER_APP_DIR", "/opt/airflow/weather_app")
+
+# Справочник городов - dbt seed
+CITIES_SEED = os.getenv(
+    "WEATHER_CITIES_SEED",
+    os.path.join(
+        os.getenv("DBT_PROJECT_DIR", "/opt/airflow/dbt"), "seeds", "cities.csv"
+    ),
+)
+
+# Горизонты прогнозов в часах
+FORECAST_HOURS = [1, 5, 10, 24, 48, 72, 96, 120, 144, 168]
+
+# Заголовок weather API с _id сохранённого документа
+DOCUMENT_ID_HEADER = "X-Document-Id"
+
+# Коллекции MongoDB с полными результатами сбора
+COLLECTIONS = {"current": "weather_current", "forecast": "weather_forecast"}
+
+# Статусы, при которых имеет смысл повторить запрос
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def get_collector_config():
+    """Параметры сборщика из переменных окружения"""
+    return {
+        "parallelism": int(os.getenv("WEATHER_COLLECTOR_PARALLELISM", "16")),
+        "retries": int(os.getenv("WEATHER_COLLECTOR_RETRIES", "2")),
+        "backoff": float(os.getenv("WEATHER_COLLECTOR_BACKOFF", "0.5")),
+        "timeout": float(os.getenv("WEATHER_COLLECTOR_TIMEOUT", "30")),
+        "mode": os.getenv("WEATHER_COLLECTION_MODE", "http"),
+        "shard_size": int(os.getenv("WEATHER_COLLECTION_SHARD_SIZE", "25")),
+    }
+
+
+def load_cities(path=None):
+    """
+    Города для сбора из dbt seed cities.csv
+
+    Дубликаты по координатам отбрасываются, порядок файла сохраняется.
+
+    Returns:
+        Список словарей {"name", "lat", "lon"}
+    """
+    path = path or CITIES_SEED
+    cities = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            lat, lon = float(row["latitude"]), float(row["longitude"])
+            cities.setdefault((lat, lon), {"name": row["city"], "lat": lat, "lon": lon})
+    return list(cities.values())
+
+
+def shard_cities(cities, shard_size):
+    """
+    Разбиение списка городов на шарды не больше shard_size
+
+    Шардов столько же, сколько при нарезке по shard_size, но размеры
+    выровнены (отличаются не больше чем на один город): последний шард
+    не остаётся из одного-двух городов. Пустой список - ни одного шарда.
+    """
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be positive, got {shard_size}")
+    count = -(-len(cities) // shard_size)
+    shards = []
+    start = 0
+    for index in range(count):
+        size = len(cities) // count + (index < len(cities) % count)
+        shards.append(cities[start : start + size])
+        start += size
+    return shards
+
+
+def plan_shards(path=None, shard_size=None):
+    """
+    Шарды для динамически размножаемых задач сбора
+
+    Returns:
+        Список op_kwargs вида {"cities": [...]} - по одному на задачу
+    """
+    cities = load_cities(path)
+    shard_size = shard_size or get_collector_config()["shard_size"]
+    shards = shard_cities(cities, shard_size)
+    logger.info(
+        f"{len(cities)} городов разбиты на {len(shards)} шардов "
+        f"по {shard_size} городов"
+    )
+    return [{"cities": shard} for shard in shards]
+
+
+async def _fetch(client, semaphore, path, job, retries, backoff):
+    """
+    Один запрос к API с повторами
+
+    Returns:
+        Результат: город, статус, _id документа или ошибка,
+        число попыток и время выполнения в миллисекундах
+    """
+    city = job["city"]
+    result = {"city": city["name"]}
+    if "hours" in job:
+        result["hours"] = job["hours"]
+
+    params = {"lat": city["lat"], "lon": city["lon"]}
+    if "hours" in job:
+        params["hours"] = job["hours"]
+
+    async with semaphore:
+        started = time.perf_counter()
+        for attempt in range(1, retries + 2):
+            try:
+                response = await client.get(path, params=params)
+                if response.status_code == 200:
+                    # Тело ответа не разбирается: полный результат уже
+                    # сохранён API в MongoDB, в манифест идёт только его _id
+                    result.update(
+                        status="success",
+                        document_id=response.headers.get(DOCUMENT_ID_HEADER),
+                    )
+                    break
+                error = f"HTTP {response.status_code}"
+                retryable = response.status_code in RETRYABLE_STATUSES
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+                retryable = True
+
+            if not retryable or attempt > retries:
+                result.update(status="error", error=error)
+                break
+
+            # Экспоненциальная задержка с джиттером
+            await asyncio.sleep(backoff * 2 ** (attempt - 1) * (1 + random.random()))
+
+        result["attempts"] = attempt
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    if result["status"] == "success":
+        logger.info(f"{_label(result)}: собрано за {result['elapsed_ms']} мс")
+    else:
+        logger.error(f"{_label(result)}: {result['error']} (попыток: {attempt})")
+    return result
+
+
+def _label(result):
+    if "hours" in result:
+        return f"{result['city']} ({result['hours']}ч)"
+    return result["city"]
+
+
+async def _collect(path, jobs, parallelism, retries, backoff, timeout):
+    semaphore = asyncio.Semaphore(parallelism)
+    limits = httpx.Limits(
+        max_connections=parallelism, max_keepalive_connections=parallelism
+    )
+    async with httpx.AsyncClient(
+        base_url=WEATHER_API_URL, timeout=httpx.Timeout(timeout), limits=limits
+    ) as client:
+        return await asyncio.gather(
+            *(_fetch(client, semaphore, path, job, retries, backoff) for job in jobs)
+        )
+
+
+def collect(path, jobs, **overrides):
+    """
+    Конкурентный сбор по списку заданий
+
+    Args:
+        path: Путь эндпоинта weather API, например /api/weather/current
+        jobs: Задания вида {"city": {...}} или {"city": {...}, "hours": N}
+        overrides: Переопределение parallelism/retries/backoff/timeout
+
+    Returns:
+        Результаты в порядке заданий
+    """
+    config = {
+        key: value
+        for key, value in get_collector_config().items()
+        if key in ("parallelism", "retries", "backoff", "timeout")
+    }
+    config.update(overrides)
+    started = time.perf_counter()
+    results = asyncio.run(_collect(path, jobs, **config))
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    slowest = max(results, key=lambda r: r["elapsed_ms"], default=None)
+    logger.info(
+        f"{path}: {succeeded}/{len(results)} успешно за {elapsed:.1f} с "
+        f"(parallelism={config['parallelism']}"
+        + (
+            f", самый медленный: {_label(slowest)} {slowest['elapsed_ms']} мс)"
+            if slowest
+            else ")"
+        )
+    )
+    return results
+
+
+def _app_collector():
+    """Импорт сборщика из исходников приложения"""
+    if WEATHER_APP_DIR not in sys.path:
+        sys.path.insert(0, WEATHER_APP_DIR)
+    from app.services import collector
+
+    return collector
+
+
+def collect_current(cities):
+    """Сбор текущей погоды по городам в настроенном режиме"""
+    config = get_collector_config()
+    if config["mode"] != "in_process":
+        return collect("/api/weather/current", [{"city": city} for city in cities])
+
+    logger.info(f"Сбор текущей погоды в процессе для {len(cities)} городов")
+    return asyncio.run(
+        _app_collector().collect_current_weather(
+            cities, parallelism=config["parallelism"]
+        )
+    )
+
+
+def collect_forecasts(cities, forecast_hours):
+    """Сбор прогнозов по городам и горизонтам в настроенном режиме"""
+    config = get_collector_config()
+    if config["mode"] != "in_process":
+        return collect(
+            "/api/weather/forecast",
+            [
+                {"city": city, "hours": hours}
+                for city in cities
+                for hours in forecast_hours
+            ],
+        )
+
+    logger.info(
+        f"Сбор прогнозов в процессе для {len(cities)} городов "
+        f"и {len(forecast_hours)} горизонтов"
+    )
+    return asyncio.run(
+        _app_collector().collect_forecasts(
+            cities, forecast_hours, parallelism=config["parallelism"]
+        )
+    )
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[round(q * (len(ordered) - 1))]
+
+
+def build_manifest(kind, results):
+    """
+    Компактный манифест запуска сбора для XCom
+
+    Содержит счётчики, статус и задержку по каждому городу и _id
+    документов в MongoDB, но не сами ответы API, поэтому размер
+    не зависит от объёма прогнозов.
+
+    Args:
+        kind: "current" или "forecast"
+        results: Результаты collect_current / collect_forecasts
+    """
+    entries = []
+    for result in results:
+        entry = {
+            key: result[key]
+            for key in ("city", "hours", "status", "elapsed_ms", "attempts")
+            if key in result
+        }
+        if result["status"] == "success":
+            entry["document_id"] = result.get("document_id")
+        else:
+            entry["error"] = result.get("error")
+        entries.append(entry)
+
+    latencies = [r["elapsed_ms"] for r in results if "elapsed_ms" in r]
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "kind": kind,
+        "collection": COLLECTIONS[kind],
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "latency_ms": {
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "max": max(latencies, default=None),
+        },
+        "results": entries,
+    }
+
+
+def summarize_shards(manifests):
+    """
+    Итог сбора по всем шардам для события COLLECTED_WEATHER
+
+    Args:
+        manifests: Манифесты экземпляров задач сбора; у упавших
+            экземпляров манифеста нет (None)
+
+    Returns:
+        {"shards", "documents"} или None, если ни один шард
+        не собрал ни одного документа
+    """
+    manifests = [manifest for manifest in manifests or [] if manifest]
+    succeeded = sum(manifest["succeeded"] for manifest in manifests)
+    if not succeeded:
+        return None
+    return {"shards": len(manifests), "documents": succeeded}
+
+
+def get_documents(manifest):
+    """
+    Полные результаты запуска из MongoDB по _id из манифеста
+
+    Returns:
+        Документы в порядке записей манифеста (без отсутствующих)
+    """
+    from connector__mongo_postgres_logic import get_config
+
+    document_ids = [
+        entry["document_id"]
+        for entry in manifest["results"]
+        if entry.get("document_id")
+    ]
+    if not document_ids:
+        return []
+
+    config = get_config()
+    client = MongoClient(**config["mongo"])
+    try:
+        collection = client[config["mongo_database"]][manifest["collection"]]
+        documents = {
+            str(doc["_id"]): doc
+            for doc in collection.find(
+                {"_id": {"$in": [ObjectId(i) for i in document_ids]}}
+            )
+        }
+    finally:
+        client.close()
+
+    return [documents[i] for i in document_ids if i in documents]
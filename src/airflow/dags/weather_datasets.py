@@ -0,0 +1,19 @@
+"""
+Datasets конвейера weather analytics
+
+Каждый этап публикует обновление своего Dataset, и следующий этап
+запускается сразу по событию, без сенсоров и опроса:
+
+    weather_data_collection -> connector__mongo_postgres -> dbt_weather_marts
+"""
+
+from airflow.datasets import Dataset
+
+# Новые документы сбора в MongoDB
+COLLECTED_WEATHER = Dataset("weather-analytics://mongodb/weather_collection")
+
+# Новые строки в raw.weather_current / raw.weather_forecast
+RAW_WEATHER = Dataset("weather-analytics://postgres/raw")
+
+# Обновлённые витрины dm
+WEATHER_MARTS = Dataset("weather-analytics://postgres/dm")
@@ -7,39 +7,29 @@ from app.core.config import Settings, get_settings
 from app.db.mongodb import mongo_client
 from app.models.weather import (
     AggregatedForecastResponse,
+    AggregatedWeatherAndForecastResponse,
     AggregatedWeatherResponse,
 )
-from app.services.aggregator import ForecastAggregator, WeatherAggregator
-from app.services.weather_providers.base import (
-    BaseForecastProvider,
-    BaseWeatherProvider,
+from app.services.aggregator import (
+    CombinedAggregator,
+    ForecastAggregator,
+    WeatherAggregator,
 )
-from app.services.weather_providers.open_meteo import OpenMeteoProvider
-from app.services.weather_providers.open_meteo_forecast import (
-    OpenMeteoForecastProvider,
-)
-from app.services.weather_providers.openweather import OpenWeatherMapProvider
-from app.services.weather_providers.openweather_forecast import (
-    OpenWeatherMapForecastProvider,
-)
-from app.services.weather_providers.weatherapi import WeatherAPIProvider
-from app.services.weather_providers.weatherapi_forecast import (
-    WeatherAPIForecastProvider,
-)
-from app.services.weather_providers.weatherbit import WeatherbitProvider
-from app.services.weather_providers.weatherbit_forecast import (
-    WeatherbitForecastProvider,
-)
-from app.services.weather_providers.weatherstack import WeatherstackProvider
-from app.services.weather_providers.weatherstack_forecast import (
-    WeatherstackForecastProvider,
+from app.services.weather_providers.registry import (
+    build_combined_providers,
+    build_forecast_providers,
+    build_weather_providers,
 )
 from bson import json_util
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query, Request, Response
 from loguru import logger
 
 router = APIRouter(prefix="/weather", tags=["weather"])
 
+# Заголовок с _id сохранённого в MongoDB документа: по нему сборщик
+# ссылается на полный ответ, не перенося его в свой манифест
+DOCUMENT_ID_HEADER = "X-Document-Id"
+
 
 def _get_http_client(request: Request) -> httpx.AsyncClient:
     client = getattr(request.app.state, "http_client", None)
@@ -56,32 +46,21 @@ def _get_http_client(request: Request) -> httpx.AsyncClient:
 )
 async def get_current_weather(
     request: Request,
+    response: Response,
     lat: float = Query(..., description="Широта"),
     lon: float = Query(..., description="Долгота"),
     settings: Settings = Depends(get_settings),  # noqa: B008
 ) -> AggregatedWeatherResponse:
     client = _get_http_client(request)
 
-    providers: list[BaseWeatherProvider] = [OpenMeteoProvider(client)]
-
-    if settings.openweather_api_key:
-        providers.append(OpenWeatherMapProvider(client, settings.openweather_api_key))
-
-    if settings.weatherapi_api_key:
-        providers.append(WeatherAPIProvider(client, settings.weatherapi_api_key))
-
-    if settings.weatherbit_api_key:
-        providers.append(WeatherbitProvider(client, settings.weatherbit_api_key))
-
-    if settings.weatherstack_api_key:
-        providers.append(WeatherstackProvider(client, settings.weatherstack_api_key))
+    providers = build_weather_providers(client, settings)
 
     aggregator = WeatherAggregator(providers)
     result = await aggregator.get_aggregated_weather(lat=lat, lon=lon)
 
     # Сохраняем в MongoDB
     try:
-        mongo_client.save_current_weather(
+        document_id = mongo_client.save_current_weather(
             latitude=lat,
             longitude=lon,
             request_data={"lat": lat, "lon": lon},
@@ -89,6 +68,8 @@ async def get_current_weather(
             status_code=200,
             error_message=None,
         )
+        if document_id is not None:
+            response.headers[DOCUMENT_ID_HEADER] = str(document_id)
     except Exception as e:
         logger.error(f"Не удалось сохранить текущую погоду в MongoDB: {e}")
 
@@ -102,6 +83,7 @@ async def get_current_weather(
 )
 async def get_forecast_weather(
     request: Request,
+    response: Response,
     lat: float = Query(..., description="Широта"),
     lon: float = Query(..., description="Долгота"),
     hours: int = Query(
@@ -114,48 +96,83 @@ async def get_forecast_weather(
 ) -> AggregatedForecastResponse:
     client = _get_http_client(request)
 
-    providers: list[BaseForecastProvider] = [OpenMeteoForecastProvider(client)]
+    providers = build_forecast_providers(client, settings)
 
-    if settings.openweather_api_key:
-        providers.append(
-            OpenWeatherMapForecastProvider(client, settings.openweather_api_key)
-        )
+    aggregator = ForecastAggregator(providers)
+    result = await aggregator.get_aggregated_forecast(
+        lat=lat,
+        lon=lon,
+        hours=hours,
+    )
 
-    if settings.weatherapi_api_key:
-        providers.append(
-            WeatherAPIForecastProvider(client, settings.weatherapi_api_key)
+    # Сохраняем в MongoDB
+    try:
+        document_id = mongo_client.save_forecast(
+            latitude=lat,
+            longitude=lon,
+            hours=hours,
+            request_data={"lat": lat, "lon": lon, "hours": hours},
+            response_data=result.model_dump(),
+            status_code=200,
+            error_message=None,
         )
+        if document_id is not None:
+            response.headers[DOCUMENT_ID_HEADER] = str(document_id)
+    except Exception as e:
+        logger.error(f"Не удалось сохранить прогноз в MongoDB: {e}")
 
-    if settings.weatherbit_api_key:
-        providers.append(
-            WeatherbitForecastProvider(client, settings.weatherbit_api_key)
-        )
+    return result
 
-    if settings.weatherstack_api_key:
-        providers.append(
-            WeatherstackForecastProvider(client, settings.weatherstack_api_key)
-        )
 
-    aggregator = ForecastAggregator(providers)
-    result = await aggregator.get_aggregated_forecast(
+@router.get(
+    "/combined",
+    response_model=AggregatedWeatherAndForecastResponse,
+    summary="Текущая погода и прогноз за один запрос к каждому провайдеру",
+)
+async def get_weather_and_forecast(
+    request: Request,
+    lat: float = Query(..., description="Широта"),
+    lon: float = Query(..., description="Долгота"),
+    hours: int = Query(
+        24,
+        ge=1,
+        le=168,
+        description="Горизонт прогноза в часах (1–168)",
+    ),
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> AggregatedWeatherAndForecastResponse:
+    client = _get_http_client(request)
+
+    providers = build_combined_providers(client, settings)
+
+    aggregator = CombinedAggregator(providers)
+    result = await aggregator.get_aggregated_weather_and_forecast(
         lat=lat,
         lon=lon,
         hours=hours,
     )
 
-    # Сохраняем в MongoDB
+    # Сохраняем в MongoDB обе части, как отдельные эндпоинты
     try:
+        mongo_client.save_current_weather(
+            latitude=lat,
+            longitude=lon,
+            request_data={"lat": lat, "lon": lon},
+            response_data=result.current.model_dump(),
+            status_code=200,
+            error_message=None,
+        )
         mongo_client.save_forecast(
             latitude=lat,
             longitude=lon,
             hours=hours,
             request_data={"lat": lat, "lon": lon, "hours": hours},
-            response_data=result.model_dump(),
+            response_data=result.forecast.model_dump(),
             status_code=200,
             error_message=None,
         )
     except Exception as e:
-        logger.error(f"Не удалось сохранить прогноз в MongoDB: {e}")
+        logger.error(f"Не удалось сохранить погоду и прогноз в MongoDB: {e}")
 
     return result
 
@@ -241,3 +258,31 @@ async def get_forecast_history_by_location(
     except Exception as e:
         logger.error(f"Ошибка получения истории прогнозов: {e}")
         return {"error": str(e), "count": 0, "data": []}
+
+
+@router.get("/history/current/documents", summary="Записи текущей погоды по _id")
+async def get_current_weather_documents(
+    ids: list[str] = Query(..., description="_id документов"),  # noqa: B008
+) -> dict:
+    """Полные записи текущей погоды по _id из манифеста сбора"""
+    try:
+        data = mongo_client.get_current_weather_by_ids(ids)
+        data_json = json.loads(json_util.dumps(data))
+        return {"count": len(data_json), "data": data_json}
+    except Exception as e:
+        logger.error(f"Ошибка получения записей погоды по _id: {e}")
+        return {"error": str(e), "count": 0, "data": []}
+
+
+@router.get("/history/forecast/documents", summary="Прогнозы по _id")
+async def get_forecast_documents(
+    ids: list[str] = Query(..., description="_id документов"),  # noqa: B008
+) -> dict:
+    """Полные прогнозы по _id из манифеста сбора"""
+    try:
+        data = mongo_client.get_forecasts_by_ids(ids)
+        data_json = json.loads(json_util.dumps(data))
+        return {"count": len(data_json), "data": data_json}
+    except Exception as e:
+        logger.error(f"Ошибка получения прогнозов по _id: {e}")
+        return {"error": str(e), "count": 0, "data": []}
@@ -19,6 +19,88 @@ class Settings(BaseSettings):
     weatherstack_api_key: str = ""
 
     http_timeout: float = 5.0
+    # Записей в HTTP-кэше ответов провайдеров; 0 - кэш выключен
+    http_cache_max_entries: int = 10000
+    # Время свежести ответов без Cache-Control/Expires, с; 0 - не сохранять
+    http_cache_default_ttl: float = 0
+    # Устаревшая не больше чем на столько секунд запись отдаётся сразу
+    # и обновляется в фоне (stale-while-revalidate)
+    http_cache_stale_seconds: float = 300
+    # Записи, запрошенные за время свежести не меньше http_cache_hot_accesses
+    # раз, обновляются в фоне за эту долю времени свежести до истечения
+    http_cache_refresh_ahead: float = 0.2
+    http_cache_hot_accesses: int = 3
+    # Общий для воркеров кэш результатов провайдеров: redis://host:6379/0
+    # или sqlite:///path/to/cache.db; пусто - только кэш процесса
+    shared_cache_url: str = ""
+    shared_cache_timeout: float = 0.25
+    # Прогрев кэша при старте: самые запрашиваемые за cache_warmup_history_days
+    # точки из истории MongoDB (0 - не читать историю) и точки из настроек
+    # с горизонтами прогноза cache_warmup_forecast_hours
+    cache_warmup_top_locations: int = 50
+    cache_warmup_history_days: int = 7
+    cache_warmup_locations: list[tuple[float, float]] = []
+    cache_warmup_forecast_hours: list[int] = [24]
+    cache_warmup_parallelism: int = 8
+    # Сколько секунд старт ждёт прогрева; дальше он продолжается в фоне
+    cache_warmup_wait_seconds: float = 5.0
+    # Окно объединения запросов к Open-Meteo по разным точкам; 0 - без пакетов
+    open_meteo_batch_window_ms: int = 20
+    open_meteo_batch_max_locations: int = 50
+    # Хедж-запрос, если ответ провайдера медленнее перцентиля его задержек;
+    # хеджей не больше доли hedge_max_fraction от обычных запросов
+    request_hedging: bool = False
+    hedge_percentile: float = 0.95
+    hedge_max_fraction: float = 0.05
+    hedge_min_samples: int = 20
+
+    # Адрес сервера, подменяющего API провайдеров (см. app.upstream_stub)
+    upstream_base_url: str = ""
+
+    # Квоты провайдеров (по умолчанию - бесплатные тарифы); 0 - без лимита.
+    # Лимит в минуту - на процесс, дневной бюджет при shared_cache_url -
+    # общий для всех воркеров
+    open_meteo_requests_per_minute: int = 600
+    open_meteo_daily_budget: int = 10000
+    openweather_requests_per_minute: int = 60
+    openweather_daily_budget: int = 1000
+    weatherapi_requests_per_minute: int = 0
+    weatherapi_daily_budget: int = 30000
+    weatherbit_requests_per_minute: int = 0
+    weatherbit_daily_budget: int = 50
+    weatherstack_requests_per_minute: int = 0
+    weatherstack_daily_budget: int = 3
+
+    # Доля дневного бюджета, доступная пакетному сбору (остаток - интерактиву)
+    rate_limit_batch_budget_share: float = 0.8
+    # Сколько секунд запрос ждёт токен, прежде чем провайдер будет пропущен
+    rate_limit_interactive_max_wait: float = 1.0
+    rate_limit_batch_max_wait: float = 30.0
+
+    def provider_rate_limits(self) -> dict[str, tuple[int, int]]:
+        """Лимиты по квотам: (запросов в минуту, дневной бюджет)."""
+        return {
+            "open_meteo": (
+                self.open_meteo_requests_per_minute,
+                self.open_meteo_daily_budget,
+            ),
+            "openweathermap": (
+                self.openweather_requests_per_minute,
+                self.openweather_daily_budget,
+            ),
+            "weatherapi": (
+                self.weatherapi_requests_per_minute,
+                self.weatherapi_daily_budget,
+            ),
+            "weatherbit": (
+                self.weatherbit_requests_per_minute,
+                self.weatherbit_daily_budget,
+            ),
+            "weatherstack": (
+                self.weatherstack_requests_per_minute,
+                self.weatherstack_daily_budget,
+            ),
+        }
 
 
 @lru_cache
@@ -1,15 +1,44 @@
 """
 Модуль интеграции с MongoDB
+
+Соединение устанавливается лениво, при первом обращении к коллекциям
+(или в фоне при старте приложения), с ограниченными таймаутами: импорт
+модуля не ходит в сеть и не блокируется недоступной MongoDB.
+
+Пока MongoDB недоступна, записи не теряются и не ждут её: при заданном
+MONGO_SPOOL_DIR они дописываются в локальный спул (app.db.spool), откуда
+их отправляет фоновый проигрыватель. Без спула (и до первой попытки
+подключения) запись подключается сразу, с тем же ограниченным таймаутом,
+а несохранённые документы - ошибка MongoWriteError, а не пустой результат.
 """
 
+import asyncio
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
+from bson import ObjectId
+from bson.errors import InvalidId
 from loguru import logger
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+from app.db.spool import WriteSpool
+
+WEATHER_COLLECTION = "weather_current"
+FORECAST_COLLECTION = "weather_forecast"
+# База по умолчанию; другую задаёт MONGO_DATABASE
+PRODUCTION_DATABASE = "weather_analytics_db"
+# Код ошибки MongoDB "документ с таким _id уже есть"
+DUPLICATE_KEY = 11000
+
+
+class MongoWriteError(Exception):
+    """Документы не сохранены ни в MongoDB, ни в спул."""
 
 
 class MongoDBClient:
@@ -20,54 +49,235 @@ class MongoDBClient:
     _db: Optional[Database] = None
     _weather_collection: Optional[Collection] = None
     _forecast_collection: Optional[Collection] = None
+    _spool: Optional[WriteSpool] = None
+    _lock = threading.Lock()
+    # Момент, раньше которого не повторять неудавшееся подключение
+    _retry_at: float = 0.0
+    # Была ли хотя бы одна попытка подключения
+    _connect_attempted: bool = False
+    # Поток фонового подключения (см. _connect_in_background)
+    _connect_thread: Optional[threading.Thread] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        if self._client is None:
-            self._connect()
+    def connect(self) -> bool:
+        """
+        Подключение, если его ещё нет; True - MongoDB доступна.
+
+        После неудачи следующая попытка - не раньше чем через
+        MONGO_RETRY_SECONDS, чтобы запросы не ждали таймаут каждый раз.
+        """
+        if self._client is not None:
+            return True
+        with self._lock:
+            if self._client is None and time.monotonic() >= self._retry_at:
+                self._connect()
+                MongoDBClient._connect_attempted = True
+                if self._client is None:
+                    retry = float(os.getenv("MONGO_RETRY_SECONDS", "30"))
+                    MongoDBClient._retry_at = time.monotonic() + retry
+        return self._client is not None
 
     def _connect(self):
         """Установка соединения с MongoDB"""
+        timeout_ms = int(os.getenv("MONGO_TIMEOUT_MS", "2000"))
         mongo_config = {
             "username": os.getenv("MONGO_INITDB_ROOT_USERNAME", "admin"),
             "password": os.getenv("MONGO_INITDB_ROOT_PASSWORD", "admin"),
             "host": os.getenv("MONGO_HOST", "localhost"),
             "port": int(os.getenv("MONGO_PORT", "27017")),
             "authSource": "admin",
+            "serverSelectionTimeoutMS": timeout_ms,
+            "connectTimeoutMS": timeout_ms,
         }
 
         logger.info(
             f"Подключение к MongoDB: {mongo_config['host']}:{mongo_config['port']}"
         )
 
+        client = None
         try:
-            self._client = MongoClient(**mongo_config)
-            self._db = self._client["weather_analytics_db"]
-            self._weather_collection = self._db["weather_current"]
-            self._forecast_collection = self._db["weather_forecast"]
-
+            client = MongoClient(**mongo_config)
             # Проверка соединения
-            self._client.admin.command("ping")
+            client.admin.command("ping")
+            db = client[os.getenv("MONGO_DATABASE", PRODUCTION_DATABASE)]
+            MongoDBClient._db = db
+            MongoDBClient._weather_collection = db[WEATHER_COLLECTION]
+            MongoDBClient._forecast_collection = db[FORECAST_COLLECTION]
+            MongoDBClient._client = client
             logger.info("Успешно подключились к MongoDB")
         except Exception as e:
             logger.error(f"Не удалось подключиться к MongoDB: {e}")
             # Не бросаем исключение, позволяем приложению работать без MongoDB
-            self._client = None
+            if client is not None:
+                client.close()
 
     @property
     def weather_collection(self) -> Optional[Collection]:
-        """Коллекция текущей погоды"""
+        """Коллекция текущей погоды (None - MongoDB недоступна)"""
+        self.connect()
         return self._weather_collection
 
     @property
     def forecast_collection(self) -> Optional[Collection]:
-        """Коллекция прогнозов"""
+        """Коллекция прогнозов (None - MongoDB недоступна)"""
+        self.connect()
         return self._forecast_collection
 
+    @staticmethod
+    def build_current_weather_document(
+        latitude: float,
+        longitude: float,
+        request_data: dict,
+        response_data: dict,
+        status_code: int,
+        error_message: Optional[str] = None,
+    ) -> dict:
+        """Документ текущей погоды в формате коллекции weather_current"""
+        return {
+            "type": "current",
+            "latitude": latitude,
+            "longitude": longitude,
+            "request": request_data,
+            "response": response_data,
+            "status_code": status_code,
+            "error_message": error_message,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+        }
+
+    @staticmethod
+    def build_forecast_document(
+        latitude: float,
+        longitude: float,
+        hours: int,
+        request_data: dict,
+        response_data: dict,
+        status_code: int,
+        error_message: Optional[str] = None,
+    ) -> dict:
+        """Документ прогноза в формате коллекции weather_forecast"""
+        return {
+            "type": "forecast",
+            "latitude": latitude,
+            "longitude": longitude,
+            "hours": hours,
+            "request": request_data,
+            "response": response_data,
+            "status_code": status_code,
+            "error_message": error_message,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+        }
+
+    @property
+    def spool(self) -> Optional[WriteSpool]:
+        """Спул записей на время недоступности MongoDB (None - выключен)"""
+        if MongoDBClient._spool is None and os.getenv("MONGO_SPOOL_DIR"):
+            MongoDBClient._spool = WriteSpool(
+                os.environ["MONGO_SPOOL_DIR"],
+                max_total_bytes=int(os.getenv("MONGO_SPOOL_MAX_MB", "512")) << 20,
+                fsync=os.getenv("MONGO_SPOOL_FSYNC", "").lower() in ("1", "true"),
+            )
+        return MongoDBClient._spool
+
+    def _connect_in_background(self) -> None:
+        """Попытка подключения в отдельном потоке, если она ещё не идёт"""
+        if self._lock.locked() or time.monotonic() < self._retry_at:
+            return
+        thread = threading.Thread(target=self.connect, daemon=True)
+        MongoDBClient._connect_thread = thread
+        thread.start()
+
+    def _mark_unavailable(self) -> None:
+        """Потеря соединения: дальше пишем в спул, не дожидаясь таймаутов"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            MongoDBClient._client = None
+            MongoDBClient._weather_collection = None
+            MongoDBClient._forecast_collection = None
+            retry = float(os.getenv("MONGO_RETRY_SECONDS", "30"))
+            MongoDBClient._retry_at = time.monotonic() + retry
+
+    def _write(self, collection_name: str, documents: list[dict]) -> list:
+        """
+        Вставка документов, возвращает их _id.
+
+        Запрос не ждёт MongoDB: если соединения нет или оно потеряно,
+        документы уходят в спул (с уже присвоенными _id) и будут
+        вставлены фоновым проигрывателем. Без спула или до первой попытки
+        подключения оно устанавливается здесь же (не дольше MONGO_TIMEOUT_MS).
+
+        Raises:
+            MongoWriteError: документы не сохранены ни в MongoDB, ни в спул
+        """
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        ids = [document["_id"] for document in documents]
+
+        spool = self.spool
+        if self._client is None:
+            if spool is None or not self._connect_attempted:
+                self.connect()
+            else:
+                self._connect_in_background()
+        if self._client is not None:
+            try:
+                self._db[collection_name].insert_many(documents, ordered=False)
+                return ids
+            except ConnectionFailure as e:
+                logger.error(f"MongoDB недоступна при записи в {collection_name}: {e}")
+                self._mark_unavailable()
+
+        if spool is None:
+            raise MongoWriteError(
+                f"MongoDB недоступна, документы {collection_name} не сохранены"
+            )
+        if not spool.append_many(collection_name, documents):
+            raise MongoWriteError(
+                f"Спул переполнен, документы {collection_name} не сохранены"
+            )
+        logger.info(f"Отложено в спул для {collection_name}: {len(documents)}")
+        return ids
+
+    def replay_spool(self) -> int:
+        """
+        Отправить записи спула в MongoDB, если она доступна
+
+        updated_at документов проставляется моментом отправки: коннектор
+        в Postgres извлекает документы по updated_at с ограниченным окном
+        назад, и документ, пролежавший в спуле дольше окна, иначе пропал бы
+        из инкрементальной выгрузки. Время наблюдения остаётся в created_at.
+        """
+        spool = self.spool
+        if spool is None or not spool.pending() or not self.connect():
+            return 0
+
+        def insert(collection_name: str, documents: list[dict]) -> None:
+            replayed_at = datetime.now()
+            for document in documents:
+                document["updated_at"] = replayed_at
+            try:
+                self._db[collection_name].insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                # Документы, вставленные до сбоя при прошлой попытке, - не ошибка
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                    raise
+
+        try:
+            return spool.replay(insert)
+        except ConnectionFailure as e:
+            logger.error(f"MongoDB снова недоступна при отправке спула: {e}")
+            self._mark_unavailable()
+        except Exception as e:
+            logger.error(f"Ошибка отправки спула в MongoDB: {e}")
+        return 0
+
     def save_current_weather(
         self,
         latitude: float,
@@ -76,32 +286,28 @@ class MongoDBClient:
         response_data: dict,
         status_code: int,
         error_message: Optional[str] = None,
-    ) -> bool:
-        """Сохранение текущей погоды в MongoDB"""
-        if self._weather_collection is None:
-            logger.warning("Коллекция погоды недоступна, пропускаем сохранение")
-            return False
-
+    ) -> Optional[ObjectId]:
+        """Сохранение текущей погоды в MongoDB, возвращает _id документа"""
         try:
-            document = {
-                "type": "current",
-                "latitude": latitude,
-                "longitude": longitude,
-                "request": request_data,
-                "response": response_data,
-                "status_code": status_code,
-                "error_message": error_message,
-                "created_at": datetime.now(),
-                "updated_at": datetime.now(),
-            }
-
-            self._weather_collection.insert_one(document)
-            logger.info(f"Сохранена текущая погода: lat={latitude}, lon={longitude}")
-            return True
+            document = self.build_current_weather_document(
+                latitude=latitude,
+                longitude=longitude,
+                request_data=request_data,
+                response_data=response_data,
+                status_code=status_code,
+                error_message=error_message,
+            )
+
+            ids = self._write(WEATHER_COLLECTION, [document])
+            if ids:
+                logger.info(
+                    f"Сохранена текущая погода: lat={latitude}, lon={longitude}"
+                )
+            return ids[0] if ids else None
 
         except Exception as e:
             logger.error(f"Ошибка сохранения текущей погоды: {e}")
-            return False
+            return None
 
     def save_forecast(
         self,
@@ -112,46 +318,70 @@ class MongoDBClient:
         response_data: dict,
         status_code: int,
         error_message: Optional[str] = None,
-    ) -> bool:
-        """Сохранение прогноза в MongoDB"""
-        if self._forecast_collection is None:
-            logger.warning("Коллекция прогнозов недоступна, пропускаем сохранение")
-            return False
-
+    ) -> Optional[ObjectId]:
+        """Сохранение прогноза в MongoDB, возвращает _id документа"""
         try:
-            document = {
-                "type": "forecast",
-                "latitude": latitude,
-                "longitude": longitude,
-                "hours": hours,
-                "request": request_data,
-                "response": response_data,
-                "status_code": status_code,
-                "error_message": error_message,
-                "created_at": datetime.now(),
-                "updated_at": datetime.now(),
-            }
-
-            self._forecast_collection.insert_one(document)
-            logger.info(
-                f"Сохранён прогноз: lat={latitude}, lon={longitude}, hours={hours}"
+            document = self.build_forecast_document(
+                latitude=latitude,
+                longitude=longitude,
+                hours=hours,
+                request_data=request_data,
+                response_data=response_data,
+                status_code=status_code,
+                error_message=error_message,
             )
-            return True
+
+            ids = self._write(FORECAST_COLLECTION, [document])
+            if ids:
+                logger.info(
+                    f"Сохранён прогноз: lat={latitude}, lon={longitude}, hours={hours}"
+                )
+            return ids[0] if ids else None
 
         except Exception as e:
             logger.error(f"Ошибка сохранения прогноза: {e}")
-            return False
+            return None
+
+    def insert_current_weather_many(self, documents: list[dict]) -> list:
+        """
+        Пакетное сохранение документов текущей погоды, возвращает их _id
+
+        В отличие от save_*, ошибка не глотается: пакетный сбор должен
+        упасть, а не отчитаться об успехе без сохранённых документов.
+        """
+        if not documents:
+            return []
+
+        try:
+            ids = self._write(WEATHER_COLLECTION, documents)
+        except Exception as e:
+            logger.error(f"Ошибка пакетного сохранения текущей погоды: {e}")
+            raise
+        logger.info(f"Сохранено записей текущей погоды: {len(ids)}")
+        return ids
+
+    def insert_forecasts_many(self, documents: list[dict]) -> list:
+        """Пакетное сохранение документов прогнозов, возвращает их _id"""
+        if not documents:
+            return []
+
+        try:
+            ids = self._write(FORECAST_COLLECTION, documents)
+        except Exception as e:
+            logger.error(f"Ошибка пакетного сохранения прогнозов: {e}")
+            raise
+        logger.info(f"Сохранено прогнозов: {len(ids)}")
+        return ids
 
     def get_recent_current_weather(self, limit: int = 10) -> list:
         """Получение последних записей текущей погоды"""
-        if self._weather_collection is None:
+        collection = self.weather_collection
+        if collection is None:
             logger.warning("Коллекция погоды недоступна")
             return []
 
         try:
-            cursor = self._weather_collection.find(
-                {}, sort=[("created_at", -1)], limit=limit
-            )
+            cursor = collection.find({}, sort=[("created_at", -1)], limit=limit)
             return list(cursor)
         except Exception as e:
             logger.error(f"Ошибка получения текущей погоды: {e}")
@@ -159,29 +389,68 @@ class MongoDBClient:
 
     def get_recent_forecasts(self, limit: int = 10) -> list:
         """Получение последних прогнозов"""
-        if self._forecast_collection is None:
+        collection = self.forecast_collection
+        if collection is None:
             logger.warning("Коллекция прогнозов недоступна")
             return []
 
         try:
-            cursor = self._forecast_collection.find(
-                {}, sort=[("created_at", -1)], limit=limit
-            )
+            cursor = collection.find({}, sort=[("created_at", -1)], limit=limit)
             return list(cursor)
         except Exception as e:
             logger.error(f"Ошибка получения прогнозов: {e}")
             return []
 
+    @staticmethod
+    def _object_ids(document_ids: list[str]) -> list[ObjectId]:
+        """Строковые _id в ObjectId, некорректные пропускаются"""
+        object_ids = []
+        for document_id in document_ids:
+            try:
+                object_ids.append(ObjectId(document_id))
+            except (InvalidId, TypeError):
+                logger.warning(f"Некорректный _id документа: {document_id}")
+        return object_ids
+
+    def get_current_weather_by_ids(self, document_ids: list[str]) -> list:
+        """Получение документов текущей погоды по _id (например, из манифеста)"""
+        collection = self.weather_collection
+        if collection is None:
+            logger.warning("Коллекция погоды недоступна")
+            return []
+
+        try:
+            cursor = collection.find({"_id": {"$in": self._object_ids(document_ids)}})
+            return list(cursor)
+        except Exception as e:
+            logger.error(f"Ошибка получения текущей погоды по _id: {e}")
+            return []
+
+    def get_forecasts_by_ids(self, document_ids: list[str]) -> list:
+        """Получение прогнозов по _id (например, из манифеста)"""
+        collection = self.forecast_collection
+        if collection is None:
+            logger.warning("Коллекция прогнозов недоступна")
+            return []
+
+        try:
+            cursor = collection.find({"_id": {"$in": self._object_ids(document_ids)}})
+            return list(cursor)
+        except Exception as e:
+            logger.error(f"Ошибка получения прогнозов по _id: {e}")
+            return []
+
     def get_current_weather_by_location(
         self, latitude: float, longitude: float, limit: int = 10
     ) -> list:
         """Получение текущей погоды для координат"""
-        if self._weather_collection is None:
+        collection = self.weather_collection
+        if collection is None:
             logger.warning("Коллекция погоды недоступна")
             return []
 
         try:
-            cursor = self._weather_collection.find(
+            cursor = collection.find(
                 {"latitude": latitude, "longitude": longitude, "status_code": 200},
                 sort=[("created_at", -1)],
                 limit=limit,
@@ -195,12 +464,13 @@ class MongoDBClient:
         self, latitude: float, longitude: float, limit: int = 10
     ) -> list:
         """Получение прогнозов для координат"""
-        if self._forecast_collection is None:
+        collection = self.forecast_collection
+        if collection is None:
             logger.warning("Коллекция прогнозов недоступна")
             return []
 
         try:
-            cursor = self._forecast_collection.find(
+            cursor = collection.find(
                 {"latitude": latitude, "longitude": longitude, "status_code": 200},
                 sort=[("created_at", -1)],
                 limit=limit,
@@ -210,11 +480,81 @@ class MongoDBClient:
             logger.error(f"Ошибка получения прогнозов: {e}")
             return []
 
+    def _popular_locations(
+        self, collection: Collection, since: datetime, limit: int, by_hours: bool
+    ) -> list:
+        """Самые частые точки запросов с момента since, координаты до 0.01°"""
+        group_id: dict[str, Any] = {
+            "lat": {"$round": ["$latitude", 2]},
+            "lon": {"$round": ["$longitude", 2]},
+        }
+        if by_hours:
+            group_id["hours"] = "$hours"
+        pipeline: list[dict[str, Any]] = [
+            {"$match": {"created_at": {"$gte": since}, "status_code": 200}},
+            {"$group": {"_id": group_id, "requests": {"$sum": 1}}},
+            {"$sort": {"requests": -1}},
+            {"$limit": limit},
+        ]
+        cursor = collection.aggregate(pipeline, maxTimeMS=10_000)
+        return [{**row["_id"], "requests": row["requests"]} for row in cursor]
+
+    def get_popular_current_locations(self, since: datetime, limit: int = 50) -> list:
+        """Самые запрашиваемые точки текущей погоды: {"lat", "lon", "requests"}"""
+        collection = self.weather_collection
+        if collection is None:
+            logger.warning("Коллекция погоды недоступна")
+            return []
+
+        try:
+            return self._popular_locations(collection, since, limit, by_hours=False)
+        except Exception as e:
+            logger.error(f"Ошибка получения популярных точек погоды: {e}")
+            return []
+
+    def get_popular_forecast_locations(self, since: datetime, limit: int = 50) -> list:
+        """Самые запрашиваемые прогнозы: {"lat", "lon", "hours", "requests"}"""
+        collection = self.forecast_collection
+        if collection is None:
+            logger.warning("Коллекция прогнозов недоступна")
+            return []
+
+        try:
+            return self._popular_locations(collection, since, limit, by_hours=True)
+        except Exception as e:
+            logger.error(f"Ошибка получения популярных прогнозов: {e}")
+            return []
+
     def close(self):
-        """Закрытие соединения с MongoDB"""
-        if self._client:
-            self._client.close()
-            logger.info("Соединение с MongoDB закрыто")
+        """
+        Закрытие соединения с MongoDB
+
+        Идущее подключение (фоновое или из startup) заканчивается не позже
+        MONGO_TIMEOUT_MS; его дожидаемся, чтобы поток не пережил клиента
+        и не подключился уже после закрытия.
+        """
+        thread = self._connect_thread
+        if thread is not None:
+            thread.join()
+            MongoDBClient._connect_thread = None
+        if self._spool is not None:
+            self._spool.close()
+        with self._lock:
+            if self._client:
+                self._client.close()
+                MongoDBClient._client = None
+                MongoDBClient._weather_collection = None
+                MongoDBClient._forecast_collection = None
+                logger.info("Соединение с MongoDB закрыто")
+
+
+async def replay_spool_periodically(
+    client: MongoDBClient, interval: float = 10.0
+) -> None:
+    """Фоновый проигрыватель спула: раз в interval секунд, вне event loop"""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(client.replay_spool)
 
 
 # Глобальный экземпляр клиента
@@ -0,0 +1,261 @@
+"""
+Локальный спул записей в MongoDB на время её недоступности.
+
+Документы, которые не удалось записать, дописываются в конец файлов-сегментов
+в каталоге спула: запись - заголовок (длина и CRC32) и документ в BSON,
+так что даты и ObjectId сохраняются без преобразований. Запрос не ждёт
+MongoDB: дописать запись в файл - микросекунды.
+
+Фоновый проигрыватель закрывает текущий сегмент и отправляет записи
+закрытых сегментов в MongoDB пакетными вставками; сегмент удаляется только
+после успешной вставки всех его записей. _id документам присваивается до
+записи в спул, поэтому повторная отправка после сбоя посреди сегмента
+не создаёт дублей. Сегмент с повреждёнными записями (неверная CRC) после
+отправки целых записей не удаляется, а переименовывается в damaged-*.bad
+для разбора вручную.
+
+Каталог может быть общим для нескольких воркеров. У каждого свой открытый
+сегмент open-<pid>-<uuid>.log под исключительной блокировкой flock; закрытие -
+переименование в sealed-<время>-<uuid>.log, и проигрываются только закрытые
+сегменты, захваченные тем же flock. Открытый сегмент, блокировку которого
+удалось взять, принадлежал завершившемуся воркеру и закрывается при
+проигрывании.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, BinaryIO, Callable
+
+import bson
+from loguru import logger
+
+# Длина и CRC32 BSON-документа записи
+_HEADER = struct.Struct("<II")
+_OPEN_GLOB = "open-*.log"
+_SEALED_GLOB = "sealed-*.log"
+_DAMAGED_PREFIX = "damaged-"
+
+
+class WriteSpool:
+    """Append-only спул документов MongoDB, разбитый на сегменты."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_segment_bytes: int = 16 * 1024 * 1024,
+        max_total_bytes: int = 512 * 1024 * 1024,
+        fsync: bool = False,
+    ) -> None:
+        self._directory = Path(directory)
+        self._max_segment_bytes = max_segment_bytes
+        self._max_total_bytes = max_total_bytes
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._active: BinaryIO | None = None
+        self._active_path: Path | None = None
+        self.appended = 0
+        self.replayed = 0
+        self.dropped = 0
+
+    def append_many(self, collection: str, documents: list[dict[str, Any]]) -> int:
+        """
+        Дописать документы в спул, вернуть число записанных.
+
+        При переполнении спула (max_total_bytes) документы отбрасываются
+        с ошибкой в логе: лучше потерять часть данных, чем диск.
+        """
+        records = []
+        for document in documents:
+            payload = bson.encode({"collection": collection, "document": document})
+            records.append(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        data = b"".join(records)
+
+        with self._lock:
+            if self._size() + len(data) > self._max_total_bytes:
+                self.dropped += len(records)
+                logger.error(
+                    f"Спул MongoDB переполнен, отброшено документов: {len(records)}"
+                )
+                return 0
+            active = self._active_file()
+            active.write(data)
+            active.flush()
+            if self._fsync:
+                os.fsync(active.fileno())
+            if active.tell() >= self._max_segment_bytes:
+                self._seal()
+            self.appended += len(records)
+        return len(records)
+
+    def pending(self) -> bool:
+        """Есть ли в спуле записи, ожидающие отправки."""
+        with self._lock:
+            return self._size() > 0
+
+    def replay(
+        self,
+        insert: Callable[[str, list[dict[str, Any]]], None],
+        batch_size: int = 500,
+    ) -> int:
+        """
+        Отправить записи закрытых сегментов через insert(коллекция, документы).
+
+        Текущий сегмент закрывается, новые записи идут в следующий. Исключение
+        из insert прерывает проигрывание: сегмент остаётся до следующей попытки.
+        Возвращает число отправленных документов.
+        """
+        with self._lock:
+            self._seal()
+        self._seal_orphans()
+
+        sent = 0
+        for segment in self._sealed_segments():
+            try:
+                handle = open(segment, "rb")
+            except FileNotFoundError:
+                continue  # уже отправлен другим воркером
+            with handle:
+                if not _claim(segment, handle):
+                    continue
+                records, damaged = read_segment(segment)
+                by_collection: dict[str, list[dict[str, Any]]] = defaultdict(list)
+                for record in records:
+                    by_collection[record["collection"]].append(record["document"])
+                for collection, documents in by_collection.items():
+                    for start in range(0, len(documents), batch_size):
+                        insert(collection, documents[start : start + batch_size])
+                count = len(records)
+                if damaged:
+                    quarantine = segment.with_name(
+                        f"{_DAMAGED_PREFIX}{segment.stem}.bad"
+                    )
+                    segment.rename(quarantine)
+                    logger.error(
+                        f"{segment.name}: повреждённых записей {damaged}, "
+                        f"сегмент сохранён как {quarantine.name}"
+                    )
+                else:
+                    segment.unlink()
+            sent += count
+            self.replayed += count
+            logger.info(f"Из спула в MongoDB отправлено документов: {count}")
+        return sent
+
+    def close(self) -> None:
+        """Закрыть активный сегмент: записи станут доступны для отправки."""
+        with self._lock:
+            self._seal()
+
+    def _sealed_segments(self) -> list[Path]:
+        """Закрытые сегменты всех воркеров по времени закрытия."""
+        if not self._directory.exists():
+            return []
+        return sorted(self._directory.glob(_SEALED_GLOB))
+
+    def _seal_orphans(self) -> None:
+        """Закрыть открытые сегменты завершившихся воркеров."""
+        if not self._directory.exists():
+            return
+        for path in self._directory.glob(_OPEN_GLOB):
+            if path == self._active_path:
+                continue
+            try:
+                handle = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with handle:
+                # Блокировку держит живой владелец - сегмент ещё пишется
+                if _claim(path, handle):
+                    path.rename(self._sealed_path())
+
+    def _size(self) -> int:
+        if not self._directory.exists():
+            return 0
+        return sum(
+            path.stat().st_size
+            for pattern in (_OPEN_GLOB, _SEALED_GLOB)
+            for path in self._directory.glob(pattern)
+        )
+
+    def _sealed_path(self) -> Path:
+        return self._directory / f"sealed-{time.time_ns():020d}-{uuid.uuid4().hex}.log"
+
+    def _active_file(self) -> BinaryIO:
+        if self._active is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            path = self._directory / f"open-{os.getpid()}-{uuid.uuid4().hex}.log"
+            active = open(path, "ab")
+            # Держится, пока сегмент открыт: его не закроет и не отправит
+            # другой воркер
+            fcntl.flock(active.fileno(), fcntl.LOCK_EX)
+            self._active, self._active_path = active, path
+        return self._active
+
+    def _seal(self) -> None:
+        """Закрыть активный сегмент переименованием; пустой удаляется."""
+        if self._active is None or self._active_path is None:
+            return
+        if self._active.tell() == 0:
+            self._active_path.unlink(missing_ok=True)
+        else:
+            self._active_path.rename(self._sealed_path())
+        self._active.close()
+        self._active = None
+        self._active_path = None
+
+
+def _claim(path: Path, handle: BinaryIO) -> bool:
+    """
+    Захватить сегмент исключительной блокировкой без ожидания.
+
+    Ложь, если блокировку держит другой процесс или, пока мы открывали
+    файл, сегмент уже удалили или переименовали (путь указывает
+    на другой файл или не существует).
+    """
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    try:
+        return os.stat(path).st_ino == os.fstat(handle.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def read_segment(path: Path) -> tuple[list[dict[str, Any]], int]:
+    """
+    Записи сегмента по порядку и число повреждённых.
+
+    Недописанная последняя запись (процесс упал посреди записи, запись
+    не была подтверждена) пропускается. Запись с неверной CRC пропускается
+    по длине из заголовка и учитывается как повреждённая: целые записи
+    после неё всё равно читаются.
+    """
+    data = path.read_bytes()
+    records: list[dict[str, Any]] = []
+    damaged = 0
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, checksum = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if end > len(data):
+            logger.warning(f"{path.name}: недописанная запись в конце сегмента")
+            break
+        payload = data[start:end]
+        if zlib.crc32(payload) != checksum:
+            logger.error(f"{path.name}: повреждённая запись на смещении {offset}")
+            damaged += 1
+        else:
+            records.append(bson.decode(payload))
+        offset = end
+    return records, damaged
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import os
+
 import httpx
 from fastapi import FastAPI
+from loguru import logger
 
 from app.api.routes.weather import router as weather_router
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.db.mongodb import mongo_client, replay_spool_periodically
+from app.services.http_cache import http_cache_for
+from app.services.shared_cache import shared_cache_for
+from app.services.warmup import warm_up_cache
+from app.services.weather_providers.registry import configure_client
 
 
 def create_app() -> FastAPI:
@@ -21,14 +30,51 @@ def create_app() -> FastAPI:
     async def startup_event() -> None:
         timeout = httpx.Timeout(settings.http_timeout)
         app.state.http_client = httpx.AsyncClient(timeout=timeout)
+        configure_client(app.state.http_client, settings)
+        # Подключение к MongoDB - в фоне: старт не ждёт её таймаутов
+        app.state.mongo_connect = asyncio.create_task(
+            asyncio.to_thread(mongo_client.connect)
+        )
+        if mongo_client.spool is not None:
+            interval = float(os.getenv("MONGO_SPOOL_REPLAY_SECONDS", "10"))
+            app.state.spool_replayer = asyncio.create_task(
+                replay_spool_periodically(mongo_client, interval)
+            )
+        if http_cache_for(app.state.http_client) is not None:
+            await _start_warmup(app, settings)
 
     @app.on_event("shutdown")
     async def shutdown_event() -> None:
         client: httpx.AsyncClient | None = getattr(app.state, "http_client", None)
+        for name in ("warmup_task", "spool_replayer"):
+            task: asyncio.Task | None = getattr(app.state, name, None)
+            if task is not None:
+                task.cancel()
         if client is not None:
+            shared = shared_cache_for(client)
+            if shared is not None:
+                await shared.close()
             await client.aclose()
+        await asyncio.to_thread(mongo_client.close)
 
     return app
 
 
+async def _start_warmup(app: FastAPI, settings: Settings) -> None:
+    """
+    Прогрев кэша: старт ждёт его не дольше cache_warmup_wait_seconds,
+    а незавершённый прогрев продолжается в фоне параллельно с трафиком.
+    """
+    task = asyncio.create_task(warm_up_cache(app.state.http_client, settings))
+    app.state.warmup_task = task
+    try:
+        await asyncio.wait_for(
+            asyncio.shield(task), timeout=settings.cache_warmup_wait_seconds
+        )
+    except asyncio.TimeoutError:
+        logger.info("Прогрев кэша продолжается в фоне")
+    except Exception as e:
+        logger.error(f"Прогрев кэша не удался: {e}")
+
+
 app = create_app()
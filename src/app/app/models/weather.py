@@ -78,3 +78,10 @@ class AggregatedForecastResponse(BaseModel):
     forecasts: list[ProviderForecast] = Field(
         ..., description="Список прогнозов от провайдеров"
     )
+
+
+class AggregatedWeatherAndForecastResponse(BaseModel):
+    """Ответ API с текущей погодой и прогнозом, полученными за один проход."""
+
+    current: AggregatedWeatherResponse
+    forecast: AggregatedForecastResponse
@@ -4,13 +4,16 @@ from typing import Iterable, List
 
 from app.models.weather import (
     AggregatedForecastResponse,
+    AggregatedWeatherAndForecastResponse,
     AggregatedWeatherResponse,
     ProviderForecast,
     WeatherSample,
 )
 from app.services.weather_providers.base import (
+    BaseCombinedProvider,
     BaseForecastProvider,
     BaseWeatherProvider,
+    provider_coordinates,
 )
 
 
@@ -23,7 +26,9 @@ class WeatherAggregator:
         lat: float,
         lon: float,
     ) -> AggregatedWeatherResponse:
-        tasks = [p.get_weather(lat, lon) for p in self._providers]
+        tasks = [
+            p.get_weather(*provider_coordinates(p, lat, lon)) for p in self._providers
+        ]
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -34,22 +39,26 @@ class WeatherAggregator:
             if isinstance(result, WeatherSample):
                 samples.append(result)
 
-        avg_temp = _safe_mean(
-            sample.temperature_c
-            for sample in samples
-            if sample.temperature_c is not None
-        )
-        avg_humidity = _safe_mean(
-            sample.humidity for sample in samples if sample.humidity is not None
-        )
+        return _weather_response(lat, lon, samples)
 
-        return AggregatedWeatherResponse(
-            latitude=lat,
-            longitude=lon,
-            samples=samples,
-            average_temperature_c=avg_temp,
-            average_humidity=avg_humidity,
-        )
+
+def _weather_response(
+    lat: float, lon: float, samples: list[WeatherSample]
+) -> AggregatedWeatherResponse:
+    avg_temp = _safe_mean(
+        sample.temperature_c for sample in samples if sample.temperature_c is not None
+    )
+    avg_humidity = _safe_mean(
+        sample.humidity for sample in samples if sample.humidity is not None
+    )
+
+    return AggregatedWeatherResponse(
+        latitude=lat,
+        longitude=lon,
+        samples=samples,
+        average_temperature_c=avg_temp,
+        average_humidity=avg_humidity,
+    )
 
 
 def _safe_mean(values: Iterable[float]) -> float | None:
@@ -71,7 +80,10 @@ class ForecastAggregator:
         lon: float,
         hours: int,
     ) -> AggregatedForecastResponse:
-        tasks = [p.get_forecast(lat, lon, hours) for p in self._providers]
+        tasks = [
+            p.get_forecast(*provider_coordinates(p, lat, lon), hours)
+            for p in self._providers
+        ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         forecasts: list[ProviderForecast] = []
@@ -88,3 +100,43 @@ class ForecastAggregator:
             hours=hours,
             forecasts=forecasts,
         )
+
+
+class CombinedAggregator:
+    """Текущая погода и прогноз от нескольких провайдеров за один проход"""
+
+    def __init__(self, providers: Iterable[BaseCombinedProvider]) -> None:
+        self._providers: list[BaseCombinedProvider] = list(providers)
+
+    async def get_aggregated_weather_and_forecast(
+        self,
+        lat: float,
+        lon: float,
+        hours: int,
+    ) -> AggregatedWeatherAndForecastResponse:
+        tasks = [
+            p.get_weather_and_forecast(*provider_coordinates(p, lat, lon), hours)
+            for p in self._providers
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        samples: list[WeatherSample] = []
+        forecasts: list[ProviderForecast] = []
+        for result in results:
+            if isinstance(result, BaseException):
+                continue
+            sample, forecast = result
+            if isinstance(sample, WeatherSample):
+                samples.append(sample)
+            if isinstance(forecast, ProviderForecast):
+                forecasts.append(forecast)
+
+        return AggregatedWeatherAndForecastResponse(
+            current=_weather_response(lat, lon, samples),
+            forecast=AggregatedForecastResponse(
+                latitude=lat,
+                longitude=lon,
+                hours=hours,
+                forecasts=forecasts,
+            ),
+        )
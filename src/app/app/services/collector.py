@@ -0,0 +1,283 @@
+"""
+Пакетный сбор погоды по списку локаций внутри процесса.
+
+Агрегаторы вызываются напрямую, без HTTP API: ответы не сериализуются
+ради сетевого перехода, а результаты всего запуска сохраняются в MongoDB
+одной пакетной вставкой на коллекцию.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Sequence,
+    TypeVar,
+)
+
+import httpx
+from loguru import logger
+from pydantic import BaseModel
+
+from app.core.config import Settings, get_settings
+from app.db.mongodb import mongo_client
+from app.models.weather import (
+    AggregatedForecastResponse,
+    AggregatedWeatherAndForecastResponse,
+    AggregatedWeatherResponse,
+)
+from app.services.aggregator import (
+    CombinedAggregator,
+    ForecastAggregator,
+    WeatherAggregator,
+)
+from app.services.rate_limit import batch_priority
+from app.services.shared_cache import shared_cache_for
+from app.services.weather_providers.registry import (
+    build_combined_providers,
+    build_forecast_providers,
+    build_weather_providers,
+    configure_client,
+)
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+async def _run_jobs(
+    jobs: list[dict[str, Any]],
+    fetch: Callable[[dict[str, Any]], Awaitable[ResponseT]],
+    parallelism: int,
+) -> list[tuple[dict[str, Any], ResponseT | None]]:
+    """Выполнение заданий с ограничением параллелизма и замером времени."""
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run(job: dict[str, Any]) -> tuple[dict[str, Any], ResponseT | None]:
+        result: dict[str, Any] = {"city": job["city"]["name"]}
+        if "hours" in job:
+            result["hours"] = job["hours"]
+
+        async with semaphore:
+            started = time.perf_counter()
+            response: ResponseT | None = None
+            try:
+                response = await fetch(job)
+                result["status"] = "success"
+            except Exception as e:
+                logger.error(f"Ошибка сбора для {result['city']}: {e}")
+                result.update(status="error", error=str(e))
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        return result, response
+
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+
+async def collect_current_weather(
+    locations: Iterable[dict[str, Any]],
+    settings: Settings | None = None,
+    client: httpx.AsyncClient | None = None,
+    parallelism: int = 16,
+) -> list[dict[str, Any]]:
+    """
+    Текущая погода для всех локаций ({"name", "lat", "lon"}).
+
+    Успешные ответы сохраняются в MongoDB одним insert_many;
+    в результат каждой локации попадает _id сохранённого документа.
+    Если документы не сохранены, MongoWriteError прерывает запуск.
+    """
+    settings = settings or get_settings()
+    jobs = [{"city": city} for city in locations]
+
+    async with _client_scope(client, settings) as http_client:
+        aggregator = WeatherAggregator(build_weather_providers(http_client, settings))
+
+        async def fetch(job: dict[str, Any]) -> AggregatedWeatherResponse:
+            city = job["city"]
+            return await aggregator.get_aggregated_weather(
+                lat=city["lat"], lon=city["lon"]
+            )
+
+        # Пакетный сбор уступает квоты провайдеров интерактивным запросам
+        with batch_priority():
+            outcomes = await _run_jobs(jobs, fetch, parallelism)
+
+    documents = [
+        mongo_client.build_current_weather_document(
+            latitude=response.latitude,
+            longitude=response.longitude,
+            request_data={"lat": response.latitude, "lon": response.longitude},
+            response_data=response.model_dump(),
+            status_code=200,
+        )
+        for _, response in outcomes
+        if response is not None
+    ]
+    inserted_ids = mongo_client.insert_current_weather_many(documents)
+    return _attach_results(outcomes, inserted_ids)
+
+
+async def collect_forecasts(
+    locations: Iterable[dict[str, Any]],
+    forecast_hours: Iterable[int],
+    settings: Settings | None = None,
+    client: httpx.AsyncClient | None = None,
+    parallelism: int = 16,
+) -> list[dict[str, Any]]:
+    """
+    Прогнозы для всех пар локация/горизонт.
+
+    Успешные ответы сохраняются в MongoDB одним insert_many.
+    """
+    settings = settings or get_settings()
+    hours_list = list(forecast_hours)
+    jobs = [
+        {"city": city, "hours": hours} for city in locations for hours in hours_list
+    ]
+
+    async with _client_scope(client, settings) as http_client:
+        aggregator = ForecastAggregator(build_forecast_providers(http_client, settings))
+
+        async def fetch(job: dict[str, Any]) -> AggregatedForecastResponse:
+            city = job["city"]
+            return await aggregator.get_aggregated_forecast(
+                lat=city["lat"], lon=city["lon"], hours=job["hours"]
+            )
+
+        # Пакетный сбор уступает квоты провайдеров интерактивным запросам
+        with batch_priority():
+            outcomes = await _run_jobs(jobs, fetch, parallelism)
+
+    documents = [
+        mongo_client.build_forecast_document(
+            latitude=response.latitude,
+            longitude=response.longitude,
+            hours=response.hours,
+            request_data={
+                "lat": response.latitude,
+                "lon": response.longitude,
+                "hours": response.hours,
+            },
+            response_data=response.model_dump(),
+            status_code=200,
+        )
+        for _, response in outcomes
+        if response is not None
+    ]
+    inserted_ids = mongo_client.insert_forecasts_many(documents)
+    return _attach_results(outcomes, inserted_ids)
+
+
+async def collect_weather_and_forecasts(
+    locations: Iterable[dict[str, Any]],
+    hours: int,
+    settings: Settings | None = None,
+    client: httpx.AsyncClient | None = None,
+    parallelism: int = 16,
+) -> list[dict[str, Any]]:
+    """
+    Текущая погода и прогноз на hours часов для всех локаций.
+
+    Провайдеры, умеющие отдавать оба ответа сразу, опрашиваются одним
+    запросом на локацию. Сохраняются оба документа (погода и прогноз),
+    в результате - _id каждого.
+    """
+    settings = settings or get_settings()
+    jobs = [{"city": city, "hours": hours} for city in locations]
+
+    async with _client_scope(client, settings) as http_client:
+        aggregator = CombinedAggregator(build_combined_providers(http_client, settings))
+
+        async def fetch(
+            job: dict[str, Any],
+        ) -> AggregatedWeatherAndForecastResponse:
+            city = job["city"]
+            return await aggregator.get_aggregated_weather_and_forecast(
+                lat=city["lat"], lon=city["lon"], hours=job["hours"]
+            )
+
+        with batch_priority():
+            outcomes = await _run_jobs(jobs, fetch, parallelism)
+
+    responses = [response for _, response in outcomes if response is not None]
+    current_ids = mongo_client.insert_current_weather_many(
+        [
+            mongo_client.build_current_weather_document(
+                latitude=r.current.latitude,
+                longitude=r.current.longitude,
+                request_data={"lat": r.current.latitude, "lon": r.current.longitude},
+                response_data=r.current.model_dump(),
+                status_code=200,
+            )
+            for r in responses
+        ]
+    )
+    forecast_ids = mongo_client.insert_forecasts_many(
+        [
+            mongo_client.build_forecast_document(
+                latitude=r.forecast.latitude,
+                longitude=r.forecast.longitude,
+                hours=r.forecast.hours,
+                request_data={
+                    "lat": r.forecast.latitude,
+                    "lon": r.forecast.longitude,
+                    "hours": r.forecast.hours,
+                },
+                response_data=r.forecast.model_dump(),
+                status_code=200,
+            )
+            for r in responses
+        ]
+    )
+
+    results = _attach_results(outcomes, forecast_ids)
+    ids = iter(current_ids)
+    for result in results:
+        if result["status"] == "success":
+            result["forecast_document_id"] = result.pop("document_id")
+            current_id = next(ids, None)
+            result["current_document_id"] = str(current_id) if current_id else None
+    return results
+
+
+def _attach_results(
+    outcomes: Sequence[tuple[dict[str, Any], BaseModel | None]],
+    inserted_ids: list[Any],
+) -> list[dict[str, Any]]:
+    """
+    Результаты для манифеста: статус и _id документа в MongoDB.
+
+    Сами ответы не возвращаются - они уже сохранены и доступны по _id.
+    """
+    ids = iter(inserted_ids)
+    results = []
+    for result, response in outcomes:
+        if response is not None:
+            document_id = next(ids, None)
+            result["document_id"] = str(document_id) if document_id else None
+        results.append(result)
+    return results
+
+
+@asynccontextmanager
+async def _client_scope(
+    client: httpx.AsyncClient | None, settings: Settings
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Переданный httpx-клиент или временный, закрываемый по выходу."""
+    if client is not None:
+        yield client
+        return
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(settings.http_timeout)) as owned:
+        configure_client(owned, settings)
+        try:
+            yield owned
+        finally:
+            shared = shared_cache_for(owned)
+            if shared is not None:
+                await shared.close()
@@ -0,0 +1,152 @@
+"""
+Хеджирование запросов к провайдерам для срезания хвоста задержек.
+
+Для каждого провайдера хранится скользящее окно задержек его запросов.
+Если запрос не завершился за заданный перцентиль этого окна (например,
+p95), отправляется второй такой же запрос; побеждает первый ответ,
+проигравший отменяется. Число хеджей ограничено долей от числа обычных
+запросов, поэтому они не могут съесть больше этой доли квоты провайдера.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Any, Awaitable, Callable, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+_hedgers: weakref.WeakKeyDictionary[Any, RequestHedger] = weakref.WeakKeyDictionary()
+
+
+def attach_request_hedger(client: Any, hedger: RequestHedger) -> RequestHedger:
+    """Включить хеджирование для провайдеров, использующих этот клиент."""
+    _hedgers[client] = hedger
+    return hedger
+
+
+def request_hedger_for(client: Any) -> RequestHedger | None:
+    """Хеджер клиента или None, если хеджирование не включено."""
+    try:
+        return _hedgers.get(client)
+    except TypeError:
+        return None
+
+
+class LatencyHistory:
+    """Задержки последних запросов одного провайдера и счётчики хеджей."""
+
+    def __init__(self, window: int) -> None:
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[round(q * (len(ordered) - 1))]
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+
+class RequestHedger:
+    """Хеджирование по перцентилю задержек с ограничением доли хеджей."""
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        max_hedge_fraction: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        min_delay: float = 0.05,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._percentile = percentile
+        self._max_hedge_fraction = max_hedge_fraction
+        self._min_samples = min_samples
+        self._window = window
+        self._min_delay = min_delay
+        self._clock = clock
+        self._history: dict[str, LatencyHistory] = {}
+
+    def history(self, provider: str) -> LatencyHistory:
+        history = self._history.get(provider)
+        if history is None:
+            history = self._history[provider] = LatencyHistory(self._window)
+        return history
+
+    def hedge_delay(self, provider: str) -> float | None:
+        """
+        Через сколько секунд отправлять хедж (None - не хеджировать).
+
+        Пока задержек мало, порог ненадёжен, и хедж не отправляется;
+        так же и при исчерпанной доле хеджей.
+        """
+        history = self.history(provider)
+        if len(history) < self._min_samples:
+            return None
+        if history.hedges + 1 > self._max_hedge_fraction * history.requests:
+            return None
+        threshold = history.percentile(self._percentile)
+        return max(self._min_delay, threshold or 0.0)
+
+    async def run(self, provider: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполнить запрос call, при необходимости продублировав его.
+
+        Побеждает первый завершившийся без исключения вызов; если оба
+        завершились ошибкой, выбрасывается ошибка основного запроса.
+        """
+        history = self.history(provider)
+        history.requests += 1
+        delay = self.hedge_delay(provider)
+
+        started = self._clock()
+        tasks = [asyncio.ensure_future(call())]
+        try:
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            if delay is None or tasks[0].done():
+                result = await tasks[0]
+                history.record(self._clock() - started)
+                return result
+
+            history.hedges += 1
+            tasks.append(asyncio.ensure_future(call()))
+            logger.debug(f"{provider}: хедж-запрос после {delay * 1000:.0f} мс")
+            return await self._first_success(history, tasks[0], tasks[1], started)
+        finally:
+            # Проигравший (или брошенный при отмене) запрос не нужен
+            for task in tasks:
+                task.cancel()
+
+    async def _first_success(
+        self,
+        history: LatencyHistory,
+        primary: asyncio.Future[T],
+        hedge: asyncio.Future[T],
+        started: float,
+    ) -> T:
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    history.record(self._clock() - started)
+                    if task is hedge:
+                        history.hedge_wins += 1
+                    return task.result()
+        # Оба запроса упали: причина - в основном
+        return primary.result()
@@ -0,0 +1,277 @@
+"""
+HTTP-кэш ответов провайдеров по заголовкам Cache-Control/Expires/ETag.
+
+Кэш привязывается к общему httpx.AsyncClient (attach_http_cache) и хранит
+уже разобранный результат провайдера (WeatherSample, ProviderForecast),
+а не тело ответа. Пока запись свежая (max-age или Expires), запрос к API
+не выполняется вовсе; после истечения отправляется условный запрос
+(If-None-Match / If-Modified-Since), и на 304 возвращается сохранённый
+результат без загрузки и разбора тела.
+
+Запись, устаревшая не больше чем на окно stale-while-revalidate, отдаётся
+сразу, а обновляется одним фоновым запросом. Часто запрашиваемые записи
+обновляются в фоне ещё до истечения свежести, так что популярные точки
+не ждут API провайдеров вовсе.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Hashable, Mapping
+
+_caches: weakref.WeakKeyDictionary[Any, HTTPCache] = weakref.WeakKeyDictionary()
+
+
+def attach_http_cache(client: Any, cache: HTTPCache) -> HTTPCache:
+    """Включить кэш для всех провайдеров, использующих этот клиент."""
+    _caches[client] = cache
+    return cache
+
+
+def http_cache_for(client: Any) -> HTTPCache | None:
+    """Кэш клиента или None, если кэширование для него не включено."""
+    try:
+        return _caches.get(client)
+    except TypeError:
+        # Объект без поддержки weakref: кэша у него быть не может
+        return None
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+    # Сколько секунд после expires_at запись ещё можно отдавать
+    stale_for: float = 0.0
+    lifetime: float = 0.0
+    # Обращения с момента сохранения или перепроверки
+    accesses: int = 0
+
+    def validators(self) -> dict[str, str]:
+        """Заголовки условного запроса."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _cache_control(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str]) -> float | None:
+    """
+    Время свежести ответа в секундах.
+
+    None - ответ нельзя сохранять (no-store), 0 - можно, но только
+    для условной перепроверки.
+    """
+    directives = _cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    max_age = directives.get("max-age")
+    if max_age is not None:
+        try:
+            return max(0.0, float(max_age))
+        except ValueError:
+            return 0.0
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires)
+            date = headers.get("Date")
+            now = parsedate_to_datetime(date) if date else None
+            if now is None:
+                return max(0.0, expires_at.timestamp() - time.time())
+            return max(0.0, (expires_at - now).total_seconds())
+        except (TypeError, ValueError):
+            return 0.0
+
+    return 0.0
+
+
+def stale_while_revalidate(headers: Mapping[str, str]) -> float | None:
+    """
+    Окно stale-while-revalidate из Cache-Control (RFC 5861).
+
+    None - директивы нет, 0 - устаревший ответ отдавать нельзя
+    (must-revalidate, no-cache).
+    """
+    directives = _cache_control(headers.get("Cache-Control"))
+    if "must-revalidate" in directives or "no-cache" in directives:
+        return 0.0
+    value = directives.get("stale-while-revalidate")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return 0.0
+
+
+def _declares_freshness(headers: Mapping[str, str]) -> bool:
+    directives = _cache_control(headers.get("Cache-Control"))
+    return "max-age" in directives or "no-cache" in directives or "Expires" in headers
+
+
+class HTTPCache:
+    """
+    LRU-кэш разобранных ответов с HTTP-семантикой свежести.
+
+    default_ttl - время свежести ответов без Cache-Control/Expires;
+    stale_while_revalidate - сколько секунд после истечения запись
+    отдаётся сразу с фоновым обновлением (директива ответа может его
+    увеличить); refresh_ahead - доля времени свежести до истечения,
+    в которую обновляются записи, запрошенные не меньше hot_accesses раз.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+        default_ttl: float = 0.0,
+        stale_while_revalidate: float = 0.0,
+        refresh_ahead: float = 0.0,
+        hot_accesses: int = 3,
+    ) -> None:
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._max_entries = max_entries
+        self._clock = clock
+        self._default_ttl = default_ttl
+        self._stale_while_revalidate = stale_while_revalidate
+        self._refresh_ahead = refresh_ahead
+        self._hot_accesses = hot_accesses
+        self.hits = 0
+        self.stale_hits = 0
+        self.shared_hits = 0
+        self.refreshes = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.coalesced = 0
+        # Запросы к API, выполняющиеся сейчас, по ключу кэша
+        self.pending: dict[Hashable, asyncio.Future[Any]] = {}
+
+    @staticmethod
+    def key(
+        namespace: str,
+        url: str,
+        params: Mapping[str, Any],
+        variant: Hashable = None,
+    ) -> Hashable:
+        """Ключ: провайдер (способ разбора), URL, параметры и вариант разбора."""
+        items = tuple(sorted((k, str(v)) for k, v in params.items()))
+        return (namespace, url, items, variant)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self._clock() < entry.expires_at
+
+    def expires_in(self, seconds: float) -> float:
+        """Момент истечения по часам кэша через seconds секунд."""
+        return self._clock() + seconds
+
+    def can_serve_stale(self, entry: CacheEntry) -> bool:
+        """Устаревшую запись можно отдать, обновив её в фоне."""
+        return self._clock() < entry.expires_at + entry.stale_for
+
+    def should_refresh_ahead(self, entry: CacheEntry) -> bool:
+        """Свежая, но часто запрашиваемая запись скоро истечёт."""
+        if not self._refresh_ahead or entry.accesses < self._hot_accesses:
+            return False
+        remaining = entry.expires_at - self._clock()
+        return remaining <= entry.lifetime * self._refresh_ahead
+
+    def _lifetime(self, headers: Mapping[str, str]) -> float | None:
+        lifetime = freshness_lifetime(headers)
+        if lifetime == 0 and not _declares_freshness(headers):
+            return self._default_ttl
+        return lifetime
+
+    def _stale_for(self, headers: Mapping[str, str], lifetime: float) -> float:
+        window = stale_while_revalidate(headers)
+        if window is None:
+            # Ответ, который нельзя отдавать без проверки (max-age=0,
+            # только валидаторы), не становится отдаваемым по умолчанию
+            return self._stale_while_revalidate if lifetime > 0 else 0.0
+        return max(window, self._stale_while_revalidate) if window else 0.0
+
+    def store(self, key: Hashable, value: Any, headers: Mapping[str, str]) -> None:
+        """Сохранить результат, если заголовки ответа это разрешают."""
+        lifetime = self._lifetime(headers)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if lifetime is None or (lifetime == 0 and not etag and not last_modified):
+            self._entries.pop(key, None)
+            return
+
+        self.put(
+            key,
+            CacheEntry(
+                value=value,
+                expires_at=self._clock() + lifetime,
+                etag=etag,
+                last_modified=last_modified,
+                stale_for=self._stale_for(headers, lifetime),
+                lifetime=lifetime,
+            ),
+        )
+
+    def put(self, key: Hashable, entry: CacheEntry) -> Any:
+        """Сохранить готовую запись (например, из общего кэша воркеров)."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return entry.value
+
+    def time_left(self, entry: CacheEntry | None) -> float:
+        """Сколько секунд запись ещё свежая (отрицательное - уже устарела)."""
+        if entry is None:
+            return float("-inf")
+        return entry.expires_at - self._clock()
+
+    def revalidate(
+        self, key: Hashable, entry: CacheEntry, headers: Mapping[str, str]
+    ) -> Any:
+        """
+        Ответ 304: продлить запись по новым заголовкам, вернуть результат.
+
+        entry - запись, валидаторы которой ушли в условном запросе: пока
+        он выполнялся, её могли вытеснить из LRU, тогда она возвращается
+        в кэш.
+        """
+        lifetime = self._lifetime(headers) or 0.0
+        entry.expires_at = self._clock() + lifetime
+        entry.lifetime = lifetime
+        entry.stale_for = self._stale_for(headers, lifetime)
+        entry.accesses = 0
+        entry.etag = headers.get("ETag") or entry.etag
+        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        self.revalidated += 1
+        return self.put(key, entry)
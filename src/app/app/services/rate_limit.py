@@ -0,0 +1,251 @@
+"""
+Ограничение частоты запросов к провайдерам с учётом квот.
+
+У каждой квоты (ключ API провайдера, общий для текущей погоды и прогноза)
+есть token bucket на минуту и дневной бюджет. Интерактивные запросы API
+имеют приоритет над пакетным сбором: пакет не берёт токены, пока их ждут
+интерактивные запросы, и не тратит долю дневного бюджета, зарезервированную
+под интерактив. Если токена не дождаться за отведённое время, провайдер
+пропускается (ProviderThrottled) вместо заведомо неудачного вызова.
+
+Token bucket у каждого процесса свой. Расход дневного бюджета при заданном
+SHARED_CACHE_URL считается общим счётчиком в хранилище общего кэша, так что
+бюджет делят все воркеры (с точностью до запросов, выполняемых ими
+одновременно); без общего кэша или при его недоступности каждый процесс
+считает только свои запросы.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from enum import IntEnum
+from typing import Callable, Iterator
+
+from loguru import logger
+
+from app.core.config import Settings
+from app.services.shared_cache import SharedCache, shared_cache_from_url
+
+# Время жизни общего счётчика дневного бюджета: сутки с запасом
+BUDGET_COUNTER_TTL = 2 * 24 * 3600
+
+
+class Priority(IntEnum):
+    """Приоритет запроса: меньше - важнее."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+# Приоритет текущего запроса; пакетный сбор переключает его на BATCH
+request_priority: ContextVar[Priority] = ContextVar(
+    "request_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def batch_priority() -> Iterator[None]:
+    """Запросы к провайдерам внутри блока идут с пакетным приоритетом."""
+    token = request_priority.set(Priority.BATCH)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class ProviderThrottled(Exception):
+    """Квота провайдера исчерпана: запрос не выполняется."""
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в минуту, не больше capacity в запасе."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = rate_per_minute / 60.0
+        self._capacity = capacity or rate_per_minute
+        self._clock = clock
+        self._tokens = self._capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    def try_take(self) -> float:
+        """Взять токен; 0 - успешно, иначе секунды до появления токена."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+    def drain(self) -> None:
+        """Обнулить запас (например, после 429 от провайдера)."""
+        self._refill()
+        self._tokens = 0.0
+
+
+class ProviderRateLimiter:
+    """Лимитер одной квоты: token bucket, дневной бюджет и приоритеты."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int = 0,
+        daily_budget: int = 0,
+        batch_budget_share: float = 0.8,
+        interactive_max_wait: float = 1.0,
+        batch_max_wait: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        today: Callable[[], date] = lambda: datetime.now(timezone.utc).date(),
+        budget_store: SharedCache | None = None,
+    ) -> None:
+        self.name = name
+        self.daily_budget = daily_budget
+        self._budget_store = budget_store
+        self._bucket = (
+            TokenBucket(requests_per_minute, clock=clock)
+            if requests_per_minute > 0
+            else None
+        )
+        self._batch_budget = int(daily_budget * batch_budget_share)
+        self._max_wait = {
+            Priority.INTERACTIVE: interactive_max_wait,
+            Priority.BATCH: batch_max_wait,
+        }
+        self._clock = clock
+        self._today = today
+        self._day = today()
+        self._used_today = 0
+        self._blocked_until = 0.0
+        self._waiting: Counter[Priority] = Counter()
+
+    @property
+    def used_today(self) -> int:
+        self._roll_day()
+        return self._used_today
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used_today = 0
+
+    def _check_budget(self, priority: Priority) -> None:
+        if not self.daily_budget:
+            return
+        self._roll_day()
+        limit = (
+            self.daily_budget
+            if priority == Priority.INTERACTIVE
+            else self._batch_budget
+        )
+        if self._used_today >= limit:
+            raise ProviderThrottled(
+                f"{self.name}: дневной бюджет исчерпан "
+                f"({self._used_today}/{limit}, {priority.name.lower()})"
+            )
+
+    def _try_take(self, priority: Priority) -> float:
+        now = self._clock()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        # Токены сначала достаются запросам с более высоким приоритетом
+        if any(self._waiting[p] for p in Priority if p < priority):
+            return 0.05
+        if self._bucket is None:
+            return 0.0
+        return self._bucket.try_take()
+
+    async def acquire(self, priority: Priority | None = None) -> None:
+        """
+        Разрешение на один запрос.
+
+        Ждёт токен не дольше max_wait своего приоритета, иначе
+        выбрасывает ProviderThrottled.
+        """
+        priority = request_priority.get() if priority is None else priority
+        self._check_budget(priority)
+
+        deadline = self._clock() + self._max_wait[priority]
+        self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_take(priority)
+                if wait == 0:
+                    break
+                if self._clock() + wait > deadline:
+                    raise ProviderThrottled(
+                        f"{self.name}: нет свободных токенов "
+                        f"({priority.name.lower()}, ожидание {wait:.1f} с)"
+                    )
+                await asyncio.sleep(wait)
+                # Пока ждали, бюджет могли израсходовать другие запросы
+                self._check_budget(priority)
+        finally:
+            self._waiting[priority] -= 1
+
+        self._used_today += 1
+        if self.daily_budget and self._budget_store is not None:
+            total = await self._budget_store.count(
+                f"budget:{self.name}:{self._day.isoformat()}", BUDGET_COUNTER_TTL
+            )
+            # Расход всех воркеров; свой счётчик может быть больше, если
+            # хранилище было недоступно
+            if total is not None:
+                self._used_today = max(self._used_today, total)
+
+    def throttled_by_provider(self, retry_after: float | None = None) -> None:
+        """Провайдер ответил 429: не отправлять запросы retry_after секунд."""
+        pause = retry_after if retry_after is not None else 60.0
+        self._blocked_until = max(self._blocked_until, self._clock() + pause)
+        if self._bucket is not None:
+            self._bucket.drain()
+        logger.warning(f"{self.name}: 429 от провайдера, пауза {pause:.0f} с")
+
+
+# Лимитеры живут на уровне процесса: квота общая для всех запросов,
+# дневной бюджет - ещё и для всех воркеров через общий кэш
+_limiters: dict[str, ProviderRateLimiter] = {}
+
+
+def get_rate_limiter(quota: str, settings: Settings) -> ProviderRateLimiter | None:
+    """Общий лимитер квоты провайдера или None, если лимиты не заданы."""
+    limits = settings.provider_rate_limits().get(quota)
+    if limits is None:
+        return None
+    requests_per_minute, daily_budget = limits
+    if not requests_per_minute and not daily_budget:
+        return None
+
+    limiter = _limiters.get(quota)
+    if limiter is None:
+        limiter = ProviderRateLimiter(
+            quota,
+            requests_per_minute=requests_per_minute,
+            daily_budget=daily_budget,
+            batch_budget_share=settings.rate_limit_batch_budget_share,
+            interactive_max_wait=settings.rate_limit_interactive_max_wait,
+            batch_max_wait=settings.rate_limit_batch_max_wait,
+            budget_store=(
+                shared_cache_from_url(
+                    settings.shared_cache_url, settings.shared_cache_timeout
+                )
+                if settings.shared_cache_url and daily_budget
+                else None
+            ),
+        )
+        _limiters[quota] = limiter
+    return limiter
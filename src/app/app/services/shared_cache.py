@@ -0,0 +1,378 @@
+"""
+Общий для воркеров кэш результатов провайдеров.
+
+HTTPCache живёт в памяти процесса, и при запуске нескольких воркеров
+uvicorn/gunicorn каждый из них ходит в API провайдеров за одними и теми же
+точками. SharedCache - второй уровень под HTTPCache: перед запросом к API
+воркер ищет результат в общем хранилище, а полученный ответ кладёт туда
+для остальных. Ключи - те же ключи HTTPCache (провайдер, URL, параметры,
+вариант разбора), захешированные, чтобы ключи API не попадали в хранилище.
+
+Хранилища:
+- redis://[:password@]host[:port][/db] - сервер с протоколом Redis (RESP);
+- sqlite:///path/to/cache.db - файл на общем диске, для воркеров одной машины.
+
+Там же хранятся общие счётчики (count) - например, расход дневных
+бюджетов провайдеров всеми воркерами (app.services.rate_limit).
+
+Ошибки и таймауты общего кэша не ломают запросы: они считаются промахом.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Hashable, Protocol
+from urllib.parse import unquote, urlsplit
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+from app.models.weather import ProviderForecast, WeatherSample
+from app.services.http_cache import CacheEntry
+
+KEY_PREFIX = "weather-analytics:provider:v1:"
+COUNTER_PREFIX = "weather-analytics:counter:v1:"
+
+_shared: weakref.WeakKeyDictionary[Any, SharedCache] = weakref.WeakKeyDictionary()
+
+
+def attach_shared_cache(client: Any, cache: SharedCache) -> SharedCache:
+    """Включить общий кэш для всех провайдеров, использующих этот клиент."""
+    _shared[client] = cache
+    return cache
+
+
+def shared_cache_for(client: Any) -> SharedCache | None:
+    """Общий кэш клиента или None, если он не настроен."""
+    try:
+        return _shared.get(client)
+    except TypeError:
+        return None
+
+
+class SharedEntry(BaseModel):
+    """Запись общего кэша; expires_at - по часам реального времени."""
+
+    value: (
+        WeatherSample
+        | ProviderForecast
+        | tuple[WeatherSample | None, ProviderForecast | None]
+    )
+    expires_at: float
+    lifetime: float = 0.0
+    stale_for: float = 0.0
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class SharedCacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def incr(self, key: str, ttl: float) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+class SharedCache:
+    """Сериализация результатов провайдеров поверх общего хранилища."""
+
+    def __init__(
+        self,
+        backend: SharedCacheBackend,
+        timeout: float = 0.25,
+        clock: Any = time.time,
+    ) -> None:
+        self._backend = backend
+        self._timeout = timeout
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def key(key: Hashable) -> str:
+        """Ключ хранилища: одинаковый во всех воркерах для одного ключа HTTPCache."""
+        return KEY_PREFIX + hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def time_left(self, entry: SharedEntry) -> float:
+        return entry.expires_at - self._clock()
+
+    async def load(self, key: Hashable) -> SharedEntry | None:
+        try:
+            data = await asyncio.wait_for(
+                self._backend.get(self.key(key)), self._timeout
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Общий кэш недоступен: {e!r}")
+            return None
+        if data is None:
+            self.misses += 1
+            return None
+        try:
+            entry = SharedEntry.model_validate_json(data)
+        except ValidationError:
+            # Запись старого формата или чужая - как промах
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    async def save(self, key: Hashable, entry: CacheEntry, time_left: float) -> None:
+        """Сохранить запись HTTPCache, пока она свежа или может отдаваться."""
+        ttl = time_left + entry.stale_for
+        if ttl <= 0:
+            return
+        try:
+            data = SharedEntry(
+                value=entry.value,
+                expires_at=self._clock() + time_left,
+                lifetime=entry.lifetime,
+                stale_for=entry.stale_for,
+                etag=entry.etag,
+                last_modified=entry.last_modified,
+            ).model_dump_json()
+        except ValidationError:
+            # Результат не из моделей ответа: в общий кэш не попадает
+            return
+        try:
+            await asyncio.wait_for(
+                self._backend.set(self.key(key), data.encode(), ttl), self._timeout
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Общий кэш недоступен: {e!r}")
+
+    async def count(self, name: str, ttl: float) -> int | None:
+        """
+        Увеличить общий счётчик name на единицу, вернуть его значение.
+
+        Счётчик живёт ttl секунд с последнего увеличения; None - хранилище
+        недоступно.
+        """
+        try:
+            return await asyncio.wait_for(
+                self._backend.incr(COUNTER_PREFIX + name, ttl), self._timeout
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Общий кэш недоступен: {e!r}")
+            return None
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+
+class RedisError(Exception):
+    """Ответ сервера с ошибкой."""
+
+
+class RedisBackend:
+    """Минимальный клиент RESP: GET, SET с PX и INCR, пул соединений."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        max_connections: int = 10,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._db = db
+        self._password = password
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._command(b"GET", key.encode())
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ttl_ms = str(max(1, int(ttl * 1000))).encode()
+        await self._command(b"SET", key.encode(), value, b"PX", ttl_ms)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        ttl_ms = str(max(1, int(ttl * 1000))).encode()
+        value = await self._command(b"INCR", key.encode())
+        await self._command(b"PEXPIRE", key.encode(), ttl_ms)
+        return value
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def _open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        if self._password:
+            await self._roundtrip(reader, writer, b"AUTH", self._password.encode())
+        if self._db:
+            await self._roundtrip(reader, writer, b"SELECT", str(self._db).encode())
+        return reader, writer
+
+    async def _command(self, *args: bytes) -> Any:
+        async with self._slots:
+            reader, writer = self._idle.pop() if self._idle else await self._open()
+            try:
+                reply = await self._roundtrip(reader, writer, *args)
+            except BaseException:
+                # Состояние соединения неизвестно (таймаут посреди ответа)
+                writer.close()
+                raise
+            self._idle.append((reader, writer))
+            return reply
+
+    @staticmethod
+    async def _roundtrip(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *args: bytes
+    ) -> Any:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        writer.write(b"".join(parts))
+        await writer.drain()
+        return await _read_reply(reader)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Соединение закрыто сервером")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        raise RedisError(payload.decode(errors="replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise RedisError(f"Неизвестный ответ сервера: {line!r}")
+
+
+class SQLiteBackend:
+    """Общий файл SQLite для воркеров одной машины."""
+
+    # Раз в столько записей удаляются истёкшие
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=1.0, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT value FROM shared_cache WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                )
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO shared_cache (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute(
+                    "DELETE FROM shared_cache WHERE expires_at <= ?", (now,)
+                )
+
+    def _incr(self, key: str, ttl: float) -> int:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            # Чтение и запись под блокировкой файла: воркеры не теряют
+            # увеличения друг друга
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT value FROM shared_cache WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                value = (int(row[0]) if row else 0) + 1
+                connection.execute(
+                    "INSERT OR REPLACE INTO shared_cache (key, value, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, value, now + ttl),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        return await asyncio.to_thread(self._incr, key, ttl)
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def shared_cache_from_url(url: str, timeout: float = 0.25) -> SharedCache:
+    """Общий кэш по адресу хранилища (redis://... или sqlite:///...)."""
+    if url.startswith("sqlite:///"):
+        return SharedCache(SQLiteBackend(url[len("sqlite:///") :]), timeout)
+
+    parts = urlsplit(url)
+    if parts.scheme == "redis":
+        db = parts.path.strip("/")
+        backend = RedisBackend(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parts.password) if parts.password else None,
+        )
+        return SharedCache(backend, timeout)
+
+    raise ValueError(f"Неподдерживаемый адрес общего кэша: {url}")
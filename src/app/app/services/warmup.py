@@ -0,0 +1,115 @@
+"""
+Прогрев HTTP-кэша провайдеров при старте приложения.
+
+После деплоя кэш пуст, и первые пользователи ждут API провайдеров.
+Прогрев заранее запрашивает текущую погоду и прогнозы для самых
+популярных точек из истории запросов в MongoDB и для точек из настроек,
+с ограниченным параллелизмом и пакетным приоритетом квот. Результаты
+никуда не сохраняются: цель - заполнить кэш, а не историю.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Coroutine
+
+import httpx
+from loguru import logger
+
+from app.core.config import Settings
+from app.db.mongodb import mongo_client
+from app.services.aggregator import ForecastAggregator, WeatherAggregator
+from app.services.rate_limit import batch_priority
+from app.services.weather_providers.registry import (
+    build_forecast_providers,
+    build_weather_providers,
+)
+
+
+@dataclass
+class WarmupPlan:
+    """Что прогревать: точки текущей погоды и пары точка/горизонт прогноза."""
+
+    current: list[tuple[float, float]] = field(default_factory=list)
+    forecasts: list[tuple[float, float, int]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.current) + len(self.forecasts)
+
+
+def load_warmup_plan(settings: Settings) -> WarmupPlan:
+    """
+    План прогрева: точки из настроек и самые запрашиваемые из истории.
+
+    Синхронный: читает MongoDB, поэтому из event loop вызывается
+    в отдельном потоке.
+    """
+    plan = WarmupPlan()
+    for lat, lon in settings.cache_warmup_locations:
+        plan.current.append((lat, lon))
+        for hours in settings.cache_warmup_forecast_hours:
+            plan.forecasts.append((lat, lon, hours))
+
+    if settings.cache_warmup_top_locations > 0:
+        since = datetime.now() - timedelta(days=settings.cache_warmup_history_days)
+        limit = settings.cache_warmup_top_locations
+        for row in mongo_client.get_popular_current_locations(since, limit):
+            plan.current.append((row["lat"], row["lon"]))
+        for row in mongo_client.get_popular_forecast_locations(since, limit):
+            plan.forecasts.append((row["lat"], row["lon"], row["hours"]))
+
+    plan.current = list(dict.fromkeys(plan.current))
+    plan.forecasts = list(dict.fromkeys(plan.forecasts))
+    return plan
+
+
+async def warm_up_cache(
+    client: httpx.AsyncClient,
+    settings: Settings,
+    plan: WarmupPlan | None = None,
+) -> dict[str, Any]:
+    """Заполнить кэш клиента ответами провайдеров по плану прогрева."""
+    if plan is None:
+        plan = await asyncio.to_thread(load_warmup_plan, settings)
+    if not plan:
+        return {"requests": 0, "errors": 0, "elapsed_s": 0.0}
+
+    weather = WeatherAggregator(build_weather_providers(client, settings))
+    forecast = ForecastAggregator(build_forecast_providers(client, settings))
+    semaphore = asyncio.Semaphore(settings.cache_warmup_parallelism)
+    errors = 0
+
+    async def run(call: Awaitable[Any]) -> None:
+        nonlocal errors
+        async with semaphore:
+            try:
+                await call
+            except Exception as e:
+                errors += 1
+                logger.warning(f"Ошибка прогрева кэша: {e}")
+
+    started = time.perf_counter()
+    # Прогрев не должен отнимать квоты у пришедших пользователей
+    with batch_priority():
+        calls: list[Coroutine[Any, Any, Any]] = [
+            weather.get_aggregated_weather(lat, lon) for lat, lon in plan.current
+        ]
+        calls += [
+            forecast.get_aggregated_forecast(lat, lon, hours)
+            for lat, lon, hours in plan.forecasts
+        ]
+        await asyncio.gather(*(run(call) for call in calls))
+
+    summary = {
+        "requests": len(plan),
+        "errors": errors,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+    logger.info(
+        f"Кэш прогрет: {len(plan.current)} точек погоды, "
+        f"{len(plan.forecasts)} прогнозов за {summary['elapsed_s']} с"
+    )
+    return summary
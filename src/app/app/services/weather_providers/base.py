@@ -1,19 +1,254 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Hashable, TypeVar
 
 import httpx
+from loguru import logger
 
 from app.models.weather import ProviderForecast, WeatherSample
+from app.services.hedging import request_hedger_for
+from app.services.http_cache import CacheEntry, HTTPCache, http_cache_for
+from app.services.rate_limit import ProviderRateLimiter, batch_priority
+from app.services.shared_cache import shared_cache_for
+from app.services.weather_providers.batching import location_batcher_for
 
+T = TypeVar("T")
+
+
+def snap_to_grid(
+    lat: float, lon: float, resolution: float | None
+) -> tuple[float, float]:
+    """
+    Координаты ближайшего узла сетки с шагом resolution градусов.
+
+    Без шага координаты возвращаются как есть. Результат округляется
+    до 6 знаков, чтобы 52.5 не превращалось в 52.50000000000001
+    и одинаковые узлы давали одинаковые параметры запроса.
+    """
+    if not resolution:
+        return lat, lon
+    return (
+        round(round(lat / resolution) * resolution, 6),
+        round(round(lon / resolution) * resolution, 6),
+    )
+
+
+def provider_coordinates(
+    provider: object, lat: float, lon: float
+) -> tuple[float, float]:
+    """
+    Координаты запроса к провайдеру, привязанные к его сетке.
+
+    Соседние точки внутри одной ячейки сетки дают один и тот же запрос
+    и ключ HTTP-кэша; ответы агрегаторов сохраняют исходные координаты.
+    """
+    return snap_to_grid(lat, lon, getattr(provider, "grid_resolution", None))
 
-class BaseWeatherProvider(ABC):
-    """Базовый класс провайдера погодных данных (текущая погода)."""
+
+class _HTTPProvider:
+    """Общая часть провайдеров: HTTP-запросы с учётом квоты."""
 
     name: str
+    # Собственный шаг сетки данных провайдера в градусах (None - без привязки):
+    # точки внутри одной ячейки получают одинаковый ответ
+    grid_resolution: float | None = None
+    # API принимает списки координат (см. batching.LocationBatcher)
+    batch_locations = False
 
-    def __init__(self, client: httpx.AsyncClient) -> None:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
         self._client = client
+        self._limiter = limiter
+
+    async def _fetch(
+        self,
+        url: str,
+        params: dict[str, Any],
+        parse: Callable[[dict[str, Any]], T],
+        variant: Any = None,
+    ) -> T:
+        """
+        Разобранный ответ API с учётом HTTP-кэша клиента.
+
+        Свежий результат из кэша возвращается без запроса; устаревший
+        перепроверяется условным запросом, и на 304 тело не загружается
+        и не разбирается повторно. variant - аргументы разбора, которых
+        нет в params (например, обрезка прогноза до hours точек).
+        Одновременные одинаковые запросы объединяются в один вызов API.
+
+        Запись в окне stale-while-revalidate и часто запрашиваемая запись
+        накануне истечения отдаются сразу, а обновляются в фоне.
+        """
+        cache = http_cache_for(self._client)
+        if cache is None:
+            response = await self._get(url, params)
+            response.raise_for_status()
+            return parse(response.json())
+
+        key = cache.key(self.name, url, params, variant)
+        entry = cache.get(key)
+        if entry is not None:
+            entry.accesses += 1
+            if cache.is_fresh(entry):
+                cache.hits += 1
+                if cache.should_refresh_ahead(entry):
+                    self._refresh_in_background(cache, key, url, params, parse)
+                return entry.value
+            if cache.can_serve_stale(entry):
+                cache.stale_hits += 1
+                self._refresh_in_background(cache, key, url, params, parse)
+                return entry.value
+
+        # Одинаковые запросы, пришедшие одновременно, ждут один вызов API
+        pending = cache.pending.get(key)
+        if pending is not None:
+            cache.coalesced += 1
+            return await asyncio.shield(pending)
+
+        return await asyncio.shield(self._start_fetch(cache, key, url, params, parse))
+
+    def _start_fetch(
+        self,
+        cache: HTTPCache,
+        key: Hashable,
+        url: str,
+        params: dict[str, Any],
+        parse: Callable[[dict[str, Any]], T],
+    ) -> asyncio.Future[T]:
+        task = asyncio.ensure_future(
+            self._fetch_to_cache(cache, key, url, params, parse)
+        )
+        cache.pending[key] = task
+        task.add_done_callback(lambda _: cache.pending.pop(key, None))
+        return task
+
+    def _refresh_in_background(
+        self,
+        cache: HTTPCache,
+        key: Hashable,
+        url: str,
+        params: dict[str, Any],
+        parse: Callable[[dict[str, Any]], T],
+    ) -> None:
+        """Одно фоновое обновление записи; пользователь его не ждёт."""
+        if key in cache.pending:
+            return
+        # Фоновый запрос не должен отнимать квоту у пользовательских
+        with batch_priority():
+            task = self._start_fetch(cache, key, url, params, parse)
+        cache.refreshes += 1
+        task.add_done_callback(self._log_refresh_failure)
+
+    def _log_refresh_failure(self, task: asyncio.Future[Any]) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.warning(
+            f"{self.name}: фоновое обновление кэша не удалось: {task.exception()}"
+        )
+
+    async def _fetch_to_cache(
+        self,
+        cache: HTTPCache,
+        key: Hashable,
+        url: str,
+        params: dict[str, Any],
+        parse: Callable[[dict[str, Any]], T],
+    ) -> T:
+        entry = cache.get(key)
+        shared = shared_cache_for(self._client)
+        if shared is not None:
+            # Другой воркер мог уже получить более свежий ответ
+            loaded = await shared.load(key)
+            if loaded is not None:
+                time_left = shared.time_left(loaded)
+                if time_left > 0 and time_left > cache.time_left(entry):
+                    cache.shared_hits += 1
+                    return cache.put(
+                        key,
+                        CacheEntry(
+                            value=loaded.value,
+                            expires_at=cache.expires_in(time_left),
+                            etag=loaded.etag,
+                            last_modified=loaded.last_modified,
+                            stale_for=loaded.stale_for,
+                            lifetime=loaded.lifetime,
+                        ),
+                    )
+
+        response = await self._get(
+            url, params, headers=entry.validators() if entry else None
+        )
+        if response.status_code == 304 and entry is not None:
+            value = cache.revalidate(key, entry, response.headers)
+        else:
+            response.raise_for_status()
+            cache.misses += 1
+            value = parse(response.json())
+            cache.store(key, value, response.headers)
+
+        stored = cache.get(key)
+        if shared is not None and stored is not None:
+            await shared.save(key, stored, cache.time_left(stored))
+        return value
+
+    async def _get(
+        self,
+        url: str,
+        params: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        """
+        GET к API провайдера.
+
+        Сначала берётся разрешение у лимитера (может выбросить
+        ProviderThrottled), а 429 в ответе ставит квоту на паузу.
+        Провайдеры с batch_locations отправляют запрос через пакетировщик
+        клиента, если он включён; остальные запросы при включённом
+        хеджировании дублируются, если отвечают дольше обычного.
+        """
+        batcher = location_batcher_for(self._client) if self.batch_locations else None
+        if batcher is not None and not headers:
+            return await batcher.get(url, params, self._send)
+
+        hedger = request_hedger_for(self._client)
+        if hedger is not None:
+            return await hedger.run(self.name, lambda: self._send(url, params, headers))
+        return await self._send(url, params, headers)
+
+    async def _send(
+        self,
+        url: str,
+        params: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        if self._limiter is not None:
+            await self._limiter.acquire()
+
+        if headers:
+            response = await self._client.get(url, params=params, headers=headers)  # type: ignore[arg-type]
+        else:
+            response = await self._client.get(url, params=params)  # type: ignore[arg-type]
+
+        if response.status_code == 429 and self._limiter is not None:
+            self._limiter.throttled_by_provider(_retry_after(response))
+        return response
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class BaseWeatherProvider(_HTTPProvider, ABC):
+    """Базовый класс провайдера погодных данных (текущая погода)."""
 
     @abstractmethod
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
@@ -21,14 +256,9 @@ class BaseWeatherProvider(ABC):
         raise NotImplementedError
 
 
-class BaseForecastProvider(ABC):
+class BaseForecastProvider(_HTTPProvider, ABC):
     """Базовый класс провайдера прогноза погоды."""
 
-    name: str
-
-    def __init__(self, client: httpx.AsyncClient) -> None:
-        self._client = client
-
     @abstractmethod
     async def get_forecast(
         self,
@@ -38,3 +268,17 @@ class BaseForecastProvider(ABC):
     ) -> ProviderForecast:
         """Получить прогноз по координатам на указанное число часов."""
         raise NotImplementedError
+
+
+class BaseCombinedProvider(_HTTPProvider, ABC):
+    """Провайдер текущей погоды и прогноза одним запросом к API."""
+
+    @abstractmethod
+    async def get_weather_and_forecast(
+        self,
+        lat: float,
+        lon: float,
+        hours: int,
+    ) -> tuple[WeatherSample | None, ProviderForecast | None]:
+        """Получить текущую погоду и прогноз на hours часов (None - нет части)."""
+        raise NotImplementedError
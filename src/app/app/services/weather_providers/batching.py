@@ -0,0 +1,152 @@
+"""
+Объединение запросов к Open-Meteo по нескольким точкам в один вызов API.
+
+Open-Meteo принимает списки координат через запятую
+(latitude=52.5,48.9&longitude=13.4,2.4) и возвращает массив ответов
+в том же порядке. LocationBatcher копит одновременные запросы с одинаковыми
+параметрами (кроме координат) в течение короткого окна, отправляет их одним
+запросом и раздаёт каждому ожидающему его часть ответа в виде обычного
+httpx.Response, так что разбор и HTTP-кэш работают как для одиночного запроса.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+import httpx
+
+Send = Callable[[str, dict[str, Any]], Awaitable[httpx.Response]]
+
+# Заголовки ответа пакета, применимые к каждой его части
+_SHARED_HEADERS = ("cache-control", "expires", "date")
+
+_batchers: weakref.WeakKeyDictionary[Any, LocationBatcher] = weakref.WeakKeyDictionary()
+
+
+def attach_location_batcher(client: Any, batcher: LocationBatcher) -> LocationBatcher:
+    """Включить пакетирование для провайдеров, использующих этот клиент."""
+    _batchers[client] = batcher
+    return batcher
+
+
+def location_batcher_for(client: Any) -> LocationBatcher | None:
+    """Пакетировщик клиента или None, если пакетирование не включено."""
+    try:
+        return _batchers.get(client)
+    except TypeError:
+        return None
+
+
+@dataclass
+class _Batch:
+    url: str
+    params: dict[str, Any]
+    send: Send
+    waiters: list[tuple[dict[str, Any], asyncio.Future[httpx.Response]]] = field(
+        default_factory=list
+    )
+    timer: asyncio.TimerHandle | None = None
+
+
+class LocationBatcher:
+    """Пакетирование запросов к разным точкам в окне window секунд."""
+
+    def __init__(self, window: float = 0.02, max_locations: int = 50) -> None:
+        self._window = window
+        self._max_locations = max_locations
+        self._batches: dict[Hashable, _Batch] = {}
+        self._sending: set[asyncio.Task[None]] = set()
+        self.batches_sent = 0
+        self.locations_sent = 0
+
+    async def get(self, url: str, params: dict[str, Any], send: Send) -> httpx.Response:
+        """
+        Ответ API для одной точки, полученный в составе пакета.
+
+        send - функция одиночного GET провайдера (с лимитером квоты);
+        пакет из нескольких точек расходует один запрос квоты.
+        """
+        shared = {k: v for k, v in params.items() if k not in ("latitude", "longitude")}
+        key = (url, tuple(sorted((k, str(v)) for k, v in shared.items())))
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = _Batch(url, shared, send)
+            self._batches[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(
+                self._window, self._flush, key
+            )
+
+        future: asyncio.Future[httpx.Response] = (
+            asyncio.get_running_loop().create_future()
+        )
+        batch.waiters.append((params, future))
+        if len(batch.waiters) >= self._max_locations:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: _Batch) -> None:
+        waiters = batch.waiters
+        if len(waiters) == 1:
+            # Одиночный запрос уходит без изменений
+            params = waiters[0][0]
+        else:
+            params = dict(batch.params)
+            params["latitude"] = ",".join(str(p["latitude"]) for p, _ in waiters)
+            params["longitude"] = ",".join(str(p["longitude"]) for p, _ in waiters)
+        self.batches_sent += 1
+        self.locations_sent += len(waiters)
+
+        try:
+            response = await batch.send(batch.url, params)
+            parts = (
+                [response]
+                if len(waiters) == 1
+                else _split(batch.url, response, len(waiters))
+            )
+        except Exception as e:
+            for _, future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), part in zip(waiters, parts, strict=True):
+            if not future.done():
+                future.set_result(part)
+
+
+def _split(url: str, response: httpx.Response, count: int) -> list[httpx.Response]:
+    """Части ответа пакета; ошибка пакета достаётся каждому ожидающему."""
+    if response.status_code != 200:
+        return [response] * count
+
+    items = response.json()
+    if not isinstance(items, list) or len(items) != count:
+        raise ValueError(f"Open-Meteo вернул ответ не на {count} запрошенных точек")
+
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() in _SHARED_HEADERS
+    }
+    try:
+        request = response.request
+    except (AttributeError, RuntimeError):
+        request = httpx.Request("GET", url)
+    return [
+        httpx.Response(200, json=item, headers=headers, request=request)
+        for item in items
+    ]
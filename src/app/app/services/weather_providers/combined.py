@@ -0,0 +1,145 @@
+"""
+Провайдеры текущей погоды и прогноза одним запросом.
+
+Open-Meteo и WeatherAPI отдают текущие условия вместе с часовым прогнозом
+в одном ответе. Для остальных провайдеров (в том числе Weatherbit, у
+которого current и forecast/hourly - разные эндпоинты) SplitCombinedProvider
+выполняет два обычных запроса параллельно.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from math import ceil
+from typing import Any
+
+import httpx
+
+from app.models.weather import ProviderForecast, WeatherSample
+from app.services.rate_limit import ProviderRateLimiter
+from app.services.weather_providers import (
+    open_meteo,
+    open_meteo_forecast,
+    weatherapi,
+    weatherapi_forecast,
+)
+from app.services.weather_providers.base import (
+    BaseCombinedProvider,
+    BaseForecastProvider,
+    BaseWeatherProvider,
+    provider_coordinates,
+)
+
+
+class OpenMeteoCombinedProvider(BaseCombinedProvider):
+    """
+    https://api.open-meteo.com/v1/forecast?latitude=...&longitude=...&
+    current_weather=true&hourly=...&forecast_hours=...
+    """
+
+    name = "open_meteo_combined"
+    grid_resolution = 0.1
+    batch_locations = True
+    BASE_URL = "https://api.open-meteo.com/v1/forecast"
+
+    async def get_weather_and_forecast(
+        self,
+        lat: float,
+        lon: float,
+        hours: int,
+    ) -> tuple[WeatherSample, ProviderForecast]:
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current_weather": True,
+            "hourly": "temperature_2m,relativehumidity_2m,windspeed_10m",
+            "forecast_hours": hours,
+            "timezone": "auto",
+        }
+
+        def parse(data: dict[str, Any]) -> tuple[WeatherSample, ProviderForecast]:
+            return open_meteo.parse_weather(data), open_meteo_forecast.parse_forecast(
+                data
+            )
+
+        return await self._fetch(self.BASE_URL, params, parse)
+
+
+class WeatherAPICombinedProvider(BaseCombinedProvider):
+    """
+    https://api.weatherapi.com/v1/forecast.json?key={KEY}&q={lat},{lon}&days={days}
+
+    Ответ forecast.json содержит и блок current.
+    """
+
+    name = "weatherapi_combined"
+    grid_resolution = 0.01
+    BASE_URL = "https://api.weatherapi.com/v1/forecast.json"
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
+        self._api_key = api_key
+
+    async def get_weather_and_forecast(
+        self,
+        lat: float,
+        lon: float,
+        hours: int,
+    ) -> tuple[WeatherSample, ProviderForecast]:
+        params = {
+            "key": self._api_key,
+            "q": f"{lat},{lon}",
+            "days": max(1, ceil(hours / 24)),
+            "aqi": "no",
+            "alerts": "no",
+        }
+
+        def parse(data: dict[str, Any]) -> tuple[WeatherSample, ProviderForecast]:
+            return weatherapi.parse_weather(data), weatherapi_forecast.parse_forecast(
+                data, hours
+            )
+
+        # Запрос задаётся днями, а разбор обрезает до hours точек
+        return await self._fetch(self.BASE_URL, params, parse, variant=hours)
+
+
+class SplitCombinedProvider(BaseCombinedProvider):
+    """Комбинированный интерфейс поверх пары обычных провайдеров (два запроса)."""
+
+    def __init__(
+        self,
+        weather_provider: BaseWeatherProvider,
+        forecast_provider: BaseForecastProvider,
+    ) -> None:
+        self.name = weather_provider.name
+        self._weather_provider = weather_provider
+        self._forecast_provider = forecast_provider
+
+    async def get_weather_and_forecast(
+        self,
+        lat: float,
+        lon: float,
+        hours: int,
+    ) -> tuple[WeatherSample | None, ProviderForecast | None]:
+        # Сетки у провайдеров пары могут различаться
+        sample, forecast = await asyncio.gather(
+            self._weather_provider.get_weather(
+                *provider_coordinates(self._weather_provider, lat, lon)
+            ),
+            self._forecast_provider.get_forecast(
+                *provider_coordinates(self._forecast_provider, lat, lon), hours
+            ),
+            return_exceptions=True,
+        )
+        # Ошибка одного из запросов не лишает результата второго
+        if isinstance(sample, BaseException) and isinstance(forecast, BaseException):
+            raise sample
+        return (
+            None if isinstance(sample, BaseException) else sample,
+            None if isinstance(forecast, BaseException) else forecast,
+        )
@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import WeatherProvider, WeatherSample
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseWeatherProvider
 
 
@@ -15,10 +16,17 @@ class OpenMeteoProvider(BaseWeatherProvider):
     """
 
     name = "open_meteo"
+    # Модели Open-Meteo считаются на сетке порядка 0.1°
+    grid_resolution = 0.1
+    batch_locations = True
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
 
-    def __init__(self, client: httpx.AsyncClient) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
 
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
         params = {
@@ -27,25 +35,26 @@ class OpenMeteoProvider(BaseWeatherProvider):
             "current_weather": True,
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-
-        current = data.get("current_weather") or {}
-
-        return WeatherSample(
-            provider=WeatherProvider.OPEN_METEO,
-            temperature_c=float(current.get("temperature")) if current.get("temperature") is not None else None,  # type: ignore[arg-type]
-            wind_speed_kph=(
-                float(current.get("windspeed"))  # type: ignore[arg-type]
-                if current.get("windspeed") is not None
-                else None
-            ),
-            humidity=None,
-            condition=None,
-            observation_time=_parse_iso_datetime(current.get("time")),
-            raw=data,
-        )
+        return await self._fetch(self.BASE_URL, params, parse_weather)
+
+
+def parse_weather(data: dict[str, Any]) -> WeatherSample:
+    """WeatherSample из ответа Open-Meteo с current_weather=true."""
+    current = data.get("current_weather") or {}
+
+    return WeatherSample(
+        provider=WeatherProvider.OPEN_METEO,
+        temperature_c=float(current.get("temperature")) if current.get("temperature") is not None else None,  # type: ignore[arg-type]
+        wind_speed_kph=(
+            float(current.get("windspeed"))  # type: ignore[arg-type]
+            if current.get("windspeed") is not None
+            else None
+        ),
+        humidity=None,
+        condition=None,
+        observation_time=_parse_iso_datetime(current.get("time")),
+        raw=data,
+    )
 
 
 def _parse_iso_datetime(value: str | None) -> datetime | None:
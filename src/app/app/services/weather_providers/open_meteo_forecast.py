@@ -16,6 +16,9 @@ class OpenMeteoForecastProvider(BaseForecastProvider):
     """
 
     name = "open_meteo_forecast"
+    # Модели Open-Meteo считаются на сетке порядка 0.1°
+    grid_resolution = 0.1
+    batch_locations = True
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
 
     async def get_forecast(
@@ -32,38 +35,39 @@ class OpenMeteoForecastProvider(BaseForecastProvider):
             "timezone": "auto",
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-
-        hourly = data.get("hourly") or {}
-        times: list[str] = hourly.get("time") or []
-        temps: list[float] = hourly.get("temperature_2m") or []
-        hums: list[float] = hourly.get("relativehumidity_2m") or []
-        winds: list[float] = hourly.get("windspeed_10m") or []
-
-        points: list[ForecastPoint] = []
-        count = min(len(times), len(temps))
-        for idx in range(count):
-            t_raw = times[idx]
-            temp = temps[idx]
-            hum = hums[idx] if idx < len(hums) else None
-            wind = winds[idx] if idx < len(winds) else None
-
-            points.append(
-                ForecastPoint(
-                    time=_parse_iso(t_raw),
-                    temperature_c=float(temp),
-                    humidity=float(hum) if hum is not None else None,
-                    wind_speed_kph=float(wind) if wind is not None else None,
-                )
-            )
+        return await self._fetch(self.BASE_URL, params, parse_forecast)
+
+
+def parse_forecast(data: dict[str, Any]) -> ProviderForecast:
+    """ProviderForecast из ответа Open-Meteo с hourly-рядами."""
+    hourly = data.get("hourly") or {}
+    times: list[str] = hourly.get("time") or []
+    temps: list[float] = hourly.get("temperature_2m") or []
+    hums: list[float] = hourly.get("relativehumidity_2m") or []
+    winds: list[float] = hourly.get("windspeed_10m") or []
 
-        return ProviderForecast(
-            provider=WeatherProvider.OPEN_METEO,
-            points=points,
+    points: list[ForecastPoint] = []
+    count = min(len(times), len(temps))
+    for idx in range(count):
+        t_raw = times[idx]
+        temp = temps[idx]
+        hum = hums[idx] if idx < len(hums) else None
+        wind = winds[idx] if idx < len(winds) else None
+
+        points.append(
+            ForecastPoint(
+                time=_parse_iso(t_raw),
+                temperature_c=float(temp),
+                humidity=float(hum) if hum is not None else None,
+                wind_speed_kph=float(wind) if wind is not None else None,
+            )
         )
 
+    return ProviderForecast(
+        provider=WeatherProvider.OPEN_METEO,
+        points=points,
+    )
+
 
 def _parse_iso(value: str | None) -> datetime:
     if not value:
@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import WeatherProvider, WeatherSample
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseWeatherProvider
 
 
@@ -15,10 +16,16 @@ class OpenWeatherMapProvider(BaseWeatherProvider):
     """
 
     name = "openweathermap"
+    grid_resolution = 0.01
     BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
@@ -29,40 +36,39 @@ class OpenWeatherMapProvider(BaseWeatherProvider):
             "units": "metric",
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
+        return await self._fetch(self.BASE_URL, params, parse_weather)
 
-        main = data.get("main") or {}
-        wind = data.get("wind") or {}
 
-        temp_c = main.get("temp")
-        humidity = main.get("humidity")
-        wind_speed_ms = wind.get("speed")
-        wind_speed_kph = (
-            float(wind_speed_ms) * 3.6 if wind_speed_ms is not None else None
-        )
+def parse_weather(data: dict[str, Any]) -> WeatherSample:
+    """WeatherSample из ответа OpenWeatherMap /weather."""
+    main = data.get("main") or {}
+    wind = data.get("wind") or {}
 
-        weather_list = data.get("weather") or []
-        condition = (
-            weather_list[0].get("description")
-            if weather_list and isinstance(weather_list[0], dict)
-            else None
-        )
+    temp_c = main.get("temp")
+    humidity = main.get("humidity")
+    wind_speed_ms = wind.get("speed")
+    wind_speed_kph = float(wind_speed_ms) * 3.6 if wind_speed_ms is not None else None
 
-        dt_value = data.get("dt")
-        observation_time = (
-            datetime.fromtimestamp(dt_value, tz=timezone.utc)
-            if isinstance(dt_value, (int, float))
-            else None
-        )
+    weather_list = data.get("weather") or []
+    condition = (
+        weather_list[0].get("description")
+        if weather_list and isinstance(weather_list[0], dict)
+        else None
+    )
 
-        return WeatherSample(
-            provider=WeatherProvider.OPENWEATHER,
-            temperature_c=float(temp_c) if temp_c is not None else None,  # type: ignore[arg-type]
-            wind_speed_kph=wind_speed_kph,
-            humidity=float(humidity) if humidity is not None else None,  # type: ignore[arg-type]
-            condition=condition,
-            observation_time=observation_time,
-            raw=data,
-        )
+    dt_value = data.get("dt")
+    observation_time = (
+        datetime.fromtimestamp(dt_value, tz=timezone.utc)
+        if isinstance(dt_value, (int, float))
+        else None
+    )
+
+    return WeatherSample(
+        provider=WeatherProvider.OPENWEATHER,
+        temperature_c=float(temp_c) if temp_c is not None else None,  # type: ignore[arg-type]
+        wind_speed_kph=wind_speed_kph,
+        humidity=float(humidity) if humidity is not None else None,  # type: ignore[arg-type]
+        condition=condition,
+        observation_time=observation_time,
+        raw=data,
+    )
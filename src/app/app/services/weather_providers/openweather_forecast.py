@@ -7,6 +7,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import ForecastPoint, ProviderForecast, WeatherProvider
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseForecastProvider
 
 
@@ -19,10 +20,16 @@ class OpenWeatherMapForecastProvider(BaseForecastProvider):
     """
 
     name = "openweathermap_forecast"
+    grid_resolution = 0.01
     BASE_URL = "https://api.openweathermap.org/data/2.5/forecast"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_forecast(
@@ -41,38 +48,39 @@ class OpenWeatherMapForecastProvider(BaseForecastProvider):
             "cnt": max_points,
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-
-        list_items = data.get("list") or []
-
-        points: list[ForecastPoint] = []
-        for item in list_items:
-            main = item.get("main") or {}
-            wind = item.get("wind") or {}
-
-            temp = main.get("temp")
-            hum = main.get("humidity")
-            wind_ms = wind.get("speed")
-            wind_kph = float(wind_ms) * 3.6 if wind_ms is not None else None
-
-            dt_val = item.get("dt")
-            if isinstance(dt_val, (int, float)):
-                t = datetime.fromtimestamp(dt_val, tz=timezone.utc)
-            else:
-                t = datetime.now(timezone.utc)
-
-            points.append(
-                ForecastPoint(
-                    time=t,
-                    temperature_c=float(temp) if temp is not None else None,  # type: ignore[arg-type]
-                    humidity=float(hum) if hum is not None else None,  # type: ignore[arg-type]
-                    wind_speed_kph=wind_kph,
-                )
-            )
+        return await self._fetch(self.BASE_URL, params, parse_forecast)
+
+
+def parse_forecast(data: dict[str, Any]) -> ProviderForecast:
+    """ProviderForecast из ответа OpenWeatherMap /forecast."""
+    list_items = data.get("list") or []
+
+    points: list[ForecastPoint] = []
+    for item in list_items:
+        main = item.get("main") or {}
+        wind = item.get("wind") or {}
 
-        return ProviderForecast(
-            provider=WeatherProvider.OPENWEATHER,
-            points=points,
+        temp = main.get("temp")
+        hum = main.get("humidity")
+        wind_ms = wind.get("speed")
+        wind_kph = float(wind_ms) * 3.6 if wind_ms is not None else None
+
+        dt_val = item.get("dt")
+        if isinstance(dt_val, (int, float)):
+            t = datetime.fromtimestamp(dt_val, tz=timezone.utc)
+        else:
+            t = datetime.now(timezone.utc)
+
+        points.append(
+            ForecastPoint(
+                time=t,
+                temperature_c=float(temp) if temp is not None else None,  # type: ignore[arg-type]
+                humidity=float(hum) if hum is not None else None,  # type: ignore[arg-type]
+                wind_speed_kph=wind_kph,
+            )
         )
+
+    return ProviderForecast(
+        provider=WeatherProvider.OPENWEATHER,
+        points=points,
+    )
@@ -0,0 +1,213 @@
+"""Реестр провайдеров: какие провайдеры включены при текущих настройках."""
+
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+from app.services.hedging import RequestHedger, attach_request_hedger
+from app.services.http_cache import HTTPCache, attach_http_cache
+from app.services.rate_limit import get_rate_limiter
+from app.services.shared_cache import attach_shared_cache, shared_cache_from_url
+from app.services.weather_providers.base import (
+    BaseCombinedProvider,
+    BaseForecastProvider,
+    BaseWeatherProvider,
+)
+from app.services.weather_providers.batching import (
+    LocationBatcher,
+    attach_location_batcher,
+)
+from app.services.weather_providers.open_meteo import OpenMeteoProvider
+from app.services.weather_providers.open_meteo_forecast import (
+    OpenMeteoForecastProvider,
+)
+from app.services.weather_providers.upstream import upstream_override_hook
+
+_PACKAGE = "app.services.weather_providers"
+
+
+@dataclass(frozen=True)
+class ProviderPlugin:
+    """
+    Провайдер, включаемый ключом API.
+
+    Классы заданы строками "модуль:класс" и импортируются, только если
+    ключ задан: модули выключенных провайдеров не загружаются вовсе.
+    Без combined текущая погода и прогноз для /combined запрашиваются
+    парой обычных провайдеров.
+    """
+
+    quota: str
+    api_key_setting: str
+    weather: str
+    forecast: str
+    combined: str | None = None
+
+    def api_key(self, settings: Settings) -> str:
+        return getattr(settings, self.api_key_setting, "")
+
+
+# Open-Meteo не требует ключа и включён всегда; остальные - плагины.
+# Новый провайдер подключается добавлением записи в этот список.
+PROVIDER_PLUGINS: list[ProviderPlugin] = [
+    ProviderPlugin(
+        quota="openweathermap",
+        api_key_setting="openweather_api_key",
+        weather=f"{_PACKAGE}.openweather:OpenWeatherMapProvider",
+        forecast=f"{_PACKAGE}.openweather_forecast:OpenWeatherMapForecastProvider",
+    ),
+    ProviderPlugin(
+        quota="weatherapi",
+        api_key_setting="weatherapi_api_key",
+        weather=f"{_PACKAGE}.weatherapi:WeatherAPIProvider",
+        forecast=f"{_PACKAGE}.weatherapi_forecast:WeatherAPIForecastProvider",
+        combined=f"{_PACKAGE}.combined:WeatherAPICombinedProvider",
+    ),
+    ProviderPlugin(
+        quota="weatherbit",
+        api_key_setting="weatherbit_api_key",
+        weather=f"{_PACKAGE}.weatherbit:WeatherbitProvider",
+        forecast=f"{_PACKAGE}.weatherbit_forecast:WeatherbitForecastProvider",
+    ),
+    ProviderPlugin(
+        quota="weatherstack",
+        api_key_setting="weatherstack_api_key",
+        weather=f"{_PACKAGE}.weatherstack:WeatherstackProvider",
+        forecast=f"{_PACKAGE}.weatherstack_forecast:WeatherstackForecastProvider",
+    ),
+]
+
+
+def load_provider_class(path: str) -> type[Any]:
+    """Класс провайдера по строке "модуль:класс"."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def enabled_plugins(settings: Settings) -> list[tuple[ProviderPlugin, str]]:
+    """Плагины с заданным ключом API и сами ключи."""
+    return [
+        (plugin, plugin.api_key(settings))
+        for plugin in PROVIDER_PLUGINS
+        if plugin.api_key(settings)
+    ]
+
+
+def configure_client(client: httpx.AsyncClient, settings: Settings) -> None:
+    """
+    Включить для клиента HTTP-кэш и общий кэш воркеров, пакетирование
+    запросов к Open-Meteo, хеджирование медленных запросов и подмену
+    адресов API провайдеров.
+    """
+    if settings.http_cache_max_entries:
+        attach_http_cache(
+            client,
+            HTTPCache(
+                settings.http_cache_max_entries,
+                default_ttl=settings.http_cache_default_ttl,
+                stale_while_revalidate=settings.http_cache_stale_seconds,
+                refresh_ahead=settings.http_cache_refresh_ahead,
+                hot_accesses=settings.http_cache_hot_accesses,
+            ),
+        )
+        if settings.shared_cache_url:
+            attach_shared_cache(
+                client,
+                shared_cache_from_url(
+                    settings.shared_cache_url, settings.shared_cache_timeout
+                ),
+            )
+    if settings.open_meteo_batch_window_ms > 0:
+        attach_location_batcher(
+            client,
+            LocationBatcher(
+                window=settings.open_meteo_batch_window_ms / 1000,
+                max_locations=settings.open_meteo_batch_max_locations,
+            ),
+        )
+    if settings.request_hedging:
+        attach_request_hedger(
+            client,
+            RequestHedger(
+                percentile=settings.hedge_percentile,
+                max_hedge_fraction=settings.hedge_max_fraction,
+                min_samples=settings.hedge_min_samples,
+            ),
+        )
+    if settings.upstream_base_url:
+        client.event_hooks["request"].append(
+            upstream_override_hook(settings.upstream_base_url)
+        )
+
+
+def build_weather_providers(
+    client: httpx.AsyncClient, settings: Settings
+) -> list[BaseWeatherProvider]:
+    """Провайдеры текущей погоды; платные - только при наличии ключа."""
+    providers: list[BaseWeatherProvider] = [
+        OpenMeteoProvider(client, get_rate_limiter("open_meteo", settings))
+    ]
+
+    for plugin, api_key in enabled_plugins(settings):
+        provider_cls = load_provider_class(plugin.weather)
+        limiter = get_rate_limiter(plugin.quota, settings)
+        providers.append(provider_cls(client, api_key, limiter))
+
+    return providers
+
+
+def build_forecast_providers(
+    client: httpx.AsyncClient, settings: Settings
+) -> list[BaseForecastProvider]:
+    """Провайдеры прогноза; платные - только при наличии ключа."""
+    providers: list[BaseForecastProvider] = [
+        OpenMeteoForecastProvider(client, get_rate_limiter("open_meteo", settings))
+    ]
+
+    # Текущая погода и прогноз одного провайдера делят квоту его ключа
+    for plugin, api_key in enabled_plugins(settings):
+        provider_cls = load_provider_class(plugin.forecast)
+        limiter = get_rate_limiter(plugin.quota, settings)
+        providers.append(provider_cls(client, api_key, limiter))
+
+    return providers
+
+
+def build_combined_providers(
+    client: httpx.AsyncClient, settings: Settings
+) -> list[BaseCombinedProvider]:
+    """
+    Провайдеры текущей погоды и прогноза.
+
+    Open-Meteo и WeatherAPI отвечают одним запросом, остальные -
+    парой обычных провайдеров.
+    """
+    # Модуль тянет разбор ответов WeatherAPI: загружается только здесь
+    from app.services.weather_providers.combined import (
+        OpenMeteoCombinedProvider,
+        SplitCombinedProvider,
+    )
+
+    providers: list[BaseCombinedProvider] = [
+        OpenMeteoCombinedProvider(client, get_rate_limiter("open_meteo", settings))
+    ]
+
+    for plugin, api_key in enabled_plugins(settings):
+        limiter = get_rate_limiter(plugin.quota, settings)
+        if plugin.combined:
+            combined_cls = load_provider_class(plugin.combined)
+            providers.append(combined_cls(client, api_key, limiter))
+            continue
+        providers.append(
+            SplitCombinedProvider(
+                load_provider_class(plugin.weather)(client, api_key, limiter),
+                load_provider_class(plugin.forecast)(client, api_key, limiter),
+            )
+        )
+
+    return providers
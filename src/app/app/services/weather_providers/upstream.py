@@ -0,0 +1,48 @@
+"""
+Переопределение адресов API провайдеров.
+
+При заданном UPSTREAM_BASE_URL все запросы к провайдерам уходят на один
+сервер (например, upstream_stub для нагрузочного тестования): хост API
+заменяется префиксом пути, https://api.open-meteo.com/v1/forecast
+превращается в {base}/open-meteo/v1/forecast. Ключи HTTP-кэша и лимиты
+при этом не меняются - подмена выполняется на уровне httpx-клиента.
+"""
+
+from __future__ import annotations
+
+from typing import Awaitable, Callable
+
+import httpx
+
+# Хосты API провайдеров и их префиксы на подменяющем сервере
+UPSTREAM_PREFIXES = {
+    "api.open-meteo.com": "open-meteo",
+    "api.openweathermap.org": "openweathermap",
+    "api.weatherapi.com": "weatherapi",
+    "api.weatherbit.io": "weatherbit",
+    "api.weatherstack.com": "weatherstack",
+}
+
+
+def rewrite_upstream_url(url: httpx.URL, base_url: str) -> httpx.URL:
+    """Адрес на подменяющем сервере; чужие хосты не меняются."""
+    prefix = UPSTREAM_PREFIXES.get(url.host)
+    if prefix is None:
+        return url
+    base = httpx.URL(base_url)
+    path = f"{base.path.rstrip('/')}/{prefix}{url.path}"
+    return base.copy_with(path=path, query=url.query)
+
+
+def upstream_override_hook(
+    base_url: str,
+) -> Callable[[httpx.Request], Awaitable[None]]:
+    """Request-хук httpx, перенаправляющий запросы к провайдерам на base_url."""
+
+    async def rewrite(request: httpx.Request) -> None:
+        url = rewrite_upstream_url(request.url, base_url)
+        if url != request.url:
+            request.url = url
+            request.headers["Host"] = url.netloc.decode("ascii")
+
+    return rewrite
@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import WeatherProvider, WeatherSample
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseWeatherProvider
 
 
@@ -15,10 +16,16 @@ class WeatherAPIProvider(BaseWeatherProvider):
     """
 
     name = "weatherapi"
+    grid_resolution = 0.01
     BASE_URL = "https://api.weatherapi.com/v1/current.json"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
@@ -28,31 +35,32 @@ class WeatherAPIProvider(BaseWeatherProvider):
             "aqi": "no",
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
+        return await self._fetch(self.BASE_URL, params, parse_weather)
 
-        current = data.get("current") or {}
 
-        temp_c = current.get("temp_c")
-        humidity = current.get("humidity")
-        wind_kph = current.get("wind_kph")
+def parse_weather(data: dict[str, Any]) -> WeatherSample:
+    """WeatherSample из блока current ответа WeatherAPI."""
+    current = data.get("current") or {}
 
-        condition_obj = current.get("condition") or {}
-        condition = condition_obj.get("text")
+    temp_c = current.get("temp_c")
+    humidity = current.get("humidity")
+    wind_kph = current.get("wind_kph")
 
-        last_updated = current.get("last_updated")
-        observation_time = _parse_weatherapi_datetime(last_updated)
+    condition_obj = current.get("condition") or {}
+    condition = condition_obj.get("text")
 
-        return WeatherSample(
-            provider=WeatherProvider.WEATHERAPI,
-            temperature_c=float(temp_c) if temp_c is not None else None,  # type: ignore[arg-type]
-            wind_speed_kph=float(wind_kph) if wind_kph is not None else None,  # type: ignore[arg-type]
-            humidity=float(humidity) if humidity is not None else None,  # type: ignore[arg-type]
-            condition=condition,
-            observation_time=observation_time,
-            raw=data,
-        )
+    last_updated = current.get("last_updated")
+    observation_time = _parse_weatherapi_datetime(last_updated)
+
+    return WeatherSample(
+        provider=WeatherProvider.WEATHERAPI,
+        temperature_c=float(temp_c) if temp_c is not None else None,  # type: ignore[arg-type]
+        wind_speed_kph=float(wind_kph) if wind_kph is not None else None,  # type: ignore[arg-type]
+        humidity=float(humidity) if humidity is not None else None,  # type: ignore[arg-type]
+        condition=condition,
+        observation_time=observation_time,
+        raw=data,
+    )
 
 
 def _parse_weatherapi_datetime(value: str | None) -> datetime | None:
@@ -7,6 +7,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import ForecastPoint, ProviderForecast, WeatherProvider
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseForecastProvider
 
 
@@ -18,10 +19,16 @@ class WeatherAPIForecastProvider(BaseForecastProvider):
     """
 
     name = "weatherapi_forecast"
+    grid_resolution = 0.01
     BASE_URL = "https://api.weatherapi.com/v1/forecast.json"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_forecast(
@@ -40,43 +47,48 @@ class WeatherAPIForecastProvider(BaseForecastProvider):
             "alerts": "no",
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-
-        forecast = data.get("forecast") or {}
-        forecast_days = forecast.get("forecastday") or []
-
-        points: list[ForecastPoint] = []
-        for day in forecast_days:
-            hours_list = day.get("hour") or []
-            for h in hours_list:
-                t_raw = h.get("time")
-                temp_c = h.get("temp_c")
-                hum = h.get("humidity")
-                wind_kph = h.get("wind_kph")
-
-                if temp_c is None:
-                    continue
-
-                points.append(
-                    ForecastPoint(
-                        time=_parse_time(t_raw),
-                        temperature_c=float(temp_c),
-                        humidity=float(hum) if hum is not None else None,
-                        wind_speed_kph=(
-                            float(wind_kph) if wind_kph is not None else None
-                        ),
-                    )
+        # Запрос задаётся днями, а разбор обрезает до hours точек
+        return await self._fetch(
+            self.BASE_URL,
+            params,
+            lambda data: parse_forecast(data, hours),
+            variant=hours,
+        )
+
+
+def parse_forecast(data: dict[str, Any], hours: int) -> ProviderForecast:
+    """ProviderForecast из блока forecast ответа WeatherAPI (до hours точек)."""
+    forecast = data.get("forecast") or {}
+    forecast_days = forecast.get("forecastday") or []
+
+    points: list[ForecastPoint] = []
+    for day in forecast_days:
+        hours_list = day.get("hour") or []
+        for h in hours_list:
+            t_raw = h.get("time")
+            temp_c = h.get("temp_c")
+            hum = h.get("humidity")
+            wind_kph = h.get("wind_kph")
+
+            if temp_c is None:
+                continue
+
+            points.append(
+                ForecastPoint(
+                    time=_parse_time(t_raw),
+                    temperature_c=float(temp_c),
+                    humidity=float(hum) if hum is not None else None,
+                    wind_speed_kph=(float(wind_kph) if wind_kph is not None else None),
                 )
+            )
 
-        if len(points) > hours:
-            points = points[:hours]
+    if len(points) > hours:
+        points = points[:hours]
 
-        return ProviderForecast(
-            provider=WeatherProvider.WEATHERAPI,
-            points=points,
-        )
+    return ProviderForecast(
+        provider=WeatherProvider.WEATHERAPI,
+        points=points,
+    )
 
 
 def _parse_time(value: str | None) -> datetime:
@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import WeatherProvider, WeatherSample
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseWeatherProvider
 
 
@@ -15,10 +16,16 @@ class WeatherbitProvider(BaseWeatherProvider):
     """
 
     name = "weatherbit"
+    grid_resolution = 0.01
     BASE_URL = "https://api.weatherbit.io/v2.0/current"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
@@ -28,36 +35,37 @@ class WeatherbitProvider(BaseWeatherProvider):
             "key": self._api_key,
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
+        return await self._fetch(self.BASE_URL, params, parse_weather)
 
-        data_list = data.get("data") or []
-        if not data_list:
-            raise ValueError("Weatherbit: пустой список 'data' в ответе")
 
-        current = data_list[0]
+def parse_weather(data: dict[str, Any]) -> WeatherSample:
+    """WeatherSample из ответа Weatherbit /current."""
+    data_list = data.get("data") or []
+    if not data_list:
+        raise ValueError("Weatherbit: пустой список 'data' в ответе")
 
-        temp_c = current.get("temp")
-        humidity = current.get("rh")
-        wind_spd_ms = current.get("wind_spd")
-        weather_obj = current.get("weather") or {}
-        condition = weather_obj.get("description")
+    current = data_list[0]
 
-        wind_speed_kph = float(wind_spd_ms) * 3.6 if wind_spd_ms is not None else None
+    temp_c = current.get("temp")
+    humidity = current.get("rh")
+    wind_spd_ms = current.get("wind_spd")
+    weather_obj = current.get("weather") or {}
+    condition = weather_obj.get("description")
 
-        ob_time = current.get("ob_time")
-        observation_time = _parse_ob_time(ob_time)
+    wind_speed_kph = float(wind_spd_ms) * 3.6 if wind_spd_ms is not None else None
 
-        return WeatherSample(
-            provider=WeatherProvider.WEATHERBIT,
-            temperature_c=float(temp_c),
-            wind_speed_kph=wind_speed_kph,
-            humidity=float(humidity) if humidity is not None else None,
-            condition=condition,
-            observation_time=observation_time,
-            raw=data,
-        )
+    ob_time = current.get("ob_time")
+    observation_time = _parse_ob_time(ob_time)
+
+    return WeatherSample(
+        provider=WeatherProvider.WEATHERBIT,
+        temperature_c=float(temp_c),
+        wind_speed_kph=wind_speed_kph,
+        humidity=float(humidity) if humidity is not None else None,
+        condition=condition,
+        observation_time=observation_time,
+        raw=data,
+    )
 
 
 def _parse_ob_time(value: str | None) -> datetime | None:
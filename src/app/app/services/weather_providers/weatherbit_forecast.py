@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import ForecastPoint, ProviderForecast, WeatherProvider
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseForecastProvider
 
 
@@ -17,10 +18,16 @@ class WeatherbitForecastProvider(BaseForecastProvider):
     """
 
     name = "weatherbit_forecast"
+    grid_resolution = 0.01
     BASE_URL = "https://api.weatherbit.io/v2.0/forecast/hourly"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_forecast(
@@ -36,38 +43,39 @@ class WeatherbitForecastProvider(BaseForecastProvider):
             "hours": hours,
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
+        return await self._fetch(self.BASE_URL, params, parse_forecast)
 
-        data_list = data.get("data") or []
 
-        points: list[ForecastPoint] = []
-        for item in data_list:
-            temp = item.get("temp")
-            hum = item.get("rh")
-            wind_ms = item.get("wind_spd")
-            t_raw = item.get("timestamp_local") or item.get("timestamp_utc")
+def parse_forecast(data: dict[str, Any]) -> ProviderForecast:
+    """ProviderForecast из ответа Weatherbit /forecast/hourly."""
+    data_list = data.get("data") or []
 
-            if temp is None:
-                continue
+    points: list[ForecastPoint] = []
+    for item in data_list:
+        temp = item.get("temp")
+        hum = item.get("rh")
+        wind_ms = item.get("wind_spd")
+        t_raw = item.get("timestamp_local") or item.get("timestamp_utc")
 
-            wind_kph = float(wind_ms) * 3.6 if wind_ms is not None else None
+        if temp is None:
+            continue
 
-            points.append(
-                ForecastPoint(
-                    time=_parse_time(t_raw),
-                    temperature_c=float(temp),
-                    humidity=float(hum) if hum is not None else None,
-                    wind_speed_kph=wind_kph,
-                )
-            )
+        wind_kph = float(wind_ms) * 3.6 if wind_ms is not None else None
 
-        return ProviderForecast(
-            provider=WeatherProvider.WEATHERBIT,
-            points=points,
+        points.append(
+            ForecastPoint(
+                time=_parse_time(t_raw),
+                temperature_c=float(temp),
+                humidity=float(hum) if hum is not None else None,
+                wind_speed_kph=wind_kph,
+            )
         )
 
+    return ProviderForecast(
+        provider=WeatherProvider.WEATHERBIT,
+        points=points,
+    )
+
 
 def _parse_time(value: str | None) -> datetime:
     if not value:
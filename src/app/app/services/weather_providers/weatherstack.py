@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import WeatherProvider, WeatherSample
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseWeatherProvider
 
 
@@ -15,10 +16,16 @@ class WeatherstackProvider(BaseWeatherProvider):
     """
 
     name = "weatherstack"
+    grid_resolution = 0.01
     BASE_URL = "http://api.weatherstack.com/current"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
@@ -28,37 +35,38 @@ class WeatherstackProvider(BaseWeatherProvider):
             "units": "m",
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-
-        if "error" in data:
-            raise ValueError(f"Weatherstack error: {data['error']}")
-
-        current = data.get("current") or {}
-        location = data.get("location") or {}
-
-        temp_c = current.get("temperature")
-        humidity = current.get("humidity")
-        wind_speed_kph = current.get("wind_speed")
-
-        descriptions = current.get("weather_descriptions") or []
-        condition = descriptions[0] if descriptions else None
-
-        localtime = location.get("localtime")
-        observation_time = _parse_localtime(localtime)
-
-        return WeatherSample(
-            provider=WeatherProvider.WEATHERSTACK,
-            temperature_c=float(temp_c) if temp_c is not None else None,  # type: ignore[arg-type]
-            wind_speed_kph=(
-                float(wind_speed_kph) if wind_speed_kph is not None else None  # type: ignore[arg-type]
-            ),
-            humidity=float(humidity) if humidity is not None else None,  # type: ignore[arg-type]
-            condition=condition,
-            observation_time=observation_time,
-            raw=data,
-        )
+        return await self._fetch(self.BASE_URL, params, parse_weather)
+
+
+def parse_weather(data: dict[str, Any]) -> WeatherSample:
+    """WeatherSample из ответа Weatherstack /current."""
+    if "error" in data:
+        raise ValueError(f"Weatherstack error: {data['error']}")
+
+    current = data.get("current") or {}
+    location = data.get("location") or {}
+
+    temp_c = current.get("temperature")
+    humidity = current.get("humidity")
+    wind_speed_kph = current.get("wind_speed")
+
+    descriptions = current.get("weather_descriptions") or []
+    condition = descriptions[0] if descriptions else None
+
+    localtime = location.get("localtime")
+    observation_time = _parse_localtime(localtime)
+
+    return WeatherSample(
+        provider=WeatherProvider.WEATHERSTACK,
+        temperature_c=float(temp_c) if temp_c is not None else None,  # type: ignore[arg-type]
+        wind_speed_kph=(
+            float(wind_speed_kph) if wind_speed_kph is not None else None  # type: ignore[arg-type]
+        ),
+        humidity=float(humidity) if humidity is not None else None,  # type: ignore[arg-type]
+        condition=condition,
+        observation_time=observation_time,
+        raw=data,
+    )
 
 
 def _parse_localtime(value: str | None) -> datetime | None:
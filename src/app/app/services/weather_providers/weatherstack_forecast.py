@@ -8,6 +8,7 @@ from typing import Any
 import httpx
 
 from app.models.weather import ForecastPoint, ProviderForecast, WeatherProvider
+from app.services.rate_limit import ProviderRateLimiter
 from app.services.weather_providers.base import BaseForecastProvider
 
 
@@ -20,10 +21,16 @@ class WeatherstackForecastProvider(BaseForecastProvider):
     """
 
     name = "weatherstack_forecast"
+    grid_resolution = 0.01
     BASE_URL = "http://api.weatherstack.com/forecast"
 
-    def __init__(self, client: httpx.AsyncClient, api_key: str) -> None:
-        super().__init__(client)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        limiter: ProviderRateLimiter | None = None,
+    ) -> None:
+        super().__init__(client, limiter)
         self._api_key = api_key
 
     async def get_forecast(
@@ -42,47 +49,52 @@ class WeatherstackForecastProvider(BaseForecastProvider):
             "units": "m",
         }
 
-        response = await self._client.get(self.BASE_URL, params=params)  # type: ignore[arg-type]
-        response.raise_for_status()
-        data: dict[str, Any] = response.json()
-
-        if "error" in data:
-            raise ValueError(f"Weatherstack forecast error: {data['error']}")
-
-        forecast = data.get("forecast") or {}
-
-        points: list[ForecastPoint] = []
-        for date_str, day_data in forecast.items():
-            hourly_list = day_data.get("hourly") or []
-            for h in hourly_list:
-                temp = h.get("temperature")
-                hum = h.get("humidity")
-                wind_kph = h.get("wind_speed")
-
-                if temp is None:
-                    continue
-
-                t_value = h.get("time")
-                dt = _combine_date_and_time_string(date_str, t_value)
-
-                points.append(
-                    ForecastPoint(
-                        time=dt,
-                        temperature_c=float(temp),
-                        humidity=float(hum) if hum is not None else None,
-                        wind_speed_kph=(
-                            float(wind_kph) if wind_kph is not None else None
-                        ),
-                    )
+        # Запрос задаётся днями, а разбор обрезает до hours точек
+        return await self._fetch(
+            self.BASE_URL,
+            params,
+            lambda data: parse_forecast(data, hours),
+            variant=hours,
+        )
+
+
+def parse_forecast(data: dict[str, Any], hours: int) -> ProviderForecast:
+    """ProviderForecast из ответа Weatherstack /forecast (до hours точек)."""
+    if "error" in data:
+        raise ValueError(f"Weatherstack forecast error: {data['error']}")
+
+    forecast = data.get("forecast") or {}
+
+    points: list[ForecastPoint] = []
+    for date_str, day_data in forecast.items():
+        hourly_list = day_data.get("hourly") or []
+        for h in hourly_list:
+            temp = h.get("temperature")
+            hum = h.get("humidity")
+            wind_kph = h.get("wind_speed")
+
+            if temp is None:
+                continue
+
+            t_value = h.get("time")
+            dt = _combine_date_and_time_string(date_str, t_value)
+
+            points.append(
+                ForecastPoint(
+                    time=dt,
+                    temperature_c=float(temp),
+                    humidity=float(hum) if hum is not None else None,
+                    wind_speed_kph=(float(wind_kph) if wind_kph is not None else None),
                 )
+            )
 
-        if len(points) > hours:
-            points = points[:hours]
+    if len(points) > hours:
+        points = points[:hours]
 
-        return ProviderForecast(
-            provider=WeatherProvider.WEATHERSTACK,
-            points=points,
-        )
+    return ProviderForecast(
+        provider=WeatherProvider.WEATHERSTACK,
+        points=points,
+    )
 
 
 def _combine_date_and_time_string(date_str: str, time_str: str | None) -> datetime:
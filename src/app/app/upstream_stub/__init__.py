@@ -0,0 +1,11 @@
+"""
+Локальная замена API провайдеров для нагрузочного тестирования.
+
+Запуск: python -m app.upstream_stub --port 8081 --config stub.json,
+затем UPSTREAM_BASE_URL=http://localhost:8081 у приложения.
+"""
+
+from app.upstream_stub.config import Behavior, StubConfig, load_config
+from app.upstream_stub.server import create_stub_app
+
+__all__ = ["Behavior", "StubConfig", "create_stub_app", "load_config"]
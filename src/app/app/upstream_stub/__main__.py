@@ -0,0 +1,31 @@
+import argparse
+
+import uvicorn
+
+from app.upstream_stub import create_stub_app, load_config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замена API провайдеров погоды")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--config", help="JSON с поведением провайдеров")
+    parser.add_argument("--recordings", help="Каталог записанных ответов")
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Проксировать к настоящим API и записывать ответы",
+    )
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.recordings:
+        config.recordings_dir = args.recordings
+    if args.record:
+        config.record = True
+
+    uvicorn.run(create_stub_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Настройки подменяющего сервера: поведение каждого провайдера."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+
+class Behavior(BaseModel):
+    """Поведение одного API: задержка, ошибки и ответы 429."""
+
+    # Медиана задержки и разброс логнормального распределения (sigma)
+    latency_ms: float = 150.0
+    latency_sigma: float = 0.5
+    # Доли запросов, получающих 5xx и 429
+    error_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    rate_limit_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+    retry_after: int = 1
+    # Cache-Control: max-age успешных ответов (0 - без заголовка)
+    max_age: int = 0
+
+
+class StubConfig(BaseModel):
+    """
+    Конфигурация подменяющего сервера.
+
+    providers переопределяет default для отдельных API (ключи - префиксы
+    open-meteo, openweathermap, weatherapi, weatherbit, weatherstack).
+    В recordings_dir лежат записанные ответы; в режиме record запросы
+    проксируются к настоящим API, а ответы сохраняются туда же.
+    """
+
+    default: Behavior = Behavior()
+    providers: dict[str, Behavior] = {}
+    recordings_dir: str | None = None
+    record: bool = False
+    seed: int | None = None
+
+    def behavior(self, provider: str) -> Behavior:
+        return self.providers.get(provider, self.default)
+
+
+def load_config(path: str | Path | None = None) -> StubConfig:
+    """Конфигурация из JSON-файла (без файла - значения по умолчанию)."""
+    if path is None:
+        return StubConfig()
+    return StubConfig.model_validate(json.loads(Path(path).read_text()))
@@ -0,0 +1,259 @@
+"""
+Синтетические ответы API провайдеров.
+
+Формат повторяет поля, которые читают парсеры провайдеров. Значения
+детерминированы координатами, так что повторный запрос к той же точке
+получает тот же ответ, а соседние точки - правдоподобно близкие.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Mapping
+
+Params = Mapping[str, str]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _coordinates(value: str) -> tuple[float, float]:
+    lat, _, lon = value.partition(",")
+    return float(lat), float(lon or 0)
+
+
+def _rng(lat: float, lon: float) -> random.Random:
+    return random.Random(f"{lat:.2f},{lon:.2f}")
+
+
+def _series(lat: float, lon: float, count: int) -> list[dict[str, float]]:
+    """Почасовой ряд: суточный ход температуры вокруг климатической нормы."""
+    rng = _rng(lat, lon)
+    base = 25.0 - abs(lat) * 0.45
+    start = _now()
+    points = []
+    for hour in range(count):
+        local_hour = (start.hour + hour + lon / 15) % 24
+        daily = 4.0 * (1 - abs(local_hour - 15) / 12)
+        points.append(
+            {
+                "temperature": round(base + daily + rng.gauss(0, 0.8), 1),
+                "humidity": round(
+                    min(100.0, max(10.0, 65 - daily * 4 + rng.gauss(0, 5)))
+                ),
+                "wind_ms": round(abs(rng.gauss(4, 2)), 1),
+            }
+        )
+    return points
+
+
+def _hours(start: datetime, count: int, step: int = 1) -> list[datetime]:
+    return [start + timedelta(hours=i * step) for i in range(count)]
+
+
+def _is_true(value: str | None) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def open_meteo_forecast(params: Params) -> Any:
+    """/v1/forecast: одна точка или список точек через запятую."""
+    lats = [float(v) for v in params.get("latitude", "0").split(",")]
+    lons = [float(v) for v in params.get("longitude", "0").split(",")]
+    hours = int(params.get("forecast_hours", 168))
+
+    locations = []
+    for lat, lon in zip(lats, lons, strict=False):
+        series = _series(lat, lon, max(hours, 1))
+        location: dict[str, Any] = {"latitude": lat, "longitude": lon}
+        if _is_true(params.get("current_weather")):
+            location["current_weather"] = {
+                "temperature": series[0]["temperature"],
+                "windspeed": round(series[0]["wind_ms"] * 3.6, 1),
+                "time": _now().strftime("%Y-%m-%dT%H:%M"),
+            }
+        if params.get("hourly"):
+            times = _hours(_now(), hours)
+            location["hourly"] = {
+                "time": [t.strftime("%Y-%m-%dT%H:%M") for t in times],
+                "temperature_2m": [p["temperature"] for p in series[:hours]],
+                "relativehumidity_2m": [p["humidity"] for p in series[:hours]],
+                "windspeed_10m": [round(p["wind_ms"] * 3.6, 1) for p in series[:hours]],
+            }
+        locations.append(location)
+
+    return locations[0] if len(locations) == 1 else locations
+
+
+def openweathermap_weather(params: Params) -> Any:
+    lat, lon = float(params.get("lat", 0)), float(params.get("lon", 0))
+    point = _series(lat, lon, 1)[0]
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [{"description": "scattered clouds"}],
+        "main": {"temp": point["temperature"], "humidity": point["humidity"]},
+        "wind": {"speed": point["wind_ms"]},
+        "dt": int(_now().timestamp()),
+    }
+
+
+def openweathermap_forecast(params: Params) -> Any:
+    lat, lon = float(params.get("lat", 0)), float(params.get("lon", 0))
+    count = int(params.get("cnt", 40))
+    series = _series(lat, lon, count * 3)[::3]
+    return {
+        "cnt": count,
+        "list": [
+            {
+                "dt": int(t.timestamp()),
+                "main": {"temp": p["temperature"], "humidity": p["humidity"]},
+                "wind": {"speed": p["wind_ms"]},
+            }
+            for t, p in zip(_hours(_now(), count, step=3), series, strict=True)
+        ],
+    }
+
+
+def _weatherapi_current(lat: float, lon: float) -> dict[str, Any]:
+    point = _series(lat, lon, 1)[0]
+    return {
+        "last_updated": _now().strftime("%Y-%m-%d %H:%M"),
+        "temp_c": point["temperature"],
+        "humidity": point["humidity"],
+        "wind_kph": round(point["wind_ms"] * 3.6, 1),
+        "condition": {"text": "Partly cloudy"},
+    }
+
+
+def weatherapi_current(params: Params) -> Any:
+    lat, lon = _coordinates(params.get("q", "0,0"))
+    return {
+        "location": {"lat": lat, "lon": lon},
+        "current": _weatherapi_current(lat, lon),
+    }
+
+
+def weatherapi_forecast(params: Params) -> Any:
+    lat, lon = _coordinates(params.get("q", "0,0"))
+    days = int(params.get("days", 1))
+    start = _now().replace(hour=0)
+    series = _series(lat, lon, days * 24)
+    forecastday = []
+    for day in range(days):
+        hours = []
+        for hour in range(24):
+            point = series[day * 24 + hour]
+            hours.append(
+                {
+                    "time": (start + timedelta(days=day, hours=hour)).strftime(
+                        "%Y-%m-%d %H:%M"
+                    ),
+                    "temp_c": point["temperature"],
+                    "humidity": point["humidity"],
+                    "wind_kph": round(point["wind_ms"] * 3.6, 1),
+                }
+            )
+        forecastday.append(
+            {"date": (start + timedelta(days=day)).date().isoformat(), "hour": hours}
+        )
+    return {
+        "location": {"lat": lat, "lon": lon},
+        "current": _weatherapi_current(lat, lon),
+        "forecast": {"forecastday": forecastday},
+    }
+
+
+def weatherbit_current(params: Params) -> Any:
+    lat, lon = float(params.get("lat", 0)), float(params.get("lon", 0))
+    point = _series(lat, lon, 1)[0]
+    return {
+        "count": 1,
+        "data": [
+            {
+                "lat": lat,
+                "lon": lon,
+                "temp": point["temperature"],
+                "rh": point["humidity"],
+                "wind_spd": point["wind_ms"],
+                "weather": {"description": "Few clouds"},
+                "ob_time": _now().strftime("%Y-%m-%d %H:%M"),
+            }
+        ],
+    }
+
+
+def weatherbit_forecast(params: Params) -> Any:
+    lat, lon = float(params.get("lat", 0)), float(params.get("lon", 0))
+    hours = int(params.get("hours", 48))
+    return {
+        "lat": lat,
+        "lon": lon,
+        "data": [
+            {
+                "timestamp_local": t.strftime("%Y-%m-%dT%H:%M:%S"),
+                "temp": p["temperature"],
+                "rh": p["humidity"],
+                "wind_spd": p["wind_ms"],
+            }
+            for t, p in zip(
+                _hours(_now(), hours), _series(lat, lon, hours), strict=True
+            )
+        ],
+    }
+
+
+def weatherstack_current(params: Params) -> Any:
+    lat, lon = _coordinates(params.get("query", "0,0"))
+    point = _series(lat, lon, 1)[0]
+    return {
+        "location": {
+            "lat": str(lat),
+            "lon": str(lon),
+            "localtime": _now().strftime("%Y-%m-%d %H:%M"),
+        },
+        "current": {
+            "temperature": round(point["temperature"]),
+            "humidity": point["humidity"],
+            "wind_speed": round(point["wind_ms"] * 3.6),
+            "weather_descriptions": ["Partly cloudy"],
+        },
+    }
+
+
+def weatherstack_forecast(params: Params) -> Any:
+    lat, lon = _coordinates(params.get("query", "0,0"))
+    days = int(params.get("forecast_days", 1))
+    start = _now().replace(hour=0)
+    series = _series(lat, lon, days * 24)
+    forecast = {}
+    for day in range(days):
+        date = (start + timedelta(days=day)).date().isoformat()
+        # Шаг 3 часа, время в формате "0", "300", ..., "2100"
+        forecast[date] = {
+            "date": date,
+            "hourly": [
+                {
+                    "time": str(hour * 100),
+                    "temperature": round(series[day * 24 + hour]["temperature"]),
+                    "humidity": series[day * 24 + hour]["humidity"],
+                    "wind_speed": round(series[day * 24 + hour]["wind_ms"] * 3.6),
+                }
+                for hour in range(0, 24, 3)
+            ],
+        }
+    return {"location": {"lat": str(lat), "lon": str(lon)}, "forecast": forecast}
+
+
+# Эндпоинты подменяющего сервера: (префикс провайдера, путь) -> генератор
+SYNTHETIC: dict[tuple[str, str], Callable[[Params], Any]] = {
+    ("open-meteo", "v1/forecast"): open_meteo_forecast,
+    ("openweathermap", "data/2.5/weather"): openweathermap_weather,
+    ("openweathermap", "data/2.5/forecast"): openweathermap_forecast,
+    ("weatherapi", "v1/current.json"): weatherapi_current,
+    ("weatherapi", "v1/forecast.json"): weatherapi_forecast,
+    ("weatherbit", "v2.0/current"): weatherbit_current,
+    ("weatherbit", "v2.0/forecast/hourly"): weatherbit_forecast,
+    ("weatherstack", "current"): weatherstack_current,
+    ("weatherstack", "forecast"): weatherstack_forecast,
+}
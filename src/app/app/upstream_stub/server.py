@@ -0,0 +1,165 @@
+"""
+Сервер, подменяющий API провайдеров погоды.
+
+Эндпоинты повторяют пути настоящих API под префиксом провайдера
+(/open-meteo/v1/forecast, /weatherapi/v1/current.json и т.д.) - туда
+их направляет UPSTREAM_BASE_URL приложения. Ответ берётся из записи
+в recordings_dir, а если её нет - синтезируется. Перед ответом сервер
+выдерживает задержку из настроенного распределения и с заданными
+вероятностями отвечает 5xx или 429 с Retry-After.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+from app.services.weather_providers.upstream import UPSTREAM_PREFIXES
+from app.upstream_stub.config import Behavior, StubConfig
+from app.upstream_stub.payloads import SYNTHETIC
+
+# Префикс провайдера -> хост настоящего API (для режима записи)
+UPSTREAM_HOSTS = {prefix: host for host, prefix in UPSTREAM_PREFIXES.items()}
+
+
+class Recordings:
+    """Записанные ответы: по одному файлу на эндпоинт провайдера."""
+
+    def __init__(self, directory: str | Path | None) -> None:
+        self._directory = Path(directory) if directory else None
+        self._loaded: dict[tuple[str, str], Any] = {}
+
+    def _path(self, provider: str, path: str) -> Path | None:
+        if self._directory is None:
+            return None
+        return self._directory / provider / (path.replace("/", "__") + ".json")
+
+    def get(self, provider: str, path: str) -> Any | None:
+        key = (provider, path)
+        if key not in self._loaded:
+            file = self._path(provider, path)
+            self._loaded[key] = (
+                json.loads(file.read_text()) if file and file.exists() else None
+            )
+        return self._loaded[key]
+
+    def save(self, provider: str, path: str, payload: Any) -> None:
+        file = self._path(provider, path)
+        if file is None:
+            return
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+        self._loaded[(provider, path)] = payload
+
+
+def _replay(recorded: Any, params: dict[str, str]) -> Any:
+    # Запись одной точки Open-Meteo размножается на пакетный запрос
+    locations = len(params.get("latitude", "").split(","))
+    if locations > 1 and isinstance(recorded, dict):
+        return [recorded] * locations
+    return recorded
+
+
+def _latency(behavior: Behavior, rng: random.Random) -> float:
+    """Задержка в секундах из логнормального распределения с медианой latency_ms."""
+    if behavior.latency_ms <= 0:
+        return 0.0
+    return (
+        behavior.latency_ms * math.exp(behavior.latency_sigma * rng.gauss(0, 1)) / 1000
+    )
+
+
+def create_stub_app(config: StubConfig | None = None) -> FastAPI:
+    config = config or StubConfig()
+    rng = random.Random(config.seed)
+    recordings = Recordings(config.recordings_dir)
+    stats: Counter[str] = Counter()
+
+    app = FastAPI(title="Weather upstream stub")
+    app.state.config = config
+    app.state.stats = stats
+
+    @app.on_event("shutdown")
+    async def shutdown_event() -> None:
+        client: httpx.AsyncClient | None = getattr(app.state, "upstream", None)
+        if client is not None:
+            await client.aclose()
+
+    @app.get("/_stats")
+    async def get_stats() -> dict[str, int]:
+        """Число ответов по провайдерам и статусам."""
+        return dict(stats)
+
+    @app.get("/{provider}/{path:path}")
+    async def upstream(provider: str, path: str, request: Request) -> JSONResponse:
+        if (provider, path) not in SYNTHETIC:
+            return JSONResponse({"error": "unknown endpoint"}, status_code=404)
+
+        params = dict(request.query_params)
+        behavior = config.behavior(provider)
+        await asyncio.sleep(_latency(behavior, rng))
+
+        roll = rng.random()
+        if roll < behavior.rate_limit_rate:
+            stats[f"{provider}:429"] += 1
+            return JSONResponse(
+                {"error": "rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(behavior.retry_after)},
+            )
+        if roll < behavior.rate_limit_rate + behavior.error_rate:
+            stats[f"{provider}:503"] += 1
+            return JSONResponse({"error": "upstream unavailable"}, status_code=503)
+
+        if config.record:
+            payload = await _record(app, recordings, provider, path, params)
+        else:
+            recorded = recordings.get(provider, path)
+            payload = (
+                _replay(recorded, params)
+                if recorded is not None
+                else SYNTHETIC[(provider, path)](params)
+            )
+
+        stats[f"{provider}:200"] += 1
+        headers = (
+            {"Cache-Control": f"max-age={behavior.max_age}"}
+            if behavior.max_age
+            else None
+        )
+        return JSONResponse(payload, headers=headers)
+
+    return app
+
+
+async def _record(
+    app: FastAPI,
+    recordings: Recordings,
+    provider: str,
+    path: str,
+    params: dict[str, str],
+) -> Any:
+    """Ответ настоящего API, сохранённый как запись эндпоинта."""
+    client: httpx.AsyncClient | None = getattr(app.state, "upstream", None)
+    if client is None:
+        client = app.state.upstream = httpx.AsyncClient(timeout=30)
+
+    scheme = "http" if provider == "weatherstack" else "https"
+    response = await client.get(
+        f"{scheme}://{UPSTREAM_HOSTS[provider]}/{path}", params=params
+    )
+    response.raise_for_status()
+    payload = response.json()
+    recordings.save(provider, path, payload)
+    logger.info(f"Записан ответ {provider}/{path}")
+    return payload
@@ -0,0 +1 @@
+"""Микробенчмарки разбора ответов, агрегаторов и сериализации моделей."""
@@ -0,0 +1,68 @@
+"""
+Запуск: python -m benchmarks [--filter parse] [--update-baseline]
+
+Код возврата 1, если хотя бы один кейс медленнее базовой линии
+больше чем на --tolerance.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks.cases import build_cases
+from benchmarks.runner import (
+    BASELINE_FILE,
+    compare,
+    environment,
+    format_report,
+    load_baseline,
+    measure,
+    save_baseline,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Микробенчмарки weather API")
+    parser.add_argument("--filter", default="", help="Подстрока имени кейса")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Сохранить результаты как новую базовую линию",
+    )
+    args = parser.parse_args()
+
+    measurements = [
+        measure(name, case, ops, repeat=args.repeat, min_time=args.min_time)
+        for name, (case, ops) in build_cases().items()
+        if args.filter in name
+    ]
+
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get("environment") != environment():
+        print(
+            "Внимание: базовая линия снята в другом окружении "
+            f"({baseline.get('environment')}), сравнение приблизительное",
+            file=sys.stderr,
+        )
+
+    report = compare(measurements, baseline, args.tolerance)
+    print(format_report(report))
+
+    if args.update_baseline:
+        save_baseline(measurements, args.baseline)
+        print(f"Базовая линия сохранена в {args.baseline}")
+        return 0
+
+    regressions = [m.name for m, _, regressed in report if regressed]
+    if regressions:
+        print(f"Регрессии: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
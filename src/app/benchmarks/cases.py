@@ -0,0 +1,263 @@
+"""
+Кейсы микробенчмарков горячего пути.
+
+Входные данные воспроизводимы: ответы провайдеров генерируются
+синтетическими payload'ами upstream_stub для фиксированных координат,
+модели строятся из фиксированных значений. Каждый кейс - функция без
+аргументов, выполняющая одну операцию; подготовка вынесена в фабрики.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from app.models.weather import (
+    AggregatedForecastResponse,
+    ForecastPoint,
+    ProviderForecast,
+    WeatherProvider,
+    WeatherSample,
+)
+from app.services.aggregator import ForecastAggregator, WeatherAggregator
+from app.services.weather_providers.open_meteo import OpenMeteoProvider
+from app.services.weather_providers.open_meteo_forecast import (
+    OpenMeteoForecastProvider,
+)
+from app.services.weather_providers.openweather import OpenWeatherMapProvider
+from app.services.weather_providers.openweather_forecast import (
+    OpenWeatherMapForecastProvider,
+)
+from app.services.weather_providers.weatherapi import WeatherAPIProvider
+from app.services.weather_providers.weatherapi_forecast import (
+    WeatherAPIForecastProvider,
+)
+from app.services.weather_providers.weatherbit import WeatherbitProvider
+from app.services.weather_providers.weatherbit_forecast import (
+    WeatherbitForecastProvider,
+)
+from app.services.weather_providers.weatherstack import WeatherstackProvider
+from app.services.weather_providers.weatherstack_forecast import (
+    WeatherstackForecastProvider,
+)
+from app.upstream_stub.payloads import SYNTHETIC
+
+LAT, LON = 52.52, 13.405
+FORECAST_HOURS = 168
+
+# Сколько операций выполняется за один вызов кейса с event loop:
+# иначе замер состоит в основном из запуска asyncio.run
+ASYNC_BATCH = 100
+
+Case = Callable[[], Any]
+
+
+class CannedResponse:
+    """Готовый ответ API: без сети, только разбор."""
+
+    status_code = 200
+    headers: dict[str, str] = {}
+
+    def __init__(self, payload: Any) -> None:
+        self._payload = payload
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+class CannedClient:
+    """httpx-подобный клиент, всегда отдающий один и тот же ответ."""
+
+    def __init__(self, payload: Any) -> None:
+        self._response = CannedResponse(payload)
+
+    async def get(self, url: str, params: Any = None, **kwargs: Any) -> Any:
+        return self._response
+
+
+def _payload(provider: str, path: str, **params: Any) -> Any:
+    return SYNTHETIC[(provider, path)]({k: str(v) for k, v in params.items()})
+
+
+# Провайдер, его ответ и способ вызова для кейсов разбора
+PARSER_CASES: dict[str, tuple[Any, Any, Callable[[Any], Any]]] = {
+    "open_meteo.current": (
+        OpenMeteoProvider,
+        _payload(
+            "open-meteo",
+            "v1/forecast",
+            latitude=LAT,
+            longitude=LON,
+            current_weather="true",
+        ),
+        lambda p: p.get_weather(LAT, LON),
+    ),
+    "open_meteo.forecast": (
+        OpenMeteoForecastProvider,
+        _payload(
+            "open-meteo",
+            "v1/forecast",
+            latitude=LAT,
+            longitude=LON,
+            hourly="temperature_2m",
+            forecast_hours=FORECAST_HOURS,
+        ),
+        lambda p: p.get_forecast(LAT, LON, FORECAST_HOURS),
+    ),
+    "openweathermap.current": (
+        OpenWeatherMapProvider,
+        _payload("openweathermap", "data/2.5/weather", lat=LAT, lon=LON),
+        lambda p: p.get_weather(LAT, LON),
+    ),
+    "openweathermap.forecast": (
+        OpenWeatherMapForecastProvider,
+        _payload("openweathermap", "data/2.5/forecast", lat=LAT, lon=LON, cnt=40),
+        lambda p: p.get_forecast(LAT, LON, FORECAST_HOURS),
+    ),
+    "weatherapi.current": (
+        WeatherAPIProvider,
+        _payload("weatherapi", "v1/current.json", q=f"{LAT},{LON}"),
+        lambda p: p.get_weather(LAT, LON),
+    ),
+    "weatherapi.forecast": (
+        WeatherAPIForecastProvider,
+        _payload("weatherapi", "v1/forecast.json", q=f"{LAT},{LON}", days=7),
+        lambda p: p.get_forecast(LAT, LON, FORECAST_HOURS),
+    ),
+    "weatherbit.current": (
+        WeatherbitProvider,
+        _payload("weatherbit", "v2.0/current", lat=LAT, lon=LON),
+        lambda p: p.get_weather(LAT, LON),
+    ),
+    "weatherbit.forecast": (
+        WeatherbitForecastProvider,
+        _payload(
+            "weatherbit", "v2.0/forecast/hourly", lat=LAT, lon=LON, hours=FORECAST_HOURS
+        ),
+        lambda p: p.get_forecast(LAT, LON, FORECAST_HOURS),
+    ),
+    "weatherstack.current": (
+        WeatherstackProvider,
+        _payload("weatherstack", "current", query=f"{LAT},{LON}"),
+        lambda p: p.get_weather(LAT, LON),
+    ),
+    "weatherstack.forecast": (
+        WeatherstackForecastProvider,
+        _payload("weatherstack", "forecast", query=f"{LAT},{LON}", forecast_days=7),
+        lambda p: p.get_forecast(LAT, LON, FORECAST_HOURS),
+    ),
+}
+
+
+def _async_batch(make_call: Callable[[], Any]) -> Case:
+    """Кейс из ASYNC_BATCH последовательных вызовов в одном event loop."""
+
+    async def batch() -> None:
+        for _ in range(ASYNC_BATCH):
+            await make_call()
+
+    return lambda: asyncio.run(batch())
+
+
+def parser_case(name: str) -> Case:
+    provider_cls, payload, call = PARSER_CASES[name]
+    client = CannedClient(payload)
+    if provider_cls in (OpenMeteoProvider, OpenMeteoForecastProvider):
+        provider = provider_cls(client)
+    else:
+        provider = provider_cls(client, "bench-key")
+    return _async_batch(lambda: call(provider))
+
+
+def _sample(index: int) -> WeatherSample:
+    return WeatherSample(
+        provider=list(WeatherProvider)[index % len(WeatherProvider)],
+        temperature_c=10.0 + index,
+        wind_speed_kph=5.0,
+        humidity=50.0 + index,
+        condition="Cloudy",
+        observation_time=datetime(2025, 12, 1, 10),
+        raw=None,
+    )
+
+
+def _forecast(index: int, hours: int = FORECAST_HOURS) -> ProviderForecast:
+    start = datetime(2025, 12, 1)
+    return ProviderForecast(
+        provider=list(WeatherProvider)[index % len(WeatherProvider)],
+        points=[
+            ForecastPoint(
+                time=start + timedelta(hours=h),
+                temperature_c=10.0 + (h % 24) * 0.3,
+                wind_speed_kph=12.0,
+                humidity=60.0,
+            )
+            for h in range(hours)
+        ],
+    )
+
+
+class _ReadyWeatherProvider:
+    def __init__(self, sample: WeatherSample) -> None:
+        self._sample = sample
+
+    async def get_weather(self, lat: float, lon: float) -> WeatherSample:
+        return self._sample
+
+
+class _ReadyForecastProvider:
+    def __init__(self, forecast: ProviderForecast) -> None:
+        self._forecast = forecast
+
+    async def get_forecast(
+        self, lat: float, lon: float, hours: int
+    ) -> ProviderForecast:
+        return self._forecast
+
+
+def weather_aggregator_case(providers: int) -> Case:
+    aggregator = WeatherAggregator(
+        [_ReadyWeatherProvider(_sample(i)) for i in range(providers)]
+    )
+    return _async_batch(lambda: aggregator.get_aggregated_weather(LAT, LON))
+
+
+def forecast_aggregator_case(providers: int) -> Case:
+    aggregator = ForecastAggregator(
+        [_ReadyForecastProvider(_forecast(i)) for i in range(providers)]
+    )
+    return _async_batch(
+        lambda: aggregator.get_aggregated_forecast(LAT, LON, FORECAST_HOURS)
+    )
+
+
+def forecast_serialization_case(providers: int = 5) -> Case:
+    response = AggregatedForecastResponse(
+        latitude=LAT,
+        longitude=LON,
+        hours=FORECAST_HOURS,
+        forecasts=[_forecast(i) for i in range(providers)],
+    )
+    return response.model_dump_json
+
+
+def build_cases() -> dict[str, tuple[Case, int]]:
+    """Кейсы: имя -> (функция, число операций за один её вызов)."""
+    cases: dict[str, tuple[Case, int]] = {}
+    for name in PARSER_CASES:
+        cases[f"parse.{name}"] = (parser_case(name), ASYNC_BATCH)
+    for providers in (1, 5, 20):
+        cases[f"aggregate.weather.{providers}"] = (
+            weather_aggregator_case(providers),
+            ASYNC_BATCH,
+        )
+        cases[f"aggregate.forecast.{providers}"] = (
+            forecast_aggregator_case(providers),
+            ASYNC_BATCH,
+        )
+    cases[f"serialize.forecast.{FORECAST_HOURS}h"] = (forecast_serialization_case(), 1)
+    return cases
@@ -0,0 +1,129 @@
+"""Замер кейсов, сохранение базовой линии и поиск регрессий."""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+
+@dataclass
+class Measurement:
+    name: str
+    # Время одной операции, секунды: лучший и медианный повтор
+    best: float
+    median: float
+    loops: int
+
+
+def measure(
+    name: str,
+    case: Callable[[], object],
+    ops_per_call: int,
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> Measurement:
+    """
+    Время одной операции кейса.
+
+    Число вызовов в повторе подбирается так, чтобы повтор длился не меньше
+    min_time; GC на время замера отключается, как в timeit.
+    """
+    case()  # прогрев: импорты, кэши pydantic
+
+    loops = 1
+    while True:
+        elapsed = _timed(case, loops)
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    timings = [elapsed] + [_timed(case, loops) for _ in range(repeat - 1)]
+    per_op = [t / (loops * ops_per_call) for t in timings]
+    return Measurement(name, min(per_op), statistics.median(per_op), loops)
+
+
+def _timed(case: Callable[[], object], loops: int) -> float:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            case()
+        return time.perf_counter() - started
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def environment() -> dict[str, str]:
+    """Где снята базовая линия: сравнение с другой машиной условно."""
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(
+    measurements: list[Measurement], path: Path = BASELINE_FILE, merge: bool = True
+) -> None:
+    """Лучшие времена как новая базовая линия (остальные кейсы сохраняются)."""
+    results = load_baseline(path).get("results", {}) if merge else {}
+    results.update({m.name: m.best for m in measurements})
+    payload = {"environment": environment(), "results": dict(sorted(results.items()))}
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def compare(
+    measurements: list[Measurement], baseline: dict, tolerance: float
+) -> list[tuple[Measurement, float | None, bool]]:
+    """
+    Сравнение с базовой линией.
+
+    Returns:
+        (замер, отношение к базовой линии или None, регрессия ли это).
+        Регрессия - лучший повтор медленнее базовой линии больше чем
+        на tolerance.
+    """
+    results = baseline.get("results", {})
+    report = []
+    for m in measurements:
+        reference = results.get(m.name)
+        ratio = m.best / reference if reference else None
+        report.append((m, ratio, ratio is not None and ratio > 1 + tolerance))
+    return report
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def format_report(report: list[tuple[Measurement, float | None, bool]]) -> str:
+    width = max((len(m.name) for m, _, _ in report), default=10)
+    lines = [f"{'case':<{width}}  {'best':>10}  {'median':>10}  {'vs base':>8}"]
+    for m, ratio, regressed in report:
+        versus = f"{ratio:.2f}x" if ratio is not None else "new"
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(
+            f"{m.name:<{width}}  {_format_time(m.best):>10}  "
+            f"{_format_time(m.median):>10}  {versus:>8}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,135 @@
+"""
+Время импорта и старта приложения.
+
+Запуск: python -m benchmarks.startup [--repeat 5] [--top 15]
+
+Каждый замер - в отдельном процессе, то есть холодный импорт, как у нового
+воркера uvicorn или прогона тестов. Старт - create_app и обработчики
+startup (подключение к MongoDB идёт в фоне, прогрев кэша ждётся не дольше
+CACHE_WARMUP_WAIT_SECONDS). Самые дорогие модули берутся из
+python -X importtime.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+_PROBE = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+
+startup = None
+if {run_startup}:
+    application = app.main.create_app()
+
+    async def lifecycle():
+        started = time.perf_counter()
+        async with application.router.lifespan_context(application):
+            return time.perf_counter() - started
+
+    startup = asyncio.run(lifecycle())
+
+modules = sorted(m for m in sys.modules if m == "app" or m.startswith("app."))
+print(json.dumps({{"import_s": imported, "startup_s": startup, "modules": modules}}))
+"""
+
+
+@dataclass
+class StartupReport:
+    import_s: list[float] = field(default_factory=list)
+    startup_s: list[float] = field(default_factory=list)
+    # Модули приложения, загруженные импортом app.main
+    modules: list[str] = field(default_factory=list)
+    # (модуль, кумулятивное время импорта в секундах)
+    slowest_imports: list[tuple[str, float]] = field(default_factory=list)
+
+
+def _probe(run_startup: bool, importtime: bool = False) -> tuple[dict, str]:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE.format(run_startup=run_startup)]
+    completed = subprocess.run(
+        command, cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def parse_importtime(stderr: str, top: int = 15) -> list[tuple[str, float]]:
+    """Самые дорогие импорты из вывода -X importtime по кумулятивному времени."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        imports.append((name.strip(), int(cumulative) / 1_000_000))
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return imports[:top]
+
+
+def profile_startup(
+    repeat: int = 5, run_startup: bool = True, top: int = 15
+) -> StartupReport:
+    report = StartupReport()
+    for _ in range(repeat):
+        result, _ = _probe(run_startup)
+        report.import_s.append(result["import_s"])
+        if result["startup_s"] is not None:
+            report.startup_s.append(result["startup_s"])
+        report.modules = result["modules"]
+    if top:
+        _, stderr = _probe(run_startup=False, importtime=True)
+        report.slowest_imports = parse_importtime(stderr, top)
+    return report
+
+
+def format_startup_report(report: StartupReport) -> str:
+    def stats(values: list[float]) -> str:
+        if not values:
+            return "-"
+        return (
+            f"медиана {statistics.median(values) * 1000:.0f} мс, "
+            f"лучший {min(values) * 1000:.0f} мс"
+        )
+
+    lines = [
+        f"Импорт app.main: {stats(report.import_s)}",
+        f"Старт приложения: {stats(report.startup_s)}",
+        f"Модулей приложения загружено: {len(report.modules)}",
+    ]
+    if report.slowest_imports:
+        lines.append("Самые дорогие импорты (кумулятивно):")
+        lines += [
+            f"  {seconds * 1000:8.1f} мс  {name}"
+            for name, seconds in report.slowest_imports
+        ]
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Время импорта и старта приложения")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--import-only", action="store_true", help="Без обработчиков startup"
+    )
+    args = parser.parse_args()
+
+    report = profile_startup(args.repeat, not args.import_only, args.top)
+    print(format_startup_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,7 +28,7 @@ try:
     print("Successfully connected to MongoDB")
 
     # Получение базы данных и коллекций
-    db = client["weather_analytics_db"]
+    db = client[os.getenv("MONGO_DATABASE", "weather_analytics_db")]
     weather_collection = db["weather_current"]
     forecast_collection = db["weather_forecast"]
 
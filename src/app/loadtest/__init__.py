@@ -0,0 +1 @@
+"""Нагрузочный тест API: профили трафика, перцентили задержек и лаг event loop."""
@@ -0,0 +1,201 @@
+"""
+Запуск: python -m loadtest --mix interactive --concurrency 10,50 --duration 30
+
+По умолчанию приложение (create_app) поднимается в этом же процессе,
+провайдеров заменяет upstream_stub, MongoDB - та, что указана в MONGO_*
+(локальная из docker compose), но база - отдельная (--mongo-database):
+синтетические запросы не должны попасть в рабочую базу, а из неё -
+в хранилище через коннектор. С --url нагрузка идёт на уже запущенный
+сервер, что позволяет сравнивать режимы запуска (число воркеров uvicorn,
+настройки кэша и т.д.).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+from app.core.config import get_settings
+from app.db.mongodb import PRODUCTION_DATABASE
+from app.main import create_app
+from app.services.weather_providers.registry import configure_client
+from app.upstream_stub import create_stub_app, load_config
+
+from loadtest.harness import run_load
+from loadtest.mixes import MIXES, RequestFactory, load_locations
+
+STUB_BASE_URL = "http://upstream-stub"
+LOADTEST_DATABASE = "weather_loadtest_db"
+
+
+def use_loadtest_database(name: str) -> None:
+    """
+    Направить записи приложения в этом процессе в базу name.
+
+    Рабочая база (по умолчанию приложения) не принимается. Вызывается до
+    первого подключения: клиент MongoDB подключается лениво.
+    """
+    if name == PRODUCTION_DATABASE:
+        raise ValueError(
+            f"Нагрузочный тест не запускается на рабочей базе {PRODUCTION_DATABASE}"
+        )
+    os.environ["MONGO_DATABASE"] = name
+
+
+@asynccontextmanager
+async def in_process_client(
+    stub_config: str | None, keep_quotas: bool = False
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Клиент к приложению в этом процессе с подменёнными API провайдеров.
+
+    Квоты бесплатных тарифов по умолчанию снимаются: иначе пропускная
+    способность упирается в лимитер, а не в приложение.
+    """
+    base = get_settings()
+    quotas = {}
+    if not keep_quotas:
+        quotas = {
+            name: 0
+            for name in type(base).model_fields
+            if name.endswith(("_requests_per_minute", "_daily_budget"))
+        }
+    settings = base.model_copy(
+        update={
+            **quotas,
+            "upstream_base_url": STUB_BASE_URL,
+            # Платные провайдеры включаются по наличию ключа
+            "openweather_api_key": base.openweather_api_key or "loadtest",
+            "weatherapi_api_key": base.weatherapi_api_key or "loadtest",
+            "weatherbit_api_key": base.weatherbit_api_key or "loadtest",
+            "weatherstack_api_key": base.weatherstack_api_key or "loadtest",
+        }
+    )
+    app = create_app()
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    upstream = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_stub_app(load_config(stub_config))),
+        timeout=httpx.Timeout(settings.http_timeout),
+    )
+    configure_client(upstream, settings)
+    app.state.http_client = upstream
+
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://weather-app",
+            timeout=60,
+        ) as client:
+            yield client
+    finally:
+        await upstream.aclose()
+
+
+def _external_client(url: str, concurrency: int) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    return httpx.AsyncClient(base_url=url, timeout=60, limits=limits)
+
+
+async def _run(args: argparse.Namespace) -> list[dict]:
+    locations = load_locations()
+    reports = []
+    for concurrency in args.concurrency:
+        factory = RequestFactory(
+            MIXES[args.mix], locations, jitter=args.jitter, seed=args.seed
+        )
+        if args.url:
+            client_scope = _external_client(args.url, concurrency)
+        else:
+            client_scope = in_process_client(args.stub_config, args.keep_quotas)
+        async with client_scope as client:
+            result = await run_load(
+                client,
+                factory,
+                concurrency=concurrency,
+                duration=args.duration,
+                requests=args.requests,
+            )
+        report = {
+            "mode": args.url or "in-process",
+            "mix": args.mix,
+            "concurrency": concurrency,
+            **result.summary(),
+        }
+        reports.append(report)
+        _print_report(report)
+    return reports
+
+
+def _print_report(report: dict) -> None:
+    latency = report["latency_ms"]
+    lag = report["loop_lag_ms"]
+    print(
+        f"[{report['mode']}] mix={report['mix']} concurrency={report['concurrency']}: "
+        f"{report['requests']} запросов за {report['elapsed_s']} с, "
+        f"{report['throughput_rps']} rps, ошибок {report['errors']}"
+    )
+    print(
+        f"  задержка, мс: p50={latency['p50']} p95={latency['p95']} "
+        f"p99={latency['p99']} max={latency['max']}"
+    )
+    print(f"  лаг event loop, мс: p50={lag['p50']} p99={lag['p99']} max={lag['max']}")
+    for kind, stats in report["by_kind"].items():
+        print(
+            f"  {kind:<10} {stats['requests']:>6}  p50={stats['p50']} "
+            f"p95={stats['p95']} p99={stats['p99']}"
+        )
+
+
+def _concurrency(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест weather API")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="interactive")
+    parser.add_argument(
+        "--concurrency",
+        type=_concurrency,
+        default=[10],
+        help="Число одновременных клиентов; через запятую - серия прогонов",
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--requests", type=int, help="Остановиться после N запросов")
+    parser.add_argument("--url", help="Адрес запущенного приложения")
+    parser.add_argument("--stub-config", help="JSON поведения upstream_stub")
+    parser.add_argument(
+        "--mongo-database",
+        default=LOADTEST_DATABASE,
+        help="База MongoDB для записей приложения (in-process)",
+    )
+    parser.add_argument(
+        "--keep-quotas",
+        action="store_true",
+        help="Оставить лимиты провайдеров из настроек (in-process)",
+    )
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Сохранить отчёты в JSON-файл")
+    args = parser.parse_args()
+    if not args.url:
+        try:
+            use_loadtest_database(args.mongo_database)
+        except ValueError as e:
+            parser.error(str(e))
+
+    reports = asyncio.run(_run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
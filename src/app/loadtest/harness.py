@@ -0,0 +1,135 @@
+"""
+Прогон нагрузки и сбор метрик.
+
+concurrency воркеров в одном event loop непрерывно выполняют запросы
+профиля, пока не истечёт duration или не будет выполнено requests
+запросов. Параллельно монитор измеряет задержку event loop: насколько
+позже запланированного просыпается короткий sleep. В режиме in-process
+это задержка самого приложения (синхронные вызовы, тяжёлая сериализация),
+при нагрузке на внешний --url - только генератора нагрузки.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from loadtest.mixes import RequestFactory
+
+DOCUMENT_ID_HEADER = "X-Document-Id"
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Перцентиль по ближайшему рангу."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[round(q * (len(ordered) - 1))]
+
+
+@dataclass
+class LoadResult:
+    elapsed: float = 0.0
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Counter[str] = field(default_factory=Counter)
+    loop_lag: list[float] = field(default_factory=list)
+
+    def record(self, kind: str, status: str, latency: float) -> None:
+        self.latencies[kind].append(latency)
+        self.statuses[status] += 1
+
+    def summary(self) -> dict[str, Any]:
+        """Пропускная способность, перцентили задержек (мс) и ошибки."""
+        everything = [v for values in self.latencies.values() for v in values]
+        total = len(everything)
+        errors = sum(n for status, n in self.statuses.items() if status != "200")
+        return {
+            "requests": total,
+            "errors": errors,
+            "elapsed_s": round(self.elapsed, 2),
+            "throughput_rps": round(total / self.elapsed, 1) if self.elapsed else None,
+            "latency_ms": _latency_stats(everything),
+            "by_kind": {
+                kind: {"requests": len(values), **_latency_stats(values)}
+                for kind, values in sorted(self.latencies.items())
+            },
+            "statuses": dict(self.statuses),
+            "loop_lag_ms": _latency_stats(self.loop_lag),
+        }
+
+
+def _latency_stats(values: list[float]) -> dict[str, float | None]:
+    def ms(value: float | None) -> float | None:
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "p50": ms(percentile(values, 0.5)),
+        "p95": ms(percentile(values, 0.95)),
+        "p99": ms(percentile(values, 0.99)),
+        "max": ms(max(values, default=None)),
+    }
+
+
+async def _monitor_loop_lag(
+    result: LoadResult, stop: asyncio.Event, interval: float = 0.01
+) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        result.loop_lag.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    factory: RequestFactory,
+    concurrency: int = 10,
+    duration: float | None = 30.0,
+    requests: int | None = None,
+) -> LoadResult:
+    """
+    Нагрузка на API через client (base_url - адрес приложения).
+
+    Останавливается по duration секунд или после requests запросов,
+    смотря что наступит раньше.
+    """
+    result = LoadResult()
+    stop = asyncio.Event()
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    def should_continue() -> bool:
+        nonlocal remaining
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining is not None:
+            if remaining <= 0:
+                return False
+            remaining -= 1
+        return True
+
+    async def worker() -> None:
+        while should_continue():
+            planned = factory.next()
+            started = time.perf_counter()
+            try:
+                response = await client.get(planned.path, params=planned.params)
+                status = str(response.status_code)
+                factory.remember(planned, response.headers.get(DOCUMENT_ID_HEADER))
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            result.record(planned.kind, status, time.perf_counter() - started)
+
+    monitor = asyncio.create_task(_monitor_loop_lag(result, stop))
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        result.elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+    return result
@@ -0,0 +1,157 @@
+"""
+Профили трафика нагрузочного теста.
+
+Профиль - взвешенный набор видов запросов к API. Координаты берутся
+из справочника городов (dbt seed), с небольшим разбросом вокруг города,
+как у клиентов-карт, запрашивающих соседние точки.
+"""
+
+from __future__ import annotations
+
+import csv
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+CITIES_SEED = Path(__file__).resolve().parents[2] / "dbt" / "seeds" / "cities.csv"
+
+# Запасной список, если seed недоступен (например, в образе приложения)
+DEFAULT_CITIES = [
+    (55.75, 37.62),
+    (59.93, 30.36),
+    (52.52, 13.405),
+    (48.85, 2.35),
+    (51.51, -0.13),
+    (40.71, -74.01),
+]
+
+FORECAST_HOURS = [1, 5, 10, 24, 48, 72, 96, 120, 144, 168]
+
+
+def load_locations(path: Path = CITIES_SEED) -> list[tuple[float, float]]:
+    if not path.exists():
+        return list(DEFAULT_CITIES)
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(f)
+        ]
+
+
+@dataclass
+class PlannedRequest:
+    kind: str
+    path: str
+    params: dict[str, Any]
+
+
+class RequestFactory:
+    """Генератор запросов профиля с воспроизводимой случайностью."""
+
+    def __init__(
+        self,
+        mix: dict[str, float],
+        locations: list[tuple[float, float]],
+        jitter: float = 0.05,
+        seed: int | None = None,
+    ) -> None:
+        unknown = set(mix) - set(REQUEST_KINDS)
+        if unknown:
+            raise ValueError(f"Неизвестные виды запросов: {', '.join(sorted(unknown))}")
+        self._kinds = list(mix)
+        self._weights = list(mix.values())
+        self._locations = locations
+        self._jitter = jitter
+        self._rng = random.Random(seed)
+        # _id сохранённых документов для пакетного чтения по _id
+        self.document_ids: dict[str, list[str]] = {"current": [], "forecast": []}
+
+    def location(self) -> tuple[float, float]:
+        lat, lon = self._rng.choice(self._locations)
+        return (
+            round(lat + self._rng.uniform(-self._jitter, self._jitter), 4),
+            round(lon + self._rng.uniform(-self._jitter, self._jitter), 4),
+        )
+
+    def next(self) -> PlannedRequest:
+        kind = self._rng.choices(self._kinds, weights=self._weights)[0]
+        return REQUEST_KINDS[kind](self)
+
+    def remember(self, request: PlannedRequest, document_id: str | None) -> None:
+        if document_id and request.kind in self.document_ids:
+            ids = self.document_ids[request.kind]
+            ids.append(document_id)
+            del ids[:-200]
+
+    @property
+    def rng(self) -> random.Random:
+        return self._rng
+
+
+def _current(factory: RequestFactory) -> PlannedRequest:
+    lat, lon = factory.location()
+    return PlannedRequest("current", "/api/weather/current", {"lat": lat, "lon": lon})
+
+
+def _forecast(factory: RequestFactory) -> PlannedRequest:
+    lat, lon = factory.location()
+    hours = factory.rng.choice(FORECAST_HOURS)
+    return PlannedRequest(
+        "forecast", "/api/weather/forecast", {"lat": lat, "lon": lon, "hours": hours}
+    )
+
+
+def _combined(factory: RequestFactory) -> PlannedRequest:
+    lat, lon = factory.location()
+    return PlannedRequest(
+        "combined", "/api/weather/combined", {"lat": lat, "lon": lon, "hours": 168}
+    )
+
+
+def _history(factory: RequestFactory) -> PlannedRequest:
+    lat, lon = factory.location()
+    path = factory.rng.choice(
+        [
+            "/api/weather/history/current/recent",
+            "/api/weather/history/forecast/recent",
+            "/api/weather/history/current/location",
+            "/api/weather/history/forecast/location",
+        ]
+    )
+    params: dict[str, Any] = {"limit": 20}
+    if path.endswith("/location"):
+        params.update(lat=lat, lon=lon)
+    return PlannedRequest("history", path, params)
+
+
+def _documents(factory: RequestFactory) -> PlannedRequest:
+    """Пакетное чтение документов по _id, как в манифесте сбора."""
+    kind = factory.rng.choice(["current", "forecast"])
+    ids = factory.document_ids[kind]
+    sample = factory.rng.sample(ids, min(len(ids), 25))
+    if not sample:
+        # Документов ещё нет - пакет превращается в обычный запрос погоды
+        return _current(factory)
+    return PlannedRequest(
+        "documents", f"/api/weather/history/{kind}/documents", {"ids": sample}
+    )
+
+
+REQUEST_KINDS: dict[str, Callable[[RequestFactory], PlannedRequest]] = {
+    "current": _current,
+    "forecast": _forecast,
+    "combined": _combined,
+    "history": _history,
+    "documents": _documents,
+}
+
+# Доли видов запросов в профилях
+MIXES: dict[str, dict[str, float]] = {
+    # Пользовательский трафик: в основном текущая погода и прогнозы
+    "interactive": {"current": 0.5, "forecast": 0.3, "history": 0.15, "combined": 0.05},
+    # Сбор по расписанию: прогнозы по всем горизонтам и пакетные чтения
+    "collector": {"forecast": 0.6, "current": 0.2, "combined": 0.1, "documents": 0.1},
+    # Аналитика: чтение истории
+    "history": {"history": 0.7, "documents": 0.2, "current": 0.1},
+}
@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+from typing import Iterator
+
 import pytest
+from app.db.mongodb import mongo_client
 from app.main import create_app
 from fastapi import FastAPI
 
 
+@pytest.fixture
+def anyio_backend() -> str:
+    # Сервис построен на asyncio (asyncio.gather, Semaphore и т.д.)
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def close_mongo_client() -> Iterator[None]:
+    yield
+    # Фоновое подключение к MongoDB не должно пережить тест и писать
+    # в лог после того, как pytest закроет вывод
+    mongo_client.close()
+
+
 @pytest.fixture
 def app() -> FastAPI:
     return create_app()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pytest
+from app.models.weather import WeatherProvider, WeatherSample
+from app.services.aggregator import CombinedAggregator
+from app.services.weather_providers.combined import (
+    OpenMeteoCombinedProvider,
+    SplitCombinedProvider,
+    WeatherAPICombinedProvider,
+)
+from tests.utils import MockAsyncClient
+
+
+@pytest.mark.anyio
+async def test_open_meteo_combined_provider_uses_single_request() -> None:
+    fake_json = {
+        "current_weather": {
+            "temperature": 18.5,
+            "windspeed": 10.0,
+            "time": "2025-12-01T10:00",
+        },
+        "hourly": {
+            "time": ["2025-12-01T10:00", "2025-12-01T11:00"],
+            "temperature_2m": [18.5, 19.0],
+            "relativehumidity_2m": [60, 58],
+            "windspeed_10m": [10.0, 12.0],
+        },
+    }
+
+    client = MockAsyncClient(fake_json)
+    provider = OpenMeteoCombinedProvider(client)
+
+    sample, forecast = await provider.get_weather_and_forecast(
+        lat=52.52, lon=13.405, hours=2
+    )
+
+    assert sample.provider == WeatherProvider.OPEN_METEO
+    assert sample.temperature_c == pytest.approx(18.5)
+    assert [p.temperature_c for p in forecast.points] == [18.5, 19.0]
+
+    assert len(client.requests) == 1
+    params = client.requests[0]["params"]
+    assert params["current_weather"] is True
+    assert params["forecast_hours"] == 2
+
+
+@pytest.mark.anyio
+async def test_weatherapi_combined_provider_reads_current_and_forecast() -> None:
+    fake_json = {
+        "current": {
+            "temp_c": 5.0,
+            "humidity": 80,
+            "wind_kph": 12.0,
+            "condition": {"text": "Cloudy"},
+        },
+        "forecast": {
+            "forecastday": [
+                {
+                    "hour": [
+                        {"time": "2025-12-01 00:00", "temp_c": 4.0},
+                        {"time": "2025-12-01 01:00", "temp_c": 3.5},
+                        {"time": "2025-12-01 02:00", "temp_c": 3.0},
+                    ]
+                }
+            ]
+        },
+    }
+
+    client = MockAsyncClient(fake_json)
+    provider = WeatherAPICombinedProvider(client, api_key="test")
+
+    sample, forecast = await provider.get_weather_and_forecast(
+        lat=55.75, lon=37.62, hours=2
+    )
+
+    assert sample.condition == "Cloudy"
+    assert len(forecast.points) == 2
+    assert len(client.requests) == 1
+    assert client.requests[0]["params"]["days"] == 1
+
+
+class DummyWeatherProvider:
+
+    name = "dummy"
+
+    async def get_weather(self, lat: float, lon: float) -> WeatherSample:
+        return WeatherSample(provider=WeatherProvider.WEATHERBIT, temperature_c=7.0)
+
+
+class FailingForecastProvider:
+
+    async def get_forecast(self, lat: float, lon: float, hours: int) -> None:
+        raise RuntimeError("forecast failed")
+
+
+@pytest.mark.anyio
+async def test_combined_aggregator_keeps_part_of_split_provider() -> None:
+    provider = SplitCombinedProvider(DummyWeatherProvider(), FailingForecastProvider())
+    aggregator = CombinedAggregator([provider])
+
+    result = await aggregator.get_aggregated_weather_and_forecast(
+        lat=1.0, lon=2.0, hours=3
+    )
+
+    assert result.current.average_temperature_c == pytest.approx(7.0)
+    assert result.forecast.forecasts == []
+    assert result.forecast.hours == 3
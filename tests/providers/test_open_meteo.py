@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 
 import pytest
 from app.models.weather import WeatherProvider
+from app.services.weather_providers.batching import (
+    LocationBatcher,
+    attach_location_batcher,
+)
 from app.services.weather_providers.open_meteo import OpenMeteoProvider
 from tests.utils import MockAsyncClient
 
@@ -36,3 +41,30 @@ async def test_open_meteo_provider_parses_response() -> None:
     assert params["latitude"] == 52.52
     assert params["longitude"] == 13.405
     assert params["current_weather"] is True
+
+
+@pytest.mark.anyio
+async def test_open_meteo_batches_concurrent_locations_into_one_request() -> None:
+    fake_json = [
+        {"current_weather": {"temperature": 18.5, "time": "2025-12-01T10:00"}},
+        {"current_weather": {"temperature": 7.0, "time": "2025-12-01T10:00"}},
+    ]
+
+    client = MockAsyncClient(fake_json)  # type: ignore[arg-type]
+    batcher = attach_location_batcher(client, LocationBatcher(window=0.01))
+    provider = OpenMeteoProvider(client)
+
+    berlin, paris = await asyncio.gather(
+        provider.get_weather(lat=52.5, lon=13.4),
+        provider.get_weather(lat=48.9, lon=2.4),
+    )
+
+    assert berlin.temperature_c == pytest.approx(18.5)
+    assert paris.temperature_c == pytest.approx(7.0)
+
+    assert len(client.requests) == 1
+    params = client.requests[0]["params"]
+    assert params["latitude"] == "52.5,48.9"
+    assert params["longitude"] == "13.4,2.4"
+    assert params["current_weather"] is True
+    assert (batcher.batches_sent, batcher.locations_sent) == (1, 2)
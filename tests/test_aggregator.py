@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 from app.models.weather import AggregatedWeatherResponse, WeatherProvider, WeatherSample
 from app.services.aggregator import WeatherAggregator
+from app.services.http_cache import HTTPCache, attach_http_cache
+from app.services.weather_providers.base import snap_to_grid
+from app.services.weather_providers.open_meteo import OpenMeteoProvider
+
+from tests.utils import MockAsyncClient
 
 
 class DummyProvider:
@@ -79,3 +86,32 @@ async def test_aggregator_skips_failed_providers() -> None:
     assert result.samples[0].temperature_c == pytest.approx(12.0)
     assert result.average_temperature_c == pytest.approx(12.0)
     assert result.average_humidity == pytest.approx(40.0)
+
+
+def test_snap_to_grid_uses_provider_resolution() -> None:
+    assert snap_to_grid(52.5201, 13.4049, 0.1) == (52.5, 13.4)
+    assert snap_to_grid(-33.8688, 151.2093, 0.25) == (-33.75, 151.25)
+    assert snap_to_grid(52.5201, 13.4049, None) == (52.5201, 13.4049)
+
+
+@pytest.mark.anyio
+async def test_nearby_points_share_one_upstream_request() -> None:
+    client = MockAsyncClient(
+        {"current_weather": {"temperature": 18.5, "time": "2025-12-01T10:00"}}
+    )
+    cache = attach_http_cache(client, HTTPCache())
+    aggregator = WeatherAggregator(providers=[OpenMeteoProvider(client)])
+
+    first, second = await asyncio.gather(
+        aggregator.get_aggregated_weather(lat=52.5201, lon=13.4049),
+        aggregator.get_aggregated_weather(lat=52.5249, lon=13.3951),
+    )
+
+    assert len(client.requests) == 1
+    params = client.requests[0]["params"]
+    assert (params["latitude"], params["longitude"]) == (52.5, 13.4)
+    assert cache.coalesced == 1
+
+    # В ответе остаются координаты запроса клиента
+    assert (first.latitude, second.latitude) == (52.5201, 52.5249)
+    assert second.samples[0].temperature_c == pytest.approx(18.5)
@@ -4,13 +4,14 @@ import pytest
 from app.api.routes import weather as weather_routes
 from app.core.config import Settings, get_settings
 from app.models.weather import WeatherProvider, WeatherSample
+from app.services.weather_providers import registry
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
 
 
 class FakeOpenMeteoProvider:
 
-    def __init__(self, client: object) -> None:
+    def __init__(self, client: object, limiter: object = None) -> None:
         self.client = client
 
     async def get_weather(self, lat: float, lon: float) -> WeatherSample:
@@ -50,7 +51,7 @@ async def test_current_weather_endpoint_aggregates_from_provider(
 
     app.dependency_overrides[get_settings] = lambda: test_settings
 
-    monkeypatch.setattr(weather_routes, "OpenMeteoProvider", FakeOpenMeteoProvider)
+    monkeypatch.setattr(registry, "OpenMeteoProvider", FakeOpenMeteoProvider)
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -74,3 +75,34 @@ async def test_current_weather_endpoint_aggregates_from_provider(
 
     assert data["average_temperature_c"] == pytest.approx(10.0)
     assert data["average_humidity"] == pytest.approx(40.0)
+
+
+@pytest.mark.anyio
+async def test_current_weather_endpoint_returns_document_id_header(
+    app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    app.dependency_overrides[get_settings] = lambda: Settings(
+        openweather_api_key="",
+        weatherapi_api_key="",
+        weatherbit_api_key="",
+        weatherstack_api_key="",
+    )
+    monkeypatch.setattr(registry, "OpenMeteoProvider", FakeOpenMeteoProvider)
+    monkeypatch.setattr(
+        weather_routes.mongo_client,
+        "save_current_weather",
+        lambda **kwargs: "65f1c0ffee0000000000abcd",
+    )
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/api/weather/current",
+            params={"lat": 52.52, "lon": 13.405},
+        )
+
+    assert response.status_code == 200
+    assert response.headers[weather_routes.DOCUMENT_ID_HEADER] == (
+        "65f1c0ffee0000000000abcd"
+    )
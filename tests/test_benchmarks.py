@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from benchmarks.cases import build_cases
+from benchmarks.runner import Measurement, compare
+from benchmarks.startup import profile_startup
+
+
+def test_benchmark_cases_run() -> None:
+    for name, (case, ops) in build_cases().items():
+        case()
+        assert ops >= 1, name
+
+
+def test_compare_flags_regressions_against_baseline() -> None:
+    baseline = {"results": {"fast": 1e-6, "slow": 1e-6}}
+    measurements = [
+        Measurement("fast", best=1.1e-6, median=1.2e-6, loops=1),
+        Measurement("slow", best=1.5e-6, median=1.6e-6, loops=1),
+        Measurement("new", best=1e-6, median=1e-6, loops=1),
+    ]
+
+    report = compare(measurements, baseline, tolerance=0.25)
+
+    assert [(m.name, regressed) for m, _, regressed in report] == [
+        ("fast", False),
+        ("slow", True),
+        ("new", False),
+    ]
+    assert report[2][1] is None
+
+
+def test_app_import_skips_disabled_providers() -> None:
+    report = profile_startup(repeat=1, run_startup=False, top=0)
+
+    assert len(report.import_s) == 1
+    assert "app.services.weather_providers.open_meteo" in report.modules
+    # Плагины без ключей API не импортируются
+    assert "app.services.weather_providers.weatherbit" not in report.modules
+    assert "app.services.weather_providers.combined" not in report.modules
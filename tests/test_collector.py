@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from app.core.config import Settings
+from app.models.weather import (
+    ForecastPoint,
+    ProviderForecast,
+    WeatherProvider,
+    WeatherSample,
+)
+from app.services import collector
+
+
+class DummyWeatherProvider:
+
+    async def get_weather(self, lat: float, lon: float) -> WeatherSample:
+        if lat < 0:
+            raise RuntimeError("provider failed")
+        return WeatherSample(provider=WeatherProvider.OPEN_METEO, temperature_c=lat)
+
+
+class DummyForecastProvider:
+
+    async def get_forecast(
+        self, lat: float, lon: float, hours: int
+    ) -> ProviderForecast:
+        return ProviderForecast(
+            provider=WeatherProvider.OPEN_METEO,
+            points=[
+                ForecastPoint(time="2025-12-01T10:00:00", temperature_c=1.0)
+                for _ in range(hours)
+            ],
+        )
+
+
+class FakeMongoClient:
+
+    build_current_weather_document = staticmethod(
+        collector.mongo_client.build_current_weather_document
+    )
+    build_forecast_document = staticmethod(
+        collector.mongo_client.build_forecast_document
+    )
+
+    def __init__(self) -> None:
+        self.inserts: list[tuple[str, list[dict[str, Any]]]] = []
+
+    def insert_current_weather_many(self, documents: list[dict[str, Any]]) -> list:
+        self.inserts.append(("current", documents))
+        return [f"id-{i}" for i in range(len(documents))]
+
+    def insert_forecasts_many(self, documents: list[dict[str, Any]]) -> list:
+        self.inserts.append(("forecast", documents))
+        return [f"id-{i}" for i in range(len(documents))]
+
+
+CITIES = [
+    {"name": "Berlin", "lat": 52.52, "lon": 13.4},
+    {"name": "Moscow", "lat": 55.75, "lon": 37.62},
+]
+
+
+@pytest.mark.anyio
+async def test_collect_current_weather_stores_run_in_one_bulk_insert(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fake_mongo = FakeMongoClient()
+    monkeypatch.setattr(collector, "mongo_client", fake_mongo)
+    monkeypatch.setattr(
+        collector,
+        "build_weather_providers",
+        lambda client, settings: [DummyWeatherProvider()],
+    )
+
+    results = await collector.collect_current_weather(
+        CITIES, settings=Settings(), client=object()
+    )
+
+    assert [r["city"] for r in results] == ["Berlin", "Moscow"]
+    assert all(r["status"] == "success" for r in results)
+    assert [r["document_id"] for r in results] == ["id-0", "id-1"]
+    assert all("data" not in r for r in results)
+
+    assert len(fake_mongo.inserts) == 1
+    kind, documents = fake_mongo.inserts[0]
+    assert kind == "current"
+    assert [d["latitude"] for d in documents] == [52.52, 55.75]
+    assert documents[0]["request"] == {"lat": 52.52, "lon": 13.4}
+
+
+@pytest.mark.anyio
+async def test_collect_forecasts_covers_every_city_and_horizon(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fake_mongo = FakeMongoClient()
+    monkeypatch.setattr(collector, "mongo_client", fake_mongo)
+    monkeypatch.setattr(
+        collector,
+        "build_forecast_providers",
+        lambda client, settings: [DummyForecastProvider()],
+    )
+
+    results = await collector.collect_forecasts(
+        CITIES, [1, 24], settings=Settings(), client=object(), parallelism=2
+    )
+
+    assert [(r["city"], r["hours"]) for r in results] == [
+        ("Berlin", 1),
+        ("Berlin", 24),
+        ("Moscow", 1),
+        ("Moscow", 24),
+    ]
+    assert all("elapsed_ms" in r for r in results)
+
+    assert len(fake_mongo.inserts) == 1
+    _, documents = fake_mongo.inserts[0]
+    assert [d["hours"] for d in documents] == [1, 24, 1, 24]
+    assert len(documents[1]["response"]["forecasts"][0]["points"]) == 24
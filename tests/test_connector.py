@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src" / "airflow" / "dags"))
+
+import connector__mongo_postgres_logic as connector  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from sqlalchemy import Column, DateTime, Integer, String  # noqa: E402
+from sqlalchemy.orm import declarative_base, sessionmaker  # noqa: E402
+
+Base = declarative_base()
+
+
+class Document(Base):
+    """Минимальная таблица SCD Type 2 с колонками, которые читает upsert_scd2."""
+
+    __tablename__ = "document"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    document_id = Column(String, nullable=False)
+    payload = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime)
+    content_hash = Column(String(32))
+    valid_to_dttm = Column(DateTime, nullable=False, default=connector.ACTIVE_VALID_TO)
+
+
+def _row(item: dict, item_hash: str) -> dict:
+    return {
+        "document_id": str(item["_id"]),
+        "payload": item["response"],
+        "created_at": item["created_at"],
+        "updated_at": item["updated_at"],
+        "content_hash": item_hash,
+        "valid_to_dttm": connector.ACTIVE_VALID_TO,
+    }
+
+
+def _document(key: str, response: str, updated_at: datetime) -> dict:
+    return {
+        "_id": key,
+        "response": response,
+        "created_at": datetime(2025, 11, 1),
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(connector, "is_partitioned", lambda session, model: False)
+    engine = sqlalchemy.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _upsert(session, documents, batch_size: int = 2) -> tuple[int, int]:
+    return connector.upsert_scd2(
+        session, Document, Document.document_id, documents, _row, batch_size
+    )
+
+
+def _versions(session) -> tuple[dict, list]:
+    """Активные версии (_id -> payload) и закрытые [(_id, payload)]."""
+    rows = session.query(
+        Document.document_id, Document.payload, Document.valid_to_dttm
+    ).all()
+    active = {
+        key: payload
+        for key, payload, valid_to in rows
+        if valid_to == connector.ACTIVE_VALID_TO
+    }
+    closed = [
+        (key, payload)
+        for key, payload, valid_to in rows
+        if valid_to != connector.ACTIVE_VALID_TO
+    ]
+    return active, closed
+
+
+def test_upsert_scd2_inserts_new_closes_changed_and_skips_unchanged(session) -> None:
+    first = datetime(2025, 11, 1, 12)
+    later = datetime(2025, 11, 2, 12)
+    loaded = [_document("same", "a", first), _document("changed", "b", first)]
+    assert _upsert(session, loaded, batch_size=1) == (2, 0)
+
+    incoming = [
+        # Изменился только updated_at - хэш содержимого тот же
+        _document("same", "a", later),
+        _document("changed", "b2", later),
+        _document("new", "c", later),
+    ]
+    assert _upsert(session, incoming) == (2, 1)
+
+    assert _versions(session) == (
+        {"same": "a", "changed": "b2", "new": "c"},
+        [("changed", "b")],
+    )
+
+
+def test_upsert_scd2_compares_rows_without_hash_by_updated_at(session) -> None:
+    loaded_at = datetime(2025, 11, 1, 12)
+    # Строки, загруженные до появления content_hash
+    session.add_all(
+        Document(
+            document_id=key,
+            payload=key,
+            created_at=datetime(2025, 11, 1),
+            updated_at=loaded_at,
+        )
+        for key in ("kept", "updated")
+    )
+    session.commit()
+
+    incoming = [
+        _document("kept", "kept", loaded_at),
+        _document("updated", "updated", datetime(2025, 11, 2)),
+    ]
+    assert _upsert(session, incoming) == (1, 1)
+    assert _versions(session) == (
+        {"kept": "kept", "updated": "updated"},
+        [("updated", "updated")],
+    )
+
+
+DOCUMENT = {
+    "_id": ObjectId("6740a1b2c3d4e5f601234567"),
+    "created_at": datetime(2025, 11, 1, 12, 30, 5, 123456),
+    "updated_at": datetime(2025, 11, 1, 12, 30, tzinfo=timezone.utc),
+    "response": {
+        "city": "Москва",
+        "samples": [{"temperature_c": 18.5, "ok": True, "error": None}],
+        "by_hours": {24: 1.5, 48: 2.0},
+    },
+}
+
+EXPECTED_JSON = {
+    "_id": "6740a1b2c3d4e5f601234567",
+    "created_at": "2025-11-01T12:30:05.123456",
+    "updated_at": "2025-11-01T12:30:00+00:00",
+    "response": {
+        "city": "Москва",
+        "samples": [{"temperature_c": 18.5, "ok": True, "error": None}],
+        "by_hours": {"24": 1.5, "48": 2.0},
+    },
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request, monkeypatch) -> str:
+    if request.param == "json":
+        monkeypatch.setattr(connector, "orjson", None)
+    elif connector.orjson is None:
+        pytest.skip("orjson не установлен")
+    return request.param
+
+
+def test_encode_json_round_trips_bson_documents(json_backend: str) -> None:
+    encoded = connector.encode_json(DOCUMENT)
+    assert json.loads(encoded) == EXPECTED_JSON
+    assert "Москва" in encoded
+
+
+def test_json_backends_produce_identical_bytes(monkeypatch) -> None:
+    if connector.orjson is None:
+        pytest.skip("orjson не установлен")
+    fast = connector._dumps(DOCUMENT, sort_keys=True)
+    hashed = connector.content_hash(DOCUMENT)
+
+    monkeypatch.setattr(connector, "orjson", None)
+    # Иначе хэши версий SCD2 зависели бы от наличия orjson у воркера
+    assert connector._dumps(DOCUMENT, sort_keys=True) == fast
+    assert connector.content_hash(DOCUMENT) == hashed
+
+
+def test_encode_json_rejects_unknown_types(json_backend: str) -> None:
+    with pytest.raises(TypeError):
+        connector.encode_json({"value": {1, 2}})
+
+
+def test_month_start_crosses_year_boundaries() -> None:
+    december = datetime(2025, 12, 31, 23, 59)
+    assert connector._month_start(december) == datetime(2025, 12, 1)
+    assert connector._month_start(december, shift=1) == datetime(2026, 1, 1)
+    assert connector._month_start(datetime(2026, 1, 15), shift=-1) == datetime(
+        2025, 12, 1
+    )
+    assert connector._month_start(datetime(2025, 11, 1), shift=14) == datetime(
+        2027, 1, 1
+    )
+
+
+class RecordingConnection:
+    """Соединение, запоминающее выполненные запросы вместо выполнения."""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def execute(self, statement, *args) -> None:
+        self.statements.append(str(statement))
+
+
+PARTITIONED = SimpleNamespace(
+    __tablename__="weather_current", __table__=SimpleNamespace(schema="raw")
+)
+
+
+def test_ensure_partition_skips_partitions_known_after_commit(monkeypatch) -> None:
+    monkeypatch.setattr(connector, "_known_partitions", set())
+    connection = RecordingConnection()
+
+    created = connector.ensure_partitions_for(
+        connection,
+        PARTITIONED,
+        [datetime(2025, 12, 1), datetime(2025, 12, 31, 23), None, datetime(2026, 1, 2)],
+    )
+
+    assert created == {"raw.weather_current_p2025_12", "raw.weather_current_p2026_01"}
+    assert sorted(connection.statements) == [
+        "CREATE TABLE IF NOT EXISTS raw.weather_current_p2025_12 "
+        "PARTITION OF raw.weather_current "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')",
+        "CREATE TABLE IF NOT EXISTS raw.weather_current_p2026_01 "
+        "PARTITION OF raw.weather_current "
+        "FOR VALUES FROM ('2026-01-01') TO ('2026-02-01')",
+    ]
+
+    # Пока транзакция не зафиксирована, DDL повторяется (IF NOT EXISTS)
+    december = connector.ensure_partition(
+        connection, PARTITIONED, datetime(2025, 12, 5)
+    )
+    assert december == "raw.weather_current_p2025_12"
+    assert len(connection.statements) == 3
+
+    connector._known_partitions.update(created)
+    assert (
+        connector.ensure_partition(connection, PARTITIONED, datetime(2026, 1, 9))
+        is None
+    )
+    assert len(connection.statements) == 3
+
+
+def test_upsert_scd2_caches_partitions_only_after_commit(session, monkeypatch) -> None:
+    monkeypatch.setattr(connector, "_known_partitions", set())
+    monkeypatch.setattr(connector, "is_partitioned", lambda session, model: True)
+    monkeypatch.setattr(
+        connector,
+        "ensure_partitions_for",
+        lambda session, model, moments: {"public.document_p2025_11"},
+    )
+    documents = [_document("a", "a", datetime(2025, 11, 1, 12))]
+    commit = session.commit
+
+    def fail() -> None:
+        raise sqlalchemy.exc.OperationalError("COMMIT", {}, Exception("lost"))
+
+    monkeypatch.setattr(session, "commit", fail)
+    with pytest.raises(sqlalchemy.exc.OperationalError):
+        _upsert(session, documents)
+    # Откаченный DDL не должен считаться созданной партицией
+    assert connector._known_partitions == set()
+
+    session.rollback()
+    monkeypatch.setattr(session, "commit", commit)
+    assert _upsert(session, documents) == (1, 0)
+    assert connector._known_partitions == {"public.document_p2025_11"}
+
+
+def test_extract_since_covers_lagging_parquet_sink(session) -> None:
+    session.add(
+        Document(
+            document_id="a",
+            created_at=datetime(2025, 11, 1),
+            updated_at=datetime(2025, 11, 10, 12),
+        )
+    )
+    session.commit()
+    postgres_since = datetime(2025, 11, 9, 12)
+
+    assert connector.get_extract_since(session, Document) == postgres_since
+    # Приёмник отстал: окно начинается от его водяного знака
+    lagging = SimpleNamespace(extract_since=datetime(2025, 11, 5))
+    assert connector.get_extract_since(session, Document, lagging) == datetime(
+        2025, 11, 5
+    )
+    ahead = SimpleNamespace(extract_since=datetime(2025, 11, 10))
+    assert connector.get_extract_since(session, Document, ahead) == postgres_since
+    # Новый data lake без водяного знака - выгрузка всей истории
+    fresh = SimpleNamespace(extract_since=None)
+    assert connector.get_extract_since(session, Document, fresh) is None
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src" / "airflow" / "dags"))
+
+import dbt_weather_marts_logic as dbt  # noqa: E402
+
+WATERMARKS = {"weather_current": 10, "weather_forecast": 20}
+
+
+@pytest.fixture
+def dbt_dir(tmp_path: Path) -> Path:
+    """Проект dbt с lock-файлом пакетов, seed и артефактами последнего запуска."""
+    project = tmp_path / "dbt"
+    (project / "seeds").mkdir(parents=True)
+    (project / "target").mkdir()
+    (project / "package-lock.yml").write_text("packages: []\n")
+    (project / "seeds" / "cities.csv").write_text("latitude,longitude,city\n")
+    (project / "target" / "manifest.json").write_text("{}")
+    return project
+
+
+def _plan(dbt_dir: Path, state_dir: Path, **watermarks: int | None) -> dict:
+    return dbt.plan_dbt_run(
+        dbt_dir, state_dir, raw_watermarks={**WATERMARKS, **watermarks}
+    )
+
+
+def _succeed(plan: dict, dbt_dir: Path, state_dir: Path) -> None:
+    """Успешный запуск: пакеты установлены, состояние сохранено."""
+    (dbt_dir / "dbt_packages").mkdir(exist_ok=True)
+    dbt.save_dbt_state(plan=plan, dbt_dir=dbt_dir, state_dir=state_dir)
+
+
+def test_first_run_builds_everything(dbt_dir: Path, tmp_path: Path) -> None:
+    plan = _plan(dbt_dir, tmp_path / "state")
+
+    assert (plan["run_deps"], plan["run_seed"], plan["use_state"]) == (
+        True,
+        True,
+        False,
+    )
+    assert plan["select"] == "tag:stg tag:ods tag:dm"
+
+
+def test_unchanged_inputs_select_only_modified_models(
+    dbt_dir: Path, tmp_path: Path
+) -> None:
+    state_dir = tmp_path / "state"
+    _succeed(_plan(dbt_dir, state_dir), dbt_dir, state_dir)
+
+    plan = _plan(dbt_dir, state_dir)
+
+    assert (plan["run_deps"], plan["run_seed"], plan["use_state"]) == (
+        False,
+        False,
+        True,
+    )
+    assert plan["select"] == "state:modified+"
+
+
+def test_new_raw_rows_and_seed_changes_select_their_descendants(
+    dbt_dir: Path, tmp_path: Path
+) -> None:
+    state_dir = tmp_path / "state"
+    _succeed(_plan(dbt_dir, state_dir), dbt_dir, state_dir)
+
+    plan = _plan(dbt_dir, state_dir, weather_current=11)
+    assert plan["select"] == "source:raw.weather_current+ state:modified+"
+
+    (dbt_dir / "seeds" / "cities.csv").write_text("latitude,longitude,city\n1,2,X\n")
+    # Пустая raw-таблица (max(id) IS NULL) моделей не выбирает
+    plan = _plan(dbt_dir, state_dir, weather_forecast=None)
+    assert plan["run_seed"] is True
+    assert plan["select"] == "cities+ state:modified+"
+
+
+def test_failed_run_keeps_previous_state(dbt_dir: Path, tmp_path: Path) -> None:
+    state_dir = tmp_path / "state"
+    _succeed(_plan(dbt_dir, state_dir), dbt_dir, state_dir)
+
+    # Запуск с новыми строками упал: состояние не сохранено, строки
+    # выбираются и в следующем плане
+    _plan(dbt_dir, state_dir, weather_forecast=21)
+    plan = _plan(dbt_dir, state_dir, weather_forecast=22)
+
+    assert plan["select"] == "source:raw.weather_forecast+ state:modified+"
+    assert (state_dir / "manifest.json").exists()
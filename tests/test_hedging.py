@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from app.services.hedging import RequestHedger
+
+
+def _warm_up(hedger: RequestHedger, provider: str, requests: int) -> None:
+    history = hedger.history(provider)
+    for _ in range(20):
+        history.record(0.01)
+    history.requests = requests
+
+
+class SlowFirstCall:
+    """Первый вызов зависает, следующие отвечают сразу."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        call = self.calls
+        try:
+            if call == 1:
+                await asyncio.sleep(10)
+            return f"call-{call}"
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+@pytest.mark.anyio
+async def test_slow_request_is_hedged_and_loser_cancelled() -> None:
+    hedger = RequestHedger(percentile=0.95, max_hedge_fraction=0.1, min_delay=0.01)
+    _warm_up(hedger, "weatherapi", requests=100)
+    call = SlowFirstCall()
+
+    result = await asyncio.wait_for(hedger.run("weatherapi", call), timeout=1)
+    await asyncio.sleep(0)
+
+    assert result == "call-2"
+    assert call.calls == 2
+    assert call.cancelled == 1
+    history = hedger.history("weatherapi")
+    assert (history.hedges, history.hedge_wins) == (1, 1)
+
+
+@pytest.mark.anyio
+async def test_hedges_are_capped_by_fraction_of_requests() -> None:
+    hedger = RequestHedger(max_hedge_fraction=0.05, min_delay=0.01)
+    _warm_up(hedger, "openweathermap", requests=100)
+    hedger.history("openweathermap").hedges = 5
+
+    assert hedger.hedge_delay("openweathermap") is None
+
+    # Без накопленной статистики порог неизвестен - хеджа тоже нет
+    assert hedger.hedge_delay("weatherbit") is None
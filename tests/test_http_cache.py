@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from app.services.http_cache import HTTPCache, attach_http_cache, freshness_lifetime
+from app.services.weather_providers.open_meteo import OpenMeteoProvider
+
+from tests.utils import OPEN_METEO_JSON, MockResponse, SequenceClient
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_freshness_lifetime_from_headers() -> None:
+    assert freshness_lifetime({"Cache-Control": "public, max-age=900"}) == 900
+    assert freshness_lifetime({"Cache-Control": "no-store"}) is None
+    assert freshness_lifetime({"Cache-Control": "no-cache, max-age=60"}) == 0
+    assert (
+        freshness_lifetime(
+            {
+                "Date": "Mon, 01 Dec 2025 10:00:00 GMT",
+                "Expires": "Mon, 01 Dec 2025 10:15:00 GMT",
+            }
+        )
+        == 900
+    )
+
+
+def test_default_stale_window_applies_only_to_fresh_responses() -> None:
+    clock = FakeClock()
+    cache = HTTPCache(clock=clock, stale_while_revalidate=30)
+    cache.store("fresh", 1, {"Cache-Control": "max-age=60"})
+    cache.store("validate", 2, {"Cache-Control": "max-age=0", "ETag": '"v1"'})
+    cache.store("etag-only", 3, {"Cache-Control": "no-cache", "ETag": '"v1"'})
+
+    clock.now = 1
+    assert cache.can_serve_stale(cache.get("fresh"))
+    assert not cache.can_serve_stale(cache.get("validate"))
+    assert not cache.can_serve_stale(cache.get("etag-only"))
+
+
+@pytest.mark.anyio
+async def test_provider_reuses_fresh_result_and_revalidates_with_etag() -> None:
+    clock = FakeClock()
+    client = SequenceClient(
+        [
+            MockResponse(
+                OPEN_METEO_JSON,
+                headers={"Cache-Control": "max-age=60", "ETag": '"v1"'},
+            ),
+            MockResponse({}, status_code=304, headers={"Cache-Control": "max-age=60"}),
+        ]
+    )
+    cache = attach_http_cache(client, HTTPCache(clock=clock))
+    provider = OpenMeteoProvider(client)
+
+    first = await provider.get_weather(lat=52.52, lon=13.405)
+    second = await provider.get_weather(lat=52.52, lon=13.405)
+
+    assert second is first
+    assert len(client.requests) == 1
+
+    clock.now = 61
+    third = await provider.get_weather(lat=52.52, lon=13.405)
+
+    assert third is first
+    assert len(client.requests) == 2
+    assert client.requests[1]["headers"] == {"If-None-Match": '"v1"'}
+    assert (cache.hits, cache.revalidated, cache.misses) == (1, 1, 1)
+
+
+@pytest.mark.anyio
+async def test_provider_does_not_cache_no_store_responses() -> None:
+    client = SequenceClient(
+        [
+            MockResponse(OPEN_METEO_JSON, headers={"Cache-Control": "no-store"}),
+            MockResponse(OPEN_METEO_JSON, headers={"Cache-Control": "no-store"}),
+        ]
+    )
+    cache = attach_http_cache(client, HTTPCache())
+    provider = OpenMeteoProvider(client)
+
+    await provider.get_weather(lat=52.52, lon=13.405)
+    await provider.get_weather(lat=52.52, lon=13.405)
+
+    assert len(client.requests) == 2
+    assert len(cache) == 0
+
+
+async def _settle(cache: HTTPCache) -> None:
+    while cache.pending:
+        await asyncio.gather(*cache.pending.values())
+
+
+@pytest.mark.anyio
+async def test_stale_entry_is_served_while_one_background_refresh_runs() -> None:
+    clock = FakeClock()
+    refreshed = {"current_weather": {**OPEN_METEO_JSON["current_weather"]}}
+    refreshed["current_weather"]["temperature"] = 20.0
+    client = SequenceClient(
+        [
+            MockResponse(OPEN_METEO_JSON, headers={"Cache-Control": "max-age=60"}),
+            MockResponse(refreshed, headers={"Cache-Control": "max-age=60"}),
+        ]
+    )
+    cache = attach_http_cache(client, HTTPCache(clock=clock, stale_while_revalidate=30))
+    provider = OpenMeteoProvider(client)
+
+    first = await provider.get_weather(lat=52.52, lon=13.405)
+    clock.now = 70
+    stale = await asyncio.gather(
+        *(provider.get_weather(lat=52.52, lon=13.405) for _ in range(3))
+    )
+    await _settle(cache)
+
+    assert all(sample is first for sample in stale)
+    assert len(client.requests) == 2
+    assert (cache.stale_hits, cache.refreshes) == (3, 1)
+
+    fresh = await provider.get_weather(lat=52.52, lon=13.405)
+    assert fresh.temperature_c == 20.0
+    assert len(client.requests) == 2
+
+
+@pytest.mark.anyio
+async def test_hot_entry_is_refreshed_ahead_of_expiry() -> None:
+    clock = FakeClock()
+    headers = {"Cache-Control": "max-age=100"}
+    client = SequenceClient(
+        [
+            MockResponse(OPEN_METEO_JSON, headers=headers),
+            MockResponse(OPEN_METEO_JSON, headers=headers),
+        ]
+    )
+    cache = attach_http_cache(
+        client, HTTPCache(clock=clock, refresh_ahead=0.2, hot_accesses=2)
+    )
+    provider = OpenMeteoProvider(client)
+
+    await provider.get_weather(lat=52.52, lon=13.405)
+    clock.now = 85
+    # Одно обращение - точка ещё не популярна
+    await provider.get_weather(lat=52.52, lon=13.405)
+    await _settle(cache)
+    assert len(client.requests) == 1
+
+    await provider.get_weather(lat=52.52, lon=13.405)
+    await _settle(cache)
+    assert len(client.requests) == 2
+    assert cache.refreshes == 1
+
+    clock.now = 150
+    # Запись продлена фоновым обновлением: пользователь API не ждёт
+    await provider.get_weather(lat=52.52, lon=13.405)
+    assert len(client.requests) == 2
+
+
+@pytest.mark.anyio
+async def test_not_modified_after_eviction_restores_entry() -> None:
+    clock = FakeClock()
+    client = SequenceClient(
+        [
+            MockResponse(
+                OPEN_METEO_JSON, headers={"Cache-Control": "max-age=60", "ETag": '"v1"'}
+            ),
+            MockResponse({}, status_code=304, headers={"Cache-Control": "max-age=60"}),
+        ]
+    )
+    cache = attach_http_cache(client, HTTPCache(max_entries=1, clock=clock))
+    provider = OpenMeteoProvider(client)
+    first = await provider.get_weather(lat=52.52, lon=13.405)
+
+    send = client.get
+
+    async def evicting_get(*args: Any, **kwargs: Any) -> MockResponse:
+        # Пока идёт условный запрос, запись вытесняет другая точка
+        cache.store("other", "value", {"Cache-Control": "max-age=60"})
+        return await send(*args, **kwargs)
+
+    client.get = evicting_get  # type: ignore[method-assign]
+    clock.now = 61
+    second = await provider.get_weather(lat=52.52, lon=13.405)
+
+    assert second is first
+    assert cache.revalidated == 1
+    assert len(cache) == 1
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from app.db.mongodb import PRODUCTION_DATABASE
+from fastapi import FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+from loadtest.__main__ import LOADTEST_DATABASE, use_loadtest_database
+from loadtest.harness import percentile, run_load
+from loadtest.mixes import RequestFactory
+
+
+def _fake_api() -> FastAPI:
+    app = FastAPI()
+    counter = {"n": 0}
+
+    @app.get("/api/weather/current")
+    async def current(response: Response) -> dict:
+        counter["n"] += 1
+        response.headers["X-Document-Id"] = f"doc-{counter['n']}"
+        return {}
+
+    @app.get("/api/weather/history/{kind}/documents")
+    async def documents(kind: str) -> dict:
+        return {"count": 0, "data": []}
+
+    return app
+
+
+def test_percentile_uses_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) is None
+
+
+@pytest.mark.anyio
+async def test_run_load_reports_latency_and_batches_known_documents() -> None:
+    factory = RequestFactory(
+        {"current": 0.5, "documents": 0.5}, [(52.52, 13.405)], seed=1
+    )
+    transport = ASGITransport(app=_fake_api())
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        result = await run_load(
+            client, factory, concurrency=4, duration=None, requests=40
+        )
+
+    summary = result.summary()
+    assert summary["requests"] == 40
+    assert summary["errors"] == 0
+    assert summary["latency_ms"]["p99"] is not None
+    assert "documents" in summary["by_kind"]
+    assert factory.document_ids["current"]
+
+
+def test_loadtest_refuses_production_database(monkeypatch) -> None:
+    monkeypatch.setenv("MONGO_DATABASE", "configured_db")
+    with pytest.raises(ValueError):
+        use_loadtest_database(PRODUCTION_DATABASE)
+    assert os.environ["MONGO_DATABASE"] == "configured_db"
+
+    use_loadtest_database(LOADTEST_DATABASE)
+    assert os.environ["MONGO_DATABASE"] == LOADTEST_DATABASE
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src" / "airflow" / "dags"))
+
+import pyarrow.dataset as ds  # noqa: E402
+from connector__parquet_sink import (  # noqa: E402
+    current_weather_sink,
+    flatten_current_weather,
+)
+
+
+def _current(key: str, updated_at: datetime | None, **extra) -> dict:
+    return {
+        "_id": key,
+        "latitude": 55.75,
+        "longitude": 37.62,
+        "response": {"samples": [{"provider": "open_meteo", "temperature_c": 1.0}]},
+        "updated_at": updated_at,
+        **extra,
+    }
+
+
+def test_flatten_partitions_by_updated_at_without_created_at() -> None:
+    created = _current("a", datetime(2025, 11, 2), created_at=datetime(2025, 11, 1))
+    assert [row["date"] for row in flatten_current_weather(created)] == ["2025-11-01"]
+
+    late = _current("b", datetime(2025, 11, 2, 3))
+    assert [row["date"] for row in flatten_current_weather(late)] == ["2025-11-02"]
+
+    assert list(flatten_current_weather(_current("c", None))) == []
+
+
+def _rows(root: Path) -> list[str]:
+    dataset = ds.dataset(root / "weather_current", format="parquet")
+    return sorted(dataset.to_table(columns=["weather_id"]).column(0).to_pylist())
+
+
+def test_retry_after_crash_does_not_duplicate_flushed_rows(tmp_path: Path) -> None:
+    documents = [
+        _current(key, datetime(2025, 11, 1, hour), created_at=datetime(2025, 11, 1))
+        for hour, key in enumerate("abc")
+    ]
+
+    crashed = current_weather_sink(tmp_path, flush_rows=1)
+    for document in documents[:2]:
+        crashed.add(document)
+    assert crashed.rows_written == 2  # сброшено, но не опубликовано
+
+    retry = current_weather_sink(tmp_path, flush_rows=1)
+    assert retry.watermark is None
+    assert retry.write(documents) == 3
+    assert _rows(tmp_path) == ["a", "b", "c"]
+    assert not list((tmp_path / "_staging" / "weather_current").iterdir())
+
+    rerun = current_weather_sink(tmp_path)
+    assert rerun.watermark == datetime(2025, 11, 1, 2)
+    assert rerun.write(documents) == 0
+    assert _rows(tmp_path) == ["a", "b", "c"]
+
+
+def test_late_documents_inside_lookback_are_written_once(tmp_path: Path) -> None:
+    created = datetime(2025, 11, 1)
+    first = [_current("a", datetime(2025, 11, 1, 12), created_at=created)]
+    assert current_weather_sink(tmp_path).write(first) == 1
+
+    sink = current_weather_sink(tmp_path)
+    assert sink.extract_since == datetime(2025, 10, 31, 12)
+    # Повторное извлечение окна: "a" уже записан, "late" - запоздавший
+    # с updated_at раньше водяного знака, "old" - за окном
+    window = first + [
+        _current("late", datetime(2025, 11, 1, 6), created_at=created),
+        _current("old", datetime(2025, 10, 31, 6), created_at=created),
+    ]
+    assert sink.write(window) == 1
+    assert current_weather_sink(tmp_path).write(window) == 0
+    assert _rows(tmp_path) == ["a", "late"]
+
+
+def test_aborted_run_leaves_no_files_and_keeps_watermark(tmp_path: Path) -> None:
+    created = datetime(2025, 11, 1)
+    assert current_weather_sink(tmp_path).write(
+        [_current("a", created, created_at=created)]
+    )
+
+    sink = current_weather_sink(tmp_path, flush_rows=1)
+    sink.add(_current("b", datetime(2025, 11, 1, 1), created_at=created))
+    sink.abort()
+
+    assert not list((tmp_path / "_staging" / "weather_current").iterdir())
+    assert _rows(tmp_path) == ["a"]
+    retry = current_weather_sink(tmp_path)
+    assert retry.watermark == created
+    assert (
+        retry.write([_current("b", datetime(2025, 11, 1, 1), created_at=created)]) == 1
+    )
+    assert _rows(tmp_path) == ["a", "b"]
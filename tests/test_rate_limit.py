@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from pathlib import Path
+
+import pytest
+from app.services.rate_limit import (
+    Priority,
+    ProviderRateLimiter,
+    ProviderThrottled,
+    TokenBucket,
+    batch_priority,
+    request_priority,
+)
+from app.services.shared_cache import shared_cache_from_url
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_at_configured_rate() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)
+
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert bucket.try_take() == 0
+
+
+@pytest.mark.anyio
+async def test_daily_budget_reserves_share_for_interactive_requests() -> None:
+    limiter = ProviderRateLimiter("weatherbit", daily_budget=10, batch_budget_share=0.8)
+
+    for _ in range(8):
+        await limiter.acquire(Priority.BATCH)
+    with pytest.raises(ProviderThrottled):
+        await limiter.acquire(Priority.BATCH)
+
+    await limiter.acquire(Priority.INTERACTIVE)
+    await limiter.acquire(Priority.INTERACTIVE)
+    with pytest.raises(ProviderThrottled):
+        await limiter.acquire(Priority.INTERACTIVE)
+
+
+@pytest.mark.anyio
+async def test_daily_budget_resets_on_new_day() -> None:
+    day = {"value": date(2025, 12, 1)}
+    limiter = ProviderRateLimiter(
+        "weatherstack", daily_budget=1, today=lambda: day["value"]
+    )
+
+    await limiter.acquire(Priority.INTERACTIVE)
+    with pytest.raises(ProviderThrottled):
+        await limiter.acquire(Priority.INTERACTIVE)
+
+    day["value"] = date(2025, 12, 2)
+    await limiter.acquire(Priority.INTERACTIVE)
+    assert limiter.used_today == 1
+
+
+@pytest.mark.anyio
+async def test_daily_budget_is_shared_by_workers(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    first, second = (
+        ProviderRateLimiter(
+            "weatherbit",
+            daily_budget=3,
+            today=lambda: date(2025, 12, 1),
+            budget_store=shared_cache_from_url(url),
+        )
+        for _ in range(2)
+    )
+
+    await first.acquire(Priority.INTERACTIVE)
+    await first.acquire(Priority.INTERACTIVE)
+    await second.acquire(Priority.INTERACTIVE)
+
+    assert second.used_today == 3
+    with pytest.raises(ProviderThrottled):
+        await second.acquire(Priority.INTERACTIVE)
+
+
+@pytest.mark.anyio
+async def test_daily_budget_counts_locally_when_store_is_down(tmp_path: Path) -> None:
+    # Каталога нет - SQLite не откроет файл
+    store = shared_cache_from_url(f"sqlite:///{tmp_path / 'missing' / 'cache.db'}")
+    limiter = ProviderRateLimiter("weatherstack", daily_budget=1, budget_store=store)
+
+    await limiter.acquire(Priority.INTERACTIVE)
+    with pytest.raises(ProviderThrottled):
+        await limiter.acquire(Priority.INTERACTIVE)
+    assert store.errors == 1
+
+
+@pytest.mark.anyio
+async def test_interactive_request_is_served_before_waiting_batch() -> None:
+    limiter = ProviderRateLimiter(
+        "openweathermap",
+        requests_per_minute=600,  # токен каждые 0.1 с
+        interactive_max_wait=1.0,
+        batch_max_wait=1.0,
+    )
+    limiter._bucket.drain()
+    order: list[str] = []
+
+    async def request(label: str, priority: Priority) -> None:
+        await limiter.acquire(priority)
+        order.append(label)
+
+    await asyncio.gather(
+        request("batch", Priority.BATCH),
+        request("interactive", Priority.INTERACTIVE),
+    )
+
+    assert order == ["interactive", "batch"]
+
+
+@pytest.mark.anyio
+async def test_throttled_provider_is_skipped_after_max_wait() -> None:
+    limiter = ProviderRateLimiter(
+        "openweathermap", requests_per_minute=60, interactive_max_wait=0.1
+    )
+    limiter.throttled_by_provider(retry_after=30)
+
+    with pytest.raises(ProviderThrottled):
+        await limiter.acquire(Priority.INTERACTIVE)
+
+
+def test_batch_priority_context() -> None:
+    assert request_priority.get() == Priority.INTERACTIVE
+    with batch_priority():
+        assert request_priority.get() == Priority.BATCH
+    assert request_priority.get() == Priority.INTERACTIVE
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from app.services.http_cache import HTTPCache, attach_http_cache
+from app.services.shared_cache import attach_shared_cache, shared_cache_from_url
+from app.services.weather_providers.open_meteo import OpenMeteoProvider
+
+from tests.utils import CachingClient
+
+
+async def _serve_resp(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, store: dict
+) -> None:
+    """Заменитель сервера Redis: GET и SET ... PX поверх словаря."""
+    while line := await reader.readline():
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        command = args[0].upper()
+        if command == b"SET":
+            store[args[1]] = (args[2], time.time() + int(args[4]) / 1000)
+            writer.write(b"+OK\r\n")
+        elif command == b"GET":
+            value, expires_at = store.get(args[1], (None, 0.0))
+            if value is None or expires_at < time.time():
+                writer.write(b"$-1\r\n")
+            else:
+                writer.write(b"$%d\r\n%s\r\n" % (len(value), value))
+        else:
+            writer.write(b"-ERR unknown command\r\n")
+        await writer.drain()
+    writer.close()
+
+
+async def _second_worker_reuses_first(url: str) -> tuple[list, list]:
+    """Два "воркера" со своими HTTPCache и общим кэшем по одному адресу."""
+    clients, shared = [], []
+    for _ in range(2):
+        client = CachingClient()
+        attach_http_cache(client, HTTPCache())
+        shared.append(
+            attach_shared_cache(client, shared_cache_from_url(url, timeout=2.0))
+        )
+        clients.append(client)
+
+    first = await OpenMeteoProvider(clients[0]).get_weather(lat=52.52, lon=13.405)
+    second = await OpenMeteoProvider(clients[1]).get_weather(lat=52.52, lon=13.405)
+    for cache in shared:
+        await cache.close()
+
+    assert second == first
+    assert shared[1].hits == 1
+    return clients[0].requests, clients[1].requests
+
+
+@pytest.mark.anyio
+async def test_workers_share_results_through_sqlite(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+
+    first, second = await _second_worker_reuses_first(url)
+
+    assert len(first) == 1
+    assert second == []
+
+
+@pytest.mark.anyio
+async def test_workers_share_results_through_redis_protocol() -> None:
+    store: dict = {}
+    server = await asyncio.start_server(
+        lambda r, w: _serve_resp(r, w, store), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        first, second = await _second_worker_reuses_first(f"redis://127.0.0.1:{port}/0")
+
+    assert len(first) == 1
+    assert second == []
+    # Ключи API и координаты в хранилище не попадают - только хеш ключа
+    assert all(key.startswith(b"weather-analytics:provider:v1:") for key in store)
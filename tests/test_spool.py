@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.db import mongodb
+from app.db.mongodb import MongoDBClient, MongoWriteError, mongo_client
+from app.db.spool import WriteSpool
+from bson import ObjectId
+from pymongo.errors import ConnectionFailure
+
+
+class FakeCollection:
+
+    def __init__(self) -> None:
+        self.inserted: list[dict[str, Any]] = []
+
+    def insert_many(self, documents: list[dict[str, Any]], ordered: bool) -> None:
+        self.inserted.extend(documents)
+
+
+class FakeMongoClient:
+    """pymongo.MongoClient: ping либо успешен, либо ConnectionFailure."""
+
+    collections: dict[str, FakeCollection] = {}
+    reachable = True
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.admin = self
+
+    def command(self, name: str) -> dict[str, Any]:
+        if not self.reachable:
+            raise ConnectionFailure("connection refused")
+        return {"ok": 1}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.collections
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fresh_mongo(monkeypatch: pytest.MonkeyPatch) -> type[FakeMongoClient]:
+    """Клиент нового процесса: подключений ещё не было, спула нет."""
+    monkeypatch.delenv("MONGO_SPOOL_DIR", raising=False)
+    for name, value in (
+        ("_client", None),
+        ("_db", None),
+        ("_weather_collection", None),
+        ("_forecast_collection", None),
+        ("_spool", None),
+        ("_retry_at", 0.0),
+        ("_connect_attempted", False),
+    ):
+        monkeypatch.setattr(MongoDBClient, name, value)
+    monkeypatch.setattr(
+        FakeMongoClient,
+        "collections",
+        {"weather_current": FakeCollection(), "weather_forecast": FakeCollection()},
+    )
+    monkeypatch.setattr(mongodb, "MongoClient", FakeMongoClient)
+    return FakeMongoClient
+
+
+def test_spool_replays_records_and_skips_torn_tail(tmp_path: Path) -> None:
+    spool = WriteSpool(tmp_path)
+    document_id = ObjectId()
+    created_at = datetime(2025, 12, 1, 10, 0)
+    spool.append_many(
+        "weather_current", [{"_id": document_id, "created_at": created_at}]
+    )
+    spool.append_many("weather_forecast", [{"hours": 24}, {"hours": 48}])
+    spool.close()
+    # Процесс упал посреди записи: в конце сегмента - обрывок заголовка
+    with open(next(tmp_path.glob("sealed-*.log")), "ab") as f:
+        f.write(b"\x10\x00")
+
+    inserted: list[tuple[str, list[dict[str, Any]]]] = []
+    sent = WriteSpool(tmp_path).replay(
+        lambda collection, documents: inserted.append((collection, documents))
+    )
+
+    assert sent == 3
+    assert inserted == [
+        ("weather_current", [{"_id": document_id, "created_at": created_at}]),
+        ("weather_forecast", [{"hours": 24}, {"hours": 48}]),
+    ]
+    assert list(tmp_path.glob("*.log")) == []
+
+
+def test_damaged_record_is_skipped_and_segment_quarantined(tmp_path: Path) -> None:
+    spool = WriteSpool(tmp_path)
+    spool.append_many("weather_current", [{"n": 1}, {"n": 2}, {"n": 3}])
+    spool.close()
+    segment = next(tmp_path.glob("sealed-*.log"))
+    data = bytearray(segment.read_bytes())
+    # Портим последний байт второй записи: заголовок цел, CRC не сходится
+    record = len(data) // 3
+    data[2 * record - 1] ^= 0xFF
+    segment.write_bytes(bytes(data))
+
+    inserted: list[dict[str, Any]] = []
+    sent = WriteSpool(tmp_path).replay(
+        lambda collection, documents: inserted.extend(documents)
+    )
+
+    assert sent == 2
+    assert [d["n"] for d in inserted] == [1, 3]
+    # Сегмент не удалён, но и не проигрывается повторно
+    assert list(tmp_path.glob("*.log")) == []
+    assert [p.name for p in tmp_path.glob("damaged-*.bad")] == [
+        f"damaged-{segment.stem}.bad"
+    ]
+    assert not WriteSpool(tmp_path).pending()
+
+
+def test_workers_sharing_directory_replay_only_sealed_segments(
+    tmp_path: Path,
+) -> None:
+    first, second = WriteSpool(tmp_path), WriteSpool(tmp_path)
+    first.append_many("weather_current", [{"worker": 1}])
+    second.append_many("weather_current", [{"worker": 2}])
+
+    # У каждого воркера свой сегмент
+    assert len(list(tmp_path.glob("open-*.log"))) == 2
+
+    inserted: list[dict[str, Any]] = []
+
+    def insert(collection: str, documents: list[dict[str, Any]]) -> None:
+        inserted.extend(documents)
+
+    # Сегмент второго воркера ещё пишется: первый его не трогает
+    assert first.replay(insert) == 1
+    assert inserted == [{"worker": 1}]
+    assert len(list(tmp_path.glob("open-*.log"))) == 1
+
+    second.append_many("weather_current", [{"worker": 2}])
+    second.close()
+    assert first.replay(insert) == 2
+    assert inserted == [{"worker": 1}, {"worker": 2}, {"worker": 2}]
+    assert list(tmp_path.glob("*.log")) == []
+
+    # Воркер упал, не закрыв сегмент: блокировка снята, сегмент подбирается
+    crashed = WriteSpool(tmp_path)
+    crashed.append_many("weather_current", [{"worker": 3}])
+    crashed._active.close()  # type: ignore[union-attr]
+    assert first.replay(insert) == 1
+    assert inserted[-1] == {"worker": 3}
+
+
+def test_writes_go_to_spool_while_mongo_is_down(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(MongoDBClient, "_client", None)
+    monkeypatch.setattr(MongoDBClient, "_spool", WriteSpool(tmp_path))
+    # Не пытаться подключаться к настоящей MongoDB
+    monkeypatch.setattr(MongoDBClient, "_retry_at", float("inf"))
+
+    document_id = mongo_client.save_current_weather(
+        latitude=52.52,
+        longitude=13.405,
+        request_data={"lat": 52.52, "lon": 13.405},
+        response_data={"samples": []},
+        status_code=200,
+    )
+
+    assert isinstance(document_id, ObjectId)
+    assert mongo_client.spool is not None and mongo_client.spool.pending()
+
+    # MongoDB снова доступна: проигрыватель вставляет документ с тем же _id
+    collection = FakeCollection()
+    monkeypatch.setattr(MongoDBClient, "_client", object())
+    monkeypatch.setattr(MongoDBClient, "_db", {"weather_current": collection})
+
+    assert mongo_client.replay_spool() == 1
+    assert [d["_id"] for d in collection.inserted] == [document_id]
+    assert not mongo_client.spool.pending()
+
+
+def test_replay_stamps_updated_at(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    spool = WriteSpool(tmp_path)
+    observed_at = datetime(2025, 12, 1, 10, 0)
+    spool.append_many(
+        "weather_current", [{"created_at": observed_at, "updated_at": observed_at}]
+    )
+    collection = FakeCollection()
+    monkeypatch.setattr(MongoDBClient, "_spool", spool)
+    monkeypatch.setattr(MongoDBClient, "_client", object())
+    monkeypatch.setattr(MongoDBClient, "_db", {"weather_current": collection})
+
+    before = datetime.now()
+    assert mongo_client.replay_spool() == 1
+
+    # Коннектор с окном от max(updated_at) увидит документ из спула
+    [document] = collection.inserted
+    assert document["created_at"] == observed_at
+    assert document["updated_at"] >= before
+
+
+def test_first_write_without_spool_connects_inline(
+    fresh_mongo: type[FakeMongoClient],
+) -> None:
+    collection = fresh_mongo.collections["weather_current"]
+
+    ids = mongo_client.insert_current_weather_many([{"latitude": 52.52}])
+
+    assert len(ids) == 1
+    assert [d["_id"] for d in collection.inserted] == ids
+
+
+def test_unpersisted_write_without_spool_raises(
+    fresh_mongo: type[FakeMongoClient], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(fresh_mongo, "reachable", False)
+
+    with pytest.raises(MongoWriteError):
+        mongo_client.insert_forecasts_many([{"hours": 24}])
+    # Сохранение истории API по-прежнему не ломает ответ
+    assert (
+        mongo_client.save_forecast(
+            latitude=52.52,
+            longitude=13.405,
+            hours=24,
+            request_data={},
+            response_data={},
+            status_code=200,
+        )
+        is None
+    )
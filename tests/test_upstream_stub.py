@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from app.core.config import Settings
+from app.services.aggregator import ForecastAggregator, WeatherAggregator
+from app.services.weather_providers.registry import (
+    build_forecast_providers,
+    build_weather_providers,
+    configure_client,
+)
+from app.upstream_stub import Behavior, StubConfig, create_stub_app
+
+STUB_SETTINGS = dict(
+    openweather_api_key="test",
+    weatherapi_api_key="test",
+    weatherbit_api_key="test",
+    weatherstack_api_key="test",
+    http_cache_max_entries=0,
+    open_meteo_batch_window_ms=0,
+    upstream_base_url="http://stub",
+)
+
+
+def _stub_client(config: StubConfig, settings: Settings) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_stub_app(config))
+    )
+    configure_client(client, settings)
+    return client
+
+
+@pytest.mark.anyio
+async def test_all_providers_parse_stub_payloads() -> None:
+    settings = Settings(**STUB_SETTINGS)
+    config = StubConfig(default=Behavior(latency_ms=0))
+
+    async with _stub_client(config, settings) as client:
+        current = await WeatherAggregator(
+            build_weather_providers(client, settings)
+        ).get_aggregated_weather(lat=52.52, lon=13.405)
+        forecast = await ForecastAggregator(
+            build_forecast_providers(client, settings)
+        ).get_aggregated_forecast(lat=52.52, lon=13.405, hours=24)
+
+    assert len(current.samples) == 5
+    assert all(s.temperature_c is not None for s in current.samples)
+    assert len(forecast.forecasts) == 5
+    assert all(f.points for f in forecast.forecasts)
+
+
+@pytest.mark.anyio
+async def test_stub_simulates_errors_and_rate_limits() -> None:
+    settings = Settings(**STUB_SETTINGS)
+    config = StubConfig(
+        default=Behavior(latency_ms=0),
+        providers={
+            "weatherapi": Behavior(latency_ms=0, rate_limit_rate=1.0, retry_after=7),
+            "weatherbit": Behavior(latency_ms=0, error_rate=1.0),
+        },
+    )
+
+    async with _stub_client(config, settings) as client:
+        limited = await client.get("https://api.weatherapi.com/v1/current.json")
+        failed = await client.get("https://api.weatherbit.io/v2.0/current")
+        ok = await client.get(
+            "https://api.open-meteo.com/v1/forecast",
+            params={"latitude": "1,2", "longitude": "3,4", "current_weather": "true"},
+        )
+
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "7"
+    assert failed.status_code == 503
+    assert ok.status_code == 200
+    assert [loc["latitude"] for loc in ok.json()] == [1.0, 2.0]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+import pytest
+from app.core.config import Settings
+from app.services import warmup
+from app.services.http_cache import HTTPCache, attach_http_cache
+from app.services.warmup import WarmupPlan, load_warmup_plan, warm_up_cache
+
+from tests.utils import CachingClient
+
+
+class FakeMongoClient:
+
+    def get_popular_current_locations(self, since: datetime, limit: int) -> list:
+        return [{"lat": 52.52, "lon": 13.41, "requests": 40}]
+
+    def get_popular_forecast_locations(self, since: datetime, limit: int) -> list:
+        return [
+            {"lat": 52.52, "lon": 13.41, "hours": 48, "requests": 12},
+            {"lat": 55.75, "lon": 37.62, "hours": 24, "requests": 3},
+        ]
+
+
+def _settings(**overrides: Any) -> Settings:
+    return Settings(
+        _env_file=None,
+        open_meteo_requests_per_minute=0,
+        open_meteo_daily_budget=0,
+        **overrides,
+    )
+
+
+def test_warmup_plan_merges_configured_and_popular_locations(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(warmup, "mongo_client", FakeMongoClient())
+    settings = _settings(
+        cache_warmup_locations=[(55.75, 37.62)], cache_warmup_forecast_hours=[24]
+    )
+
+    plan = load_warmup_plan(settings)
+
+    assert plan.current == [(55.75, 37.62), (52.52, 13.41)]
+    # Прогноз Москвы на 24 часа есть и в настройках, и в истории
+    assert plan.forecasts == [(55.75, 37.62, 24), (52.52, 13.41, 48)]
+
+
+@pytest.mark.anyio
+async def test_warm_up_fills_cache_for_later_requests() -> None:
+    client = CachingClient()
+    cache = attach_http_cache(client, HTTPCache())
+    settings = _settings(cache_warmup_parallelism=2)
+    plan = WarmupPlan(current=[(52.52, 13.41)], forecasts=[(52.52, 13.41, 24)])
+
+    summary = await warm_up_cache(client, settings, plan)
+
+    assert summary["requests"] == 2 and summary["errors"] == 0
+    assert len(client.requests) == 2
+    assert len(cache) == 2
+
+    await warm_up_cache(client, settings, plan)
+    assert len(client.requests) == 2
+    assert cache.hits == 2
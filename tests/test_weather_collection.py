@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src" / "airflow" / "dags"))
+
+import weather_data_collection_logic as logic  # noqa: E402
+
+from tests.utils import MockResponse, SequenceClient  # noqa: E402
+
+BERLIN = {"name": "Berlin", "lat": 52.52, "lon": 13.405}
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Задержки backoff без ожидания и без джиттера."""
+    recorded: list[float] = []
+    sleep = asyncio.sleep
+
+    async def record(delay: float) -> None:
+        recorded.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(logic.asyncio, "sleep", record)
+    monkeypatch.setattr(logic.random, "random", lambda: 0.0)
+    return recorded
+
+
+async def _fetch(client: SequenceClient, job: dict, retries: int = 2) -> dict:
+    return await logic._fetch(
+        client, asyncio.Semaphore(1), "/api/weather/current", job, retries, 0.5
+    )
+
+
+@pytest.mark.anyio
+async def test_fetch_gives_up_after_retries_with_exponential_backoff(
+    sleeps: list[float],
+) -> None:
+    client = SequenceClient([MockResponse({}, status_code=503) for _ in range(3)])
+
+    result = await _fetch(client, {"city": BERLIN, "hours": 24})
+
+    assert result["status"] == "error"
+    assert result["error"] == "HTTP 503"
+    assert result["attempts"] == 3
+    assert sleeps == [0.5, 1.0]
+    assert client.requests[0]["params"] == {"lat": 52.52, "lon": 13.405, "hours": 24}
+
+
+@pytest.mark.anyio
+async def test_fetch_does_not_retry_client_errors(sleeps: list[float]) -> None:
+    client = SequenceClient([MockResponse({}, status_code=404)])
+
+    result = await _fetch(client, {"city": BERLIN})
+
+    assert (result["status"], result["error"], result["attempts"]) == (
+        "error",
+        "HTTP 404",
+        1,
+    )
+    assert sleeps == []
+
+
+@pytest.mark.anyio
+async def test_fetch_retries_transport_errors_until_success(
+    sleeps: list[float],
+) -> None:
+    client = SequenceClient(
+        [
+            httpx.ConnectError("connection refused"),
+            MockResponse({}, status_code=429),
+            MockResponse({}, headers={logic.DOCUMENT_ID_HEADER: "6740a1b2c3d4"}),
+        ]
+    )
+
+    result = await _fetch(client, {"city": BERLIN})
+
+    assert result["status"] == "success"
+    assert result["document_id"] == "6740a1b2c3d4"
+    assert result["attempts"] == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_shards_are_balanced_and_never_empty() -> None:
+    cities = [{"name": str(i), "lat": float(i), "lon": 0.0} for i in range(26)]
+
+    shards = logic.shard_cities(cities, 25)
+
+    assert [len(shard) for shard in shards] == [13, 13]
+    assert [city for shard in shards for city in shard] == cities
+    assert [len(shard) for shard in logic.shard_cities(cities, 5)] == [5, 5, 4, 4, 4, 4]
+    assert logic.shard_cities(cities[:3], 25) == [cities[:3]]
+    assert logic.shard_cities([], 25) == []
+    with pytest.raises(ValueError):
+        logic.shard_cities(cities, 0)
+
+
+def test_plan_shards_from_seed_drops_duplicate_coordinates(tmp_path: Path) -> None:
+    seed = tmp_path / "cities.csv"
+    seed.write_text(
+        "latitude,longitude,city,country\n"
+        "55.75,37.62,Moscow,Russia\n"
+        "55.75,37.62,Moskva,Russia\n"
+        "52.52,13.405,Berlin,Germany\n"
+        "48.85,2.35,Paris,France\n",
+        encoding="utf-8",
+    )
+
+    shards = logic.plan_shards(seed, shard_size=2)
+
+    assert [[city["name"] for city in shard["cities"]] for shard in shards] == [
+        ["Moscow", "Berlin"],
+        ["Paris"],
+    ]
+    assert shards[0]["cities"][1] == {"name": "Berlin", "lat": 52.52, "lon": 13.405}
+
+
+def test_plan_shards_for_empty_seed_maps_no_tasks(tmp_path: Path) -> None:
+    seed = tmp_path / "cities.csv"
+    seed.write_text("latitude,longitude,city,country\n", encoding="utf-8")
+
+    assert logic.plan_shards(seed, shard_size=25) == []
+
+
+def _manifest(kind: str, statuses: list[str]) -> dict:
+    return logic.build_manifest(
+        kind,
+        [
+            {"city": str(i), "status": status, "elapsed_ms": 1.0}
+            for i, status in enumerate(statuses)
+        ],
+    )
+
+
+def test_collection_is_published_when_any_shard_succeeded() -> None:
+    manifests = [
+        _manifest("current", ["success", "error"]),
+        None,  # упавший экземпляр задачи
+        _manifest("forecast", ["error", "success", "success"]),
+    ]
+
+    assert logic.summarize_shards(manifests) == {"shards": 2, "documents": 3}
+
+
+def test_collection_is_not_published_without_documents() -> None:
+    assert logic.summarize_shards(None) is None
+    assert logic.summarize_shards([None, None]) is None
+    assert logic.summarize_shards([_manifest("current", ["error"]), None]) is None
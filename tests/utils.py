@@ -7,9 +7,15 @@ import httpx
 
 class MockResponse:
 
-    def __init__(self, json_data: Dict[str, Any], status_code: int = 200) -> None:
+    def __init__(
+        self,
+        json_data: Dict[str, Any],
+        status_code: int = 200,
+        headers: Dict[str, str] | None = None,
+    ) -> None:
         self._json_data = json_data
         self.status_code = status_code
+        self.headers = headers or {}
 
     def json(self) -> Dict[str, Any]:
         return self._json_data
@@ -28,3 +34,52 @@ class MockAsyncClient:
     async def get(self, url: str, params: Dict[str, Any] | None = None) -> MockResponse:
         self.requests.append({"url": url, "params": params})
         return MockResponse(self._response_json)
+
+
+OPEN_METEO_JSON: Dict[str, Any] = {
+    "current_weather": {
+        "temperature": 18.5,
+        "windspeed": 10.0,
+        "time": "2025-12-01T10:00",
+    },
+    "hourly": {
+        "time": ["2025-12-01T10:00", "2025-12-01T11:00"],
+        "temperature_2m": [18.5, 19.0],
+    },
+}
+
+
+class SequenceClient:
+    """Клиент, отдающий заранее заданные ответы по очереди (исключения - бросая)."""
+
+    def __init__(self, responses: List[MockResponse | Exception]) -> None:
+        self._responses = responses
+        self.requests: List[Dict[str, Any]] = []
+
+    async def get(
+        self,
+        url: str,
+        params: Dict[str, Any] | None = None,
+        headers: Dict[str, str] | None = None,
+    ) -> MockResponse:
+        self.requests.append({"url": url, "params": params, "headers": headers})
+        response = self._responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class CachingClient:
+    """Клиент, на каждый запрос отдающий кэшируемый ответ Open-Meteo."""
+
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, Any]] = []
+
+    async def get(
+        self,
+        url: str,
+        params: Dict[str, Any] | None = None,
+        headers: Dict[str, str] | None = None,
+    ) -> MockResponse:
+        self.requests.append({"url": url, "params": params})
+        return MockResponse(OPEN_METEO_JSON, headers={"Cache-Control": "max-age=600"})